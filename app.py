@@ -1,27 +1,123 @@
 import streamlit as st
-import sqlite3
+import streamlit.components.v1 as components
+import copy
 import json
+import os
+from contextlib import contextmanager
 from openai import OpenAI
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import re
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+import degraded_mode
+import session_store
+from business_context import ContextBuilder
+from benchmark_catalog import shared_catalog as shared_benchmark_catalog
+from cost_ledger import shared_ledger
+from degraded_mode import default_health as api_health, is_unavailable
+from help_cache import looks_like_question, shared_cache as shared_help_cache
+import question_bank
+import score_analytics
+import script_profiler
+from llm_cassette import CASSETTE_DIR, wrap_client
+from hedging import default_policy as hedge_policy
+from llm_gateway import LLMGateway, ROUTING_CONFIG_PATH, call_phase, call_scope, default_usage_metrics as llm_metrics
+from message_store import MessageStore
+from report_artifacts import default_artifacts as report_artifacts
+from rate_limiter import RateLimitTimeout, default_limiter as rate_limiter
+from script_profiler import profiled
+from single_flight import default_group as single_flight
+from storage import shared_storage
+from tool_registry import ToolRegistry, default_metrics as tool_metrics
+from turn_control import DeadlineExceeded, TurnCancelled, current_turn, default_registry as turn_registry, warn_once
+
+def get_setting(name: str, default: str) -> str:
+    """Per-deployment setting: environment variable first, then Streamlit secrets"""
+    value = os.environ.get(name)
+    if value is None:
+        try:
+            value = st.secrets.get(name)
+        except Exception:
+            value = None
+    return default if value is None else str(value)
+
+# Opt-in per-rerun profiling: off | timing | cprofile; ?profile=timing turns timing on for one browser session
+SCRIPT_PROFILE = get_setting("SCRIPT_PROFILE", "off")
+
+def begin_rerun_profile() -> Optional[script_profiler.ScriptProfiler]:
+    """Start timing this rerun for the browser session, or None when profiling is off"""
+    mode = SCRIPT_PROFILE
+    if mode == "off" and st.query_params.get("profile"):
+        mode = "timing"
+    if mode == "off":
+        script_profiler.current_profiler.set(None)
+        return None
+    if 'rerun_profiler' not in st.session_state:
+        st.session_state.rerun_profiler = script_profiler.ScriptProfiler()
+    profiler = st.session_state.rerun_profiler
+    profiler.begin(st.session_state.get('current_session_id'),
+                   get_setting("SCRIPT_PROFILE_DIR", script_profiler.PROFILE_DIR) if mode == "cprofile" else None)
+    script_profiler.current_profiler.set(profiler)
+    return profiler
+
+rerun_profiler = begin_rerun_profile()
+
+# Record/replay of OpenAI traffic into per-session cassettes: off | record | replay (no network, no key)
+LLM_CASSETTE_MODE = get_setting("LLM_CASSETTE_MODE", "off")
+
 # Initialize OpenAI client - REPLACE WITH YOUR API KEY
-key=st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=key)
-# Database setup
-conn = sqlite3.connect('business_sessions.db', check_same_thread=False)
-conn.execute('''
-    CREATE TABLE IF NOT EXISTS business_sessions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        conversation_id TEXT,
-        industry TEXT,
-        business_state TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-''')
-conn.commit()
+if LLM_CASSETTE_MODE == "replay":
+    client = None
+else:
+    key=st.secrets["OPENAI_API_KEY"]
+    client = OpenAI(api_key=key)
+client = wrap_client(
+    client,
+    LLM_CASSETTE_MODE,
+    get_setting("LLM_CASSETTE_DIR", CASSETTE_DIR),
+    match=get_setting("LLM_CASSETTE_MATCH", "hash"),
+    realtime=float(get_setting("LLM_REPLAY_REALTIME", "0"))
+)
+# Token and cost accounting per session, phase and purpose, with the budgets from model_routing.json
+cost_ledger = shared_ledger(session_store.DB_PATH)
+# All model calls go through the gateway: per-purpose model routing (model_routing.json) and metrics
+llm = LLMGateway(client, router_path=get_setting("MODEL_ROUTING_CONFIG", ROUTING_CONFIG_PATH), ledger=cost_ledger)
+MAX_TOOL_ROUNDS = 5
+
+# TIC collection mode: "tool_loop" (tool-calling agent) or "structured" (one structured-output call per turn)
+TIC_TURN_MODE = get_setting("TIC_TURN_MODE", "tool_loop")
+# Database setup (versioned rows, shared safely between replicas)
+conn = session_store.connect()
+# Sessions, state, chat history and reports (business_sessions.db). Deferred jobs, the help cache, benchmark
+# catalog, cost ledger and score store are SQLite tables keyed by session id, so the app runs on sqlite only:
+# next to in-memory sessions those rows would survive a restart and attach to reused session ids
+STORAGE_BACKEND = get_setting("STORAGE_BACKEND", "sqlite")
+if STORAGE_BACKEND != "sqlite":
+    st.error(f"STORAGE_BACKEND={STORAGE_BACKEND} is not supported by the app (only sqlite). "
+             "The memory backend holds session state only and is meant for storage tests.")
+    st.stop()
+storage = shared_storage(STORAGE_BACKEND, session_store.DB_PATH)
+# Previously generated help answers ("what is TAM?") served locally above this similarity
+help_cache = shared_help_cache(session_store.DB_PATH, float(get_setting("HELP_CACHE_THRESHOLD", "0.82")))
+# Local benchmark companies per industry; the LLM re-ranks retrieved candidates instead of inventing a list
+benchmark_catalog = shared_benchmark_catalog(session_store.DB_PATH)
+BENCHMARK_CANDIDATES = 8
+# Brainstorming questions: "bank" picks from question_bank.json and generates live only when nothing fits
+QUESTION_SOURCE = get_setting("QUESTION_SOURCE", "bank")
+# Numeric evaluation scores across all sessions, for percentile ranks in the report
+score_store = score_analytics.shared_store(session_store.DB_PATH)
+# Time budget for one user turn (all its LLM calls, including queueing) and for report generation
+TURN_DEADLINE_SECONDS = float(get_setting("TURN_DEADLINE_SECONDS", "90"))
+EVALUATION_DEADLINE_SECONDS = float(get_setting("EVALUATION_DEADLINE_SECONDS", "240"))
+# Chat messages kept in memory and shown when a session opens; every message is stored, and
+# earlier ones are read back MESSAGE_PAGE at a time when the user asks for them
+MESSAGE_WINDOW = int(get_setting("MESSAGE_WINDOW", "40"))
+MESSAGE_PAGE = int(get_setting("MESSAGE_PAGE", "20"))
+# Sidebar panels for operators (LLM usage and cost across sessions, queues, caches, profiles): off | on
+ADMIN_PANELS = get_setting("ADMIN_PANELS", "off") == "on"
+# Local-only turns while the LLM API is down: auto (circuit breaker) | on | off
+api_health.mode = get_setting("DEGRADED_MODE", "auto")
 
 # Business consultation constants
 TIC_SEQUENCE = ["vision", "businessOverview", "marketSize", "targetCustomers", "valueProposition", "usp", "businessModel"]
@@ -34,6 +130,34 @@ TIC_DISPLAY_NAMES = {
     "usp": "Unique Selling Proposition & Differentiation",
     "businessModel": "Business Model & Revenue Strategy"
 }
+# Phrases that mark a message as part of a clarification exchange (kept as history for the completeness check)
+CLARIFICATION_CUES = ['specific', 'clarify', 'more details', 'what exactly', 'could you']
+TIC_QUESTIONS = {
+    "vision": {"display_name": TIC_DISPLAY_NAMES["vision"], "question": "What do you hope to achieve with this business in 5-10 years?"},
+    "businessOverview": {"display_name": TIC_DISPLAY_NAMES["businessOverview"], "question": "What exactly does your business do? What's your core offering?"},
+    "marketSize": {"display_name": TIC_DISPLAY_NAMES["marketSize"], "question": "How big is your target market? Any estimates?"},
+    "targetCustomers": {"display_name": TIC_DISPLAY_NAMES["targetCustomers"], "question": "Who exactly are your customers? What segments?"},
+    "valueProposition": {"display_name": TIC_DISPLAY_NAMES["valueProposition"], "question": "What key benefits do you provide customers?"},
+    "usp": {"display_name": TIC_DISPLAY_NAMES["usp"], "question": "What makes you different from competitors? What's unique?"},
+    "businessModel": {"display_name": TIC_DISPLAY_NAMES["businessModel"], "question": "How do you make money? What's your revenue model?"}
+}
+
+# Strict output schema for the single-call TIC turn (TIC_TURN_MODE == "structured")
+TIC_TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
+        "intent": {"type": "string", "enum": ["answer", "question"]},
+        "analysis_summary": {"type": "string"},
+        "is_complete": {"type": "boolean"},
+        "clarification_question": {"type": "string"},
+        "next_question": {"type": "string"},
+        "help_reply": {"type": "string"}
+    },
+    "required": ["tic_name", "intent", "analysis_summary", "is_complete",
+                 "clarification_question", "next_question", "help_reply"],
+    "additionalProperties": False
+}
 
 # AI-Generated Dynamic Questions (max 20 questions)
 # Questions are now generated dynamically based on:
@@ -44,251 +168,501 @@ TIC_DISPLAY_NAMES = {
 #   Value Proposition, Sustainability, Execution Feasibility
 # - Progress-based focus areas for strategic questioning
 
+# Response parsers for llm.*_parsed: raising here counts as a parse failure and may escalate the model tier
+def parse_json_content(response) -> dict:
+    data = json.loads(response.choices[0].message.content.strip())
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    return data
+
+def parse_completeness_verdict(response) -> str:
+    verdict = response.choices[0].message.content.strip().upper().strip('."\'')
+    if verdict not in ("COMPLETE", "INCOMPLETE"):
+        raise ValueError(f"Unexpected completeness verdict: {verdict}")
+    return verdict
+
+def parse_company_suggestions(response) -> list:
+    companies_data = json.loads(response.choices[0].message.content)
+    # Handle both array and object responses
+    if isinstance(companies_data, dict) and 'companies' in companies_data:
+        companies = companies_data['companies']
+    elif isinstance(companies_data, list):
+        companies = companies_data
+    else:
+        companies = []
+    companies = [comp for comp in companies if isinstance(comp, dict) and comp.get('name') and comp.get('description')]
+    # Each name becomes a selection button, so a repeated company would toggle itself off
+    names = set()
+    companies = [comp for comp in companies if comp['name'].lower() not in names and not names.add(comp['name'].lower())]
+    if not companies:
+        raise ValueError("No usable company suggestions")
+    return companies
+
+# ===================================================================
+# PROMPT TEMPLATES (static prefixes for provider prompt caching)
+# ===================================================================
+# Prompt caching matches on the longest identical prefix, so each call site sends
+# one of these fixed strings first and appends session-specific data after it,
+# ordered from most stable (business context) to most volatile (current answer).
+
+COMPLETENESS_PROMPT = """You are analyzing whether a user's response to a business question was complete and specific enough.
+
+You will receive the TIC question, the user's response, an analysis summary, recent conversation history and the number of clarification attempts already made (0=first attempt, 1+=already asked for clarification).
+
+IMPORTANT CONTEXT:
+- If clarification has already been requested, be MORE LENIENT
+- Look at conversation history to see if user has been progressively providing more detail
+- Don't keep asking for the same type of clarification repeatedly
+- If the user is clearly making an effort to provide details, accept reasonable responses
+
+Based on the analysis summary AND conversation context, determine if the user's response was:
+- COMPLETE: Specific enough, addresses the question requirements, or shows good faith effort after previous clarifications
+- INCOMPLETE: Still genuinely vague/missing key information AND this is a reasonable first/second clarification request
+
+The analysis summary will often indicate if something is missing, but consider the conversation flow and clarification history.
+
+Respond with only one word: "COMPLETE" or "INCOMPLETE"
+"""
+
+FIRST_QUESTION_PROMPT = """You are an expert business analyst conducting a deep-dive evaluation. Based on the business idea and benchmark companies provided, generate the FIRST strategic question to begin a comprehensive 20-question evaluation.
+
+Generate the most important first question that will:
+1. Build on the existing TIC information
+2. Consider the competitive landscape from benchmark companies
+3. Focus on the 7 evaluation criteria: Vision, Market Opportunity, USP & Competitive Advantage, Value Proposition, Sustainability, or Execution Feasibility
+4. Be specific and strategic (not generic)
+5. Help evaluate investment potential
+
+Return only the question text, no numbering or formatting."""
+
+NEXT_QUESTION_PROMPT = """You are an expert business analyst conducting a deep-dive evaluation. Based on the business context, previous Q&A, and benchmark companies provided, generate the NEXT strategic question in a 20-question evaluation.
+
+Generate a strategic question that:
+1. Builds on previous answers and identified gaps
+2. Considers the competitive landscape and benchmark companies
+3. Focuses on the 7 evaluation criteria: Vision, Market Opportunity, USP & Competitive Advantage, Value Proposition, Sustainability, or Execution Feasibility
+4. Is specific and contextual (not generic)
+5. Helps evaluate investment potential and business viability
+6. Avoids repeating topics already well-covered
+7. Follows the focus area given for this question
+
+Return only the question text, no numbering or formatting."""
+
+BENCHMARK_COMPANIES_PROMPT = """Based on the business idea provided, suggest 5-6 real companies that would serve as good benchmarks for comparison and analysis.
+
+Provide real companies that are:
+1. Similar in business model or target market
+2. Well-known and established
+3. Relevant for competitive analysis
+4. Mix of direct and indirect competitors
+
+Return as a JSON object with this format:
+{
+  "companies": [
+    {
+      "name": "Company Name",
+      "description": "Brief description of what they do and why relevant",
+      "relevance": "Why this is a good benchmark"
+    }
+  ]
+}
+
+Return only valid JSON, no other text."""
+
+BENCHMARK_RERANK_PROMPT = """Choose the 5-6 companies that would serve as the best benchmarks for comparison and analysis of the business idea provided.
+
+Pick from the candidate list first and keep candidate names exactly as written. Prefer:
+1. Similar business model or target market
+2. Well-known and established companies
+3. A mix of direct and indirect competitors
+
+If fewer than 5 candidates are a good fit, add well-known real companies to fill the gaps.
+
+Return as a JSON object with this format:
+{
+  "companies": [
+    {
+      "name": "Company Name",
+      "description": "Brief description of what they do and why relevant",
+      "relevance": "Why this is a good benchmark"
+    }
+  ]
+}
+
+Return only valid JSON, no other text."""
+
+BENCHMARKING_CHAT_PROMPT = "You are a business consultant. The user is in benchmarking phase and needs to select 3 companies from the sidebar. Be helpful and guide them to complete the selection. Keep response brief and conversational."
+
+HELP_ANSWER_PROMPT = "You are a business coach. Answer the founder's question about the given topic in 2-4 sentences with one short example. The answer is shared with other founders: explain the concept in general terms and leave out any company, product, place or number mentioned in the question. If a question to return to is given, end by asking it again."
+
+TIC_SUMMARY_PROMPT = "You are a business analyst. Summarize the founder's answer to the given business component question in 1-2 specific sentences, keeping their numbers and names. Return only the summary."
+
+ANSWER_VALIDATION_PROMPT = """Analyze a user response to a brainstorming question.
+
+Determine if the user response is:
+
+1. VALID_ANSWER: A meaningful attempt to answer the question (even if brief or needs more detail)
+2. ASKING_QUESTION: User is asking for clarification or doesn't understand the question 
+3. GIBBERISH: Random letters, nonsense, or completely unrelated content
+4. NEEDS_HELP: User seems confused or stuck
+
+For ASKING_QUESTION, provide a helpful explanation and rephrase the question.
+For GIBBERISH or NEEDS_HELP, provide guidance to help them answer properly.
+
+Respond in this exact JSON format:
+{
+  "category": "VALID_ANSWER|ASKING_QUESTION|GIBBERISH|NEEDS_HELP",
+  "explanation": "Brief explanation of why this category was chosen",
+  "confidence": 0.0-1.0 (how sure you are about the category),
+  "response": "What to say to the user (if not VALID_ANSWER)"
+}
+
+Be helpful and encouraging. If user asks about terms like TAM, explain them clearly."""
+
+TIC_ENHANCEMENT_PROMPT = """You are analyzing a user's brainstorming response to understand how it relates to and updates their business vision across different components.
+
+You will receive the current business context, the brainstorming question and the user's answer.
+
+Analyze this answer and determine:
+1. Which TIC component(s) this most significantly relates to and enhances
+2. What new insights about the user's vision this reveals
+3. How this should update/enhance the existing summaries to better reflect their evolving vision
+
+Available TIC categories:
+- vision: Long-term goals, purpose, impact the business aims to achieve
+- businessOverview: Core offering, what the business does, how it works
+- marketSize: Market opportunity, size, growth trends, timing
+- targetCustomers: Customer segments, demographics, characteristics
+- valueProposition: Customer benefits, problems solved, value delivered
+- usp: Unique advantages, differentiation, competitive positioning
+- businessModel: Revenue streams, cost structure, sustainability, funding
+
+Provide your response in this JSON format:
+{
+  "primary_tic": "tic_name",
+  "secondary_tics": ["tic_name1", "tic_name2"],
+  "vision_insights": "Key insights about user's evolving vision",
+  "enhanced_summaries": {
+    "tic_name": "Enhanced summary that better reflects user's vision"
+  }
+}"""
+
+EVALUATION_PROMPT = """
+You are an expert venture analyst with extensive experience evaluating startup pitches across various industries. You have a deep understanding of market dynamics, business models, and investment criteria. Based on the detailed business idea context and benchmark companies provided after these instructions, perform a comprehensive, data-driven evaluation.
+
+Return your analysis **STRICTLY** in the **following JSON format only** (no explanation or extra text):
+
+{
+  "detailed_feedback": "<Insightful comments and qualitative evaluation from the AI reviewer. Provide comprehensive analysis highlighting key strengths, areas for improvement, and strategic recommendations.>",
+  "evaluation_feedback": {
+    "Market Opportunity & Growth": {
+      "score": "x/5",
+      "rationale": "<How large and fast-growing is the target market? Is this the right time to enter? Include TAM/SAM/SOM analysis, growth trends, timing, and revenue model assessment.>"
+    },
+    "USP & Competitive Advantage": {
+      "score": "x/5",
+      "rationale": "<What makes the idea unique? Can it stand out and stay ahead of competitors? Analyze differentiation, competitive landscape, barriers to entry, and defensibility.>"
+    },
+    "Value Proposition": {
+      "score": "x/5",
+      "rationale": "<What problem does it solve for users—and does it excite or inspire them? Evaluate customer pain points, solution fit, and emotional appeal.>"
+    },
+    "Sustainability": {
+      "score": "x/5",
+      "rationale": "<Is the business model environmentally, socially, and economically sustainable? Assess long-term viability and impact.>"
+    },
+    "Execution Feasibility": {
+      "score": "x/5",
+      "rationale": "<Can the idea be built and scaled with available resources and technology? Evaluate technical requirements, team capabilities, funding needs, and implementation risks.>"
+    },
+    "overall": {
+      "score": "x/25",
+      "feedback": "<Executive summary highlighting key strengths, critical risks, and strategic recommendations>"
+    }
+  },
+  "paradigm_shift_drivers": [
+    "<Key trend 1 influencing this business (e.g., generative AI, personalization, sustainability)>",
+    "<Key trend 2 influencing this business (e.g., remote work, digital transformation)>",
+    "<Key trend 3 influencing this business (e.g., social commerce, climate change)>"
+  ],
+  "benchmark_insights": "<Analysis of selected benchmark companies: What can we learn from their strategies? How do they validate market opportunity and competitive positioning?>",
+  "spider_chart_business_opportunity": {
+    "Market Opportunity & Growth": "x/5",
+    "USP & Competitive Advantage": "x/5",
+    "Value Proposition": "x/5",
+    "Sustainability": "x/5",
+    "Execution Feasibility": "x/5",
+    "total": "x/25"
+  },
+  "investment_attractiveness": {
+    "Market Opportunity & Growth": {
+      "score": "x/5",
+      "rationale": "<Analysis of market attractiveness, growth trajectory, and timing>"
+    },
+    "USP & Competitive Advantage": {
+      "score": "x/5",
+      "rationale": "<Evaluation of uniqueness and competitive defensibility>"
+    },
+    "Execution Feasibility": {
+      "score": "x/5",
+      "rationale": "<Assessment of implementation potential and resource availability>"
+    },
+    "total": "x/15"
+  },
+  "ai_investment_recommendation": "<One of: YES, MAYBE, NEUTRAL, NO>",
+  "investment_rationale": "<Concise explanation of the investment recommendation with key decision factors>"
+}
+
+Respond only with valid JSON. Avoid markdown or code fences. Provide precise, professional, and data-backed reasoning. Keep rationales concise but insightful (2-3 sentences each).
+
+ALL SCORES MUST BE OUT OF 5, not 10. The "overall" score must be the SUM of all five category scores, with a total out of 25. For the AI investment recommendation, provide one of these exact values: YES, MAYBE, NEUTRAL, or NO.
+
+Critically compare this business idea against the benchmark companies. Consider industry trends, competitive dynamics, market saturation, and unique opportunities or challenges in this space.
+"""
+
 # ===================================================================
 # STATE MANAGER AGENT (Data & Progress Handler)
 # ===================================================================
 
 class StateManagerAgent:
     def __init__(self):
-        self.tools = [
-            {
-                "type": "function",
-                "name": "update_tic_progress",
-                "description": "Update the progress of a specific TIC",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
-                        "status": {"type": "string", "enum": ["pending", "in_progress", "completed", "confirmed"]},
-                        "summary": {"type": "string"},
-                        "user_response": {"type": "string"}
-                    },
-                    "required": ["tic_name", "status"],
-                    "additionalProperties": False
-                }
-            },
+        self.registry = ToolRegistry()
+        self.registry.register(
+            "update_tic_progress",
+            "Update the progress of a specific TIC",
             {
-                "type": "function",
-                "name": "update_brainstorming_progress",
-                "description": "Update brainstorming question progress with dynamic question data",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "question_index": {"type": "integer"},
-                        "user_answer": {"type": "string"},
-                        "status": {"type": "string", "enum": ["completed"]},
-                        "question_text": {"type": "string", "description": "The actual question text that was asked"},
-                        "question_category": {"type": "string", "description": "Category of the question (e.g., Vision, Market, USP, etc.)"}
-                    },
-                    "required": ["question_index", "user_answer", "status"],
-                    "additionalProperties": False
-                }
+                "type": "object",
+                "properties": {
+                    "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
+                    "status": {"type": "string", "enum": ["pending", "in_progress", "completed", "confirmed"]},
+                    "summary": {"type": "string"},
+                    "user_response": {"type": "string"}
+                },
+                "required": ["tic_name", "status"],
+                "additionalProperties": False
             },
+            self._update_tic_progress
+        )
+        self.registry.register(
+            "update_brainstorming_progress",
+            "Update brainstorming question progress with dynamic question data",
             {
-                "type": "function",
-                "name": "get_tic_status",
-                "description": "Get the current status and progress of all TICs",
-                "parameters": {"type": "object", "properties": {}, "additionalProperties": False}
+                "type": "object",
+                "properties": {
+                    "question_index": {"type": "integer"},
+                    "user_answer": {"type": "string"},
+                    "status": {"type": "string", "enum": ["completed"]},
+                    "question_text": {"type": "string", "description": "The actual question text that was asked"},
+                    "question_category": {"type": "string", "description": "Category of the question (e.g., Vision, Market, USP, etc.)"}
+                },
+                "required": ["question_index", "user_answer", "status"],
+                "additionalProperties": False
             },
+            self._update_brainstorming_progress
+        )
+        self.registry.register(
+            "get_tic_status",
+            "Get the current status and progress of all TICs",
+            {"type": "object", "properties": {}, "additionalProperties": False},
+            self._get_tic_status
+        )
+        self.registry.register(
+            "get_brainstorming_status",
+            "Get current brainstorming progress",
+            {"type": "object", "properties": {}, "additionalProperties": False},
+            self._get_brainstorming_status
+        )
+        self.registry.register(
+            "validate_tic_data",
+            "Validate if a TIC has sufficient information",
             {
-                "type": "function",
-                "name": "get_brainstorming_status", 
-                "description": "Get current brainstorming progress",
-                "parameters": {"type": "object", "properties": {}, "additionalProperties": False}
+                "type": "object",
+                "properties": {
+                    "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
+                    "user_response": {"type": "string"}
+                },
+                "required": ["tic_name", "user_response"],
+                "additionalProperties": False
             },
-            {
-                "type": "function",
-                "name": "validate_tic_data",
-                "description": "Validate if a TIC has sufficient information",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
-                        "user_response": {"type": "string"}
-                    },
-                    "required": ["tic_name", "user_response"],
-                    "additionalProperties": False
-                }
-            }
-        ]
+            self._validate_tic_data
+        )
+        self.tools = self.registry.specs
 
     def handle_tool_call(self, tool_name: str, arguments: dict) -> dict:
         print(f"\n{'='*60}")
         print(f"STATE MANAGER: Tool Call Started - {tool_name}")
         print(f"Arguments: {json.dumps(arguments, indent=2)}")
         print(f"{'='*60}")
-        
-        if tool_name == "get_tic_status":
-            result = {
-                "success": True,
-                "data": {
-                    "current_tic": st.session_state.business_state['current_tic'],
-                    "phase": st.session_state.business_state['phase'],
-                    "tic_progress": st.session_state.business_state['tic_progress'],
-                    "industry": st.session_state.business_state['industry'],
-                    "completed_count": st.session_state.business_state['completed_count'],
-                    "total_tics": len(TIC_SEQUENCE),
-                    "benchmark_companies": st.session_state.business_state.get('benchmark_companies', []),
-                    "selected_companies": st.session_state.business_state.get('selected_companies', [])
-                },
-                "message": f"Status retrieved. {st.session_state.business_state['completed_count']}/{len(TIC_SEQUENCE)} TICs completed."
-            }
-            print(f"TIC STATUS RESPONSE: {json.dumps(result, indent=2)}")
-            return result
 
-        elif tool_name == "get_brainstorming_status":
-            brainstorming_state = st.session_state.business_state.get('brainstorming_progress', {})
-            result = {
-                "success": True,
-                "data": {
-                    "current_question": brainstorming_state.get('current_question', 0),
-                    "completed_count": brainstorming_state.get('completed_count', 0),
-                    "total_questions": 20,
-                    "can_exit": brainstorming_state.get('completed_count', 0) >= 10,
-                    "answers": brainstorming_state.get('answers', {}),
-                    "phase": st.session_state.business_state['phase']
-                },
-                "message": f"Brainstorming: {brainstorming_state.get('completed_count', 0)}/20 questions completed"
-            }
-            print(f"BRAINSTORMING STATUS RESPONSE: {json.dumps(result, indent=2)}")
-            return result
-            
-        elif tool_name == "update_tic_progress":
-            tic_name = arguments.get('tic_name')
-            status = arguments.get('status')
-            summary = arguments.get('summary', '')
-            user_response = arguments.get('user_response', '')
-            
-            print(f"UPDATING TIC PROGRESS: {tic_name} -> {status}")
-            
-            previous_count = st.session_state.business_state['completed_count']
-            
-            # Update the TIC progress
-            st.session_state.business_state['tic_progress'][tic_name] = {
-                'status': status,
-                'summary': summary,
-                'user_response': user_response,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Update completed count and current TIC
-            if status == 'confirmed':
-                st.session_state.business_state['completed_count'] = sum(
-                    1 for tic in TIC_SEQUENCE 
-                    if st.session_state.business_state['tic_progress'][tic]['status'] == 'confirmed'
-                )
-                
-                current_index = TIC_SEQUENCE.index(tic_name)
-                if current_index + 1 < len(TIC_SEQUENCE):
-                    st.session_state.business_state['current_tic'] = TIC_SEQUENCE[current_index + 1]
-                else:
-                    st.session_state.business_state['current_tic'] = 'completed'
-                    st.session_state.business_state['phase'] = 'benchmarking'
-            
-            print(f"STATE CHANGES: {previous_count} -> {st.session_state.business_state['completed_count']}")
-            
-            result = {
-                "success": True,
-                "data": {
-                    "updated_tic": tic_name,
-                    "new_status": status,
-                    "completed_count": st.session_state.business_state['completed_count'],
-                    "next_tic": st.session_state.business_state['current_tic']
-                },
-                "message": f"TIC {tic_name} updated to {status}"
-            }
-            
-            print(f"UPDATE RESULT: {json.dumps(result, indent=2)}")
-            return result
+        result = self.registry.dispatch(tool_name, arguments)
+        if not result['success']:
+            print(f"STATE MANAGER TOOL ERROR: {json.dumps(result, indent=2)}")
+        return result
 
-        elif tool_name == "update_brainstorming_progress":
-            question_index = arguments.get('question_index')
-            user_answer = arguments.get('user_answer')
-            status = arguments.get('status')
-            question_text = arguments.get('question_text', 'Dynamic AI-generated question')
-            question_category = arguments.get('question_category', 'General')
-
-            print(f"UPDATING BRAINSTORMING: Question {question_index + 1}/20")
-
-            # Initialize brainstorming progress if not exists
-            if 'brainstorming_progress' not in st.session_state.business_state:
-                st.session_state.business_state['brainstorming_progress'] = {
-                    'current_question': 0,
-                    'completed_count': 0,
-                    'answers': {}
-                }
+    def _get_tic_status(self, arguments: dict) -> dict:
+        result = {
+            "success": True,
+            "data": {
+                "current_tic": st.session_state.business_state['current_tic'],
+                "phase": st.session_state.business_state['phase'],
+                "tic_progress": st.session_state.business_state['tic_progress'],
+                "industry": st.session_state.business_state['industry'],
+                "completed_count": st.session_state.business_state['completed_count'],
+                "total_tics": len(TIC_SEQUENCE),
+                "benchmark_companies": st.session_state.business_state.get('benchmark_companies', []),
+                "selected_companies": st.session_state.business_state.get('selected_companies', [])
+            },
+            "message": f"Status retrieved. {st.session_state.business_state['completed_count']}/{len(TIC_SEQUENCE)} TICs completed."
+        }
+        print(f"TIC STATUS RESPONSE: {json.dumps(result, indent=2)}")
+        return result
 
-            brainstorming_state = st.session_state.business_state['brainstorming_progress']
-            previous_count = brainstorming_state['completed_count']
+    def _get_brainstorming_status(self, arguments: dict) -> dict:
+        brainstorming_state = st.session_state.business_state.get('brainstorming_progress', {})
+        result = {
+            "success": True,
+            "data": {
+                "current_question": brainstorming_state.get('current_question', 0),
+                "completed_count": brainstorming_state.get('completed_count', 0),
+                "total_questions": 20,
+                "can_exit": brainstorming_state.get('completed_count', 0) >= 10,
+                "answers": brainstorming_state.get('answers', {}),
+                "phase": st.session_state.business_state['phase']
+            },
+            "message": f"Brainstorming: {brainstorming_state.get('completed_count', 0)}/20 questions completed"
+        }
+        print(f"BRAINSTORMING STATUS RESPONSE: {json.dumps(result, indent=2)}")
+        return result
 
-            # Update the answer with dynamic question data
-            brainstorming_state['answers'][str(question_index)] = {
-                'question': question_text,
-                'category': question_category,
-                'answer': user_answer,
-                'timestamp': datetime.now().isoformat()
-            }
+    def _update_tic_progress(self, arguments: dict) -> dict:
+        tic_name = arguments.get('tic_name')
+        status = arguments.get('status')
+        summary = arguments.get('summary', '')
+        user_response = arguments.get('user_response', '')
 
-            if status == 'completed':
-                # Increment completed count properly - it should be question_index + 1
-                brainstorming_state['completed_count'] = question_index + 1
+        print(f"UPDATING TIC PROGRESS: {tic_name} -> {status}")
 
-                # Set next question
-                if brainstorming_state['completed_count'] < 20:
-                    brainstorming_state['current_question'] = brainstorming_state['completed_count']
-                else:
-                    brainstorming_state['current_question'] = 20
-            
-            print(f"BRAINSTORMING CHANGES: {previous_count} -> {brainstorming_state['completed_count']}")
-            
-            result = {
-                "success": True,
-                "data": {
-                    "question_index": question_index,
-                    "completed_count": brainstorming_state['completed_count'],
-                    "next_question": brainstorming_state['current_question'],
-                    "total_questions": 20,
-                    "can_exit": brainstorming_state['completed_count'] >= 10,
-                    "all_completed": brainstorming_state['completed_count'] >= 20
-                },
-                "message": f"Question {question_index + 1} completed"
-            }
-            
-            print(f"BRAINSTORMING UPDATE RESULT: {json.dumps(result, indent=2)}")
-            return result
-            
-        elif tool_name == "validate_tic_data":
-            tic_name = arguments.get('tic_name')
-            user_response = arguments.get('user_response', '')
-            
-            is_valid = len(user_response.strip()) >= 20
-            validation_notes = []
-            
-            if not is_valid:
-                validation_notes.append("Response too short (minimum 20 characters)")
-            
-            result = {
-                "success": True,
-                "data": {
-                    "is_valid": is_valid,
-                    "tic_name": tic_name,
-                    "response_length": len(user_response),
-                    "validation_notes": validation_notes
-                },
-                "message": "Validation complete" if is_valid else "Validation issues found"
-            }
-            
-            print(f"VALIDATION RESULT: {json.dumps(result, indent=2)}")
-            return result
-        
-        else:
-            error_result = {
-                "success": False,
-                "data": {},
-                "message": f"Unknown function: {tool_name}"
+        previous_count = st.session_state.business_state['completed_count']
+
+        # Update the TIC progress
+        st.session_state.business_state['tic_progress'][tic_name] = {
+            'status': status,
+            'summary': summary,
+            'user_response': user_response,
+            'timestamp': datetime.now().isoformat()
+        }
+        context_builder().invalidate_tic(tic_name)
+
+        # Update completed count and current TIC
+        if status == 'confirmed':
+            st.session_state.business_state['completed_count'] = sum(
+                1 for tic in TIC_SEQUENCE
+                if st.session_state.business_state['tic_progress'][tic]['status'] == 'confirmed'
+            )
+
+            current_index = TIC_SEQUENCE.index(tic_name)
+            if current_index + 1 < len(TIC_SEQUENCE):
+                st.session_state.business_state['current_tic'] = TIC_SEQUENCE[current_index + 1]
+            else:
+                st.session_state.business_state['current_tic'] = 'completed'
+                st.session_state.business_state['phase'] = 'benchmarking'
+
+        print(f"STATE CHANGES: {previous_count} -> {st.session_state.business_state['completed_count']}")
+
+        result = {
+            "success": True,
+            "data": {
+                "updated_tic": tic_name,
+                "new_status": status,
+                "completed_count": st.session_state.business_state['completed_count'],
+                "next_tic": st.session_state.business_state['current_tic']
+            },
+            "message": f"TIC {tic_name} updated to {status}"
+        }
+
+        print(f"UPDATE RESULT: {json.dumps(result, indent=2)}")
+        return result
+
+    def _update_brainstorming_progress(self, arguments: dict) -> dict:
+        question_index = arguments.get('question_index')
+        user_answer = arguments.get('user_answer')
+        status = arguments.get('status')
+        question_text = arguments.get('question_text', 'Dynamic AI-generated question')
+        question_category = arguments.get('question_category', 'General')
+
+        print(f"UPDATING BRAINSTORMING: Question {question_index + 1}/20")
+
+        # Initialize brainstorming progress if not exists
+        if 'brainstorming_progress' not in st.session_state.business_state:
+            st.session_state.business_state['brainstorming_progress'] = {
+                'current_question': 0,
+                'completed_count': 0,
+                'answers': {}
             }
-            print(f"UNKNOWN FUNCTION ERROR: {json.dumps(error_result, indent=2)}")
-            return error_result
+
+        brainstorming_state = st.session_state.business_state['brainstorming_progress']
+        previous_count = brainstorming_state['completed_count']
+
+        # Update the answer with dynamic question data
+        brainstorming_state['answers'][str(question_index)] = {
+            'question': question_text,
+            'category': question_category,
+            'answer': user_answer,
+            'timestamp': datetime.now().isoformat()
+        }
+        context_builder().invalidate_answer(question_index)
+
+        if status == 'completed':
+            # Increment completed count properly - it should be question_index + 1
+            brainstorming_state['completed_count'] = question_index + 1
+
+            # Set next question
+            if brainstorming_state['completed_count'] < 20:
+                brainstorming_state['current_question'] = brainstorming_state['completed_count']
+            else:
+                brainstorming_state['current_question'] = 20
+
+        print(f"BRAINSTORMING CHANGES: {previous_count} -> {brainstorming_state['completed_count']}")
+
+        result = {
+            "success": True,
+            "data": {
+                "question_index": question_index,
+                "completed_count": brainstorming_state['completed_count'],
+                "next_question": brainstorming_state['current_question'],
+                "total_questions": 20,
+                "can_exit": brainstorming_state['completed_count'] >= 10,
+                "all_completed": brainstorming_state['completed_count'] >= 20
+            },
+            "message": f"Question {question_index + 1} completed"
+        }
+
+        print(f"BRAINSTORMING UPDATE RESULT: {json.dumps(result, indent=2)}")
+        return result
+
+    def _validate_tic_data(self, arguments: dict) -> dict:
+        tic_name = arguments.get('tic_name')
+        user_response = arguments.get('user_response', '')
+
+        is_valid = len(user_response.strip()) >= 20
+        validation_notes = []
+
+        if not is_valid:
+            validation_notes.append("Response too short (minimum 20 characters)")
+
+        result = {
+            "success": True,
+            "data": {
+                "is_valid": is_valid,
+                "tic_name": tic_name,
+                "response_length": len(user_response),
+                "validation_notes": validation_notes
+            },
+            "message": "Validation complete" if is_valid else "Validation issues found"
+        }
+
+        print(f"VALIDATION RESULT: {json.dumps(result, indent=2)}")
+        return result
 
 # ===================================================================
 # BUSINESS CONSULTANT AGENT (Conversational Leader) - UPDATED
@@ -297,67 +671,70 @@ class StateManagerAgent:
 class BusinessConsultantAgent:
     def __init__(self, state_manager: StateManagerAgent):
         self.state_manager = state_manager
-        self.tools = [
-            {
-                "type": "function",
-                "name": "get_business_status",
-                "description": "Get current business consultation status from state manager",
-                "parameters": {"type": "object", "properties": {}, "additionalProperties": False}
-            },
+        # Set by provide_help during a tool-loop turn
+        self.help_requested = False
+        self.registry = ToolRegistry()
+        self.registry.register(
+            "get_business_status",
+            "Get current business consultation status from state manager",
+            {"type": "object", "properties": {}, "additionalProperties": False},
+            self._get_business_status
+        )
+        self.registry.register(
+            "analyze_user_response",
+            "Analyze user response and update TIC progress",
             {
-                "type": "function",
-                "name": "analyze_user_response",
-                "description": "Analyze user response and update TIC progress",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
-                        "user_response": {"type": "string"},
-                        "analysis_summary": {"type": "string"}
-                    },
-                    "required": ["tic_name", "user_response", "analysis_summary"],
-                    "additionalProperties": False
-                }
+                "type": "object",
+                "properties": {
+                    "tic_name": {"type": "string", "enum": TIC_SEQUENCE},
+                    "user_response": {"type": "string"},
+                    "analysis_summary": {"type": "string"}
+                },
+                "required": ["tic_name", "user_response", "analysis_summary"],
+                "additionalProperties": False
             },
+            self._analyze_user_response
+        )
+        self.registry.register(
+            "generate_benchmark_companies",
+            "Generate real benchmark companies",
             {
-                "type": "function",
-                "name": "generate_benchmark_companies",
-                "description": "Generate real benchmark companies",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "company_suggestions": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "name": {"type": "string"},
-                                    "description": {"type": "string"},
-                                    "relevance": {"type": "string"}
-                                }
-                            }
+                "type": "object",
+                "properties": {
+                    "company_suggestions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string"},
+                                "description": {"type": "string"},
+                                "relevance": {"type": "string"}
+                            },
+                            "required": ["name", "description"]
                         }
-                    },
-                    "required": ["company_suggestions"],
-                    "additionalProperties": False
-                }
+                    }
+                },
+                "required": ["company_suggestions"],
+                "additionalProperties": False
             },
+            self._generate_benchmark_companies
+        )
+        self.registry.register(
+            "provide_help",
+            "Provide conversational help when user asks questions or needs clarification",
             {
-                "type": "function",
-                "name": "provide_help",
-                "description": "Provide conversational help when user asks questions or needs clarification",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_question": {"type": "string"},
-                        "help_type": {"type": "string", "enum": ["explanation", "clarification", "guidance", "example"]},
-                        "context": {"type": "string"}
-                    },
-                    "required": ["user_question", "help_type"],
-                    "additionalProperties": False
-                }
-            }
-        ]
+                "type": "object",
+                "properties": {
+                    "user_question": {"type": "string"},
+                    "help_type": {"type": "string", "enum": ["explanation", "clarification", "guidance", "example"]},
+                    "context": {"type": "string"}
+                },
+                "required": ["user_question", "help_type"],
+                "additionalProperties": False
+            },
+            self._provide_help
+        )
+        self.tools = self.registry.specs
         
         self.system_instructions = """
 You are a TIC Collection Agent focused on collecting 7 business components through conversation.
@@ -448,6 +825,34 @@ Remember:
 - Be helpful and conversational when user needs guidance
 """
 
+        # Single-call TIC turn: analysis, completeness verdict and follow-up questions in one structured response
+        self.structured_tic_instructions = """
+You are a TIC Collection Agent collecting 7 business components from a founder, one at a time.
+For every user message return ONE JSON object matching the schema. Never return free text.
+
+FIELDS:
+- tic_name: the component currently being collected (given in the turn context)
+- intent: "question" if the user is asking something or seems confused, otherwise "answer"
+- analysis_summary: for answers, a vivid summary of the founder's thinking for this component. Capture their
+  vision and motivation, use their own language, highlight what is unique. Never generic business language.
+  Empty string for questions.
+- is_complete: true only if the answer is SPECIFIC and COMPLETE for this component. Vague answers like
+  "better services", "competitive prices", "good quality" are incomplete. If clarification was already requested
+  (see turn context), be more lenient and accept answers that show good-faith effort.
+- clarification_question: one concise question asking for the missing specifics of the current component
+- next_question: the question for the NEXT component (given in the turn context), or "" if there is none
+- help_reply: for questions, a short helpful explanation (with an example if useful) that ends by re-asking the
+  current component's question; "" for answers
+
+STYLE FOR ALL QUESTIONS AND REPLIES:
+- Brief acknowledgment only ("Got it!", "Perfect!", "Thanks!") followed by ONE question
+- Never mention TIC numbers or the word TIC
+- No business advice, no summaries of what the user said
+- Under 50 words
+
+COMPONENT QUESTIONS:
+""" + "\n".join(f"- {data['display_name']}: \"{data['question']}\"" for data in TIC_QUESTIONS.values()) + "\n"
+
     def _analyze_summary_completeness(self, tic_name: str, user_response: str, analysis_summary: str) -> bool:
         """
         Use OpenAI to analyze if the response was complete and specific enough.
@@ -460,17 +865,11 @@ Remember:
             # Get conversation history for this TIC to provide context
             conversation_history = ""
             if st.session_state.messages:
-                # Get last 10 messages to understand the conversation flow
-                recent_messages = st.session_state.messages[-10:]
-                
-                # Filter messages related to current TIC or general conversation
-                relevant_messages = []
-                for msg in recent_messages:
-                    content = msg.get('content', '').lower()
-                    # Include if it mentions the TIC topic or seems like clarification
-                    if (tic_display_name.lower() in content or 
-                        any(keyword in content for keyword in ['specific', 'clarify', 'more details', 'what exactly', 'could you'])):
-                        relevant_messages.append(f"{msg['role']}: {msg['content']}")
+                # Among the last 10 messages, those indexed on insert as mentioning this TIC or asking for clarification
+                relevant_messages = [
+                    f"{msg['role']}: {msg['content']}"
+                    for msg in st.session_state.messages.relevant(tic_name, window=10)
+                ]
                 
                 if relevant_messages:
                     conversation_history = "\n".join(relevant_messages[-6:])  # Last 6 relevant messages
@@ -492,46 +891,31 @@ Remember:
                     st.session_state.business_state['tic_progress'][tic_name] = tic_data
                     return True
             
-            analysis_prompt = f"""You are analyzing whether a user's response to a business question was complete and specific enough.
-
-TIC Question: {tic_display_name}
+            analysis_input = f"""TIC Question: {tic_display_name}
 User Response: "{user_response}"
 Analysis Summary: "{analysis_summary}"
 
 CONVERSATION HISTORY (for context):
 {conversation_history if conversation_history else "No previous conversation context available"}
 
-CLARIFICATION ATTEMPTS: {clarification_count} (0=first attempt, 1+=already asked for clarification)
-
-IMPORTANT CONTEXT:
-- If clarification has been requested {clarification_count} times already, be MORE LENIENT
-- Look at conversation history to see if user has been progressively providing more detail
-- Don't keep asking for the same type of clarification repeatedly
-- If the user is clearly making an effort to provide details, accept reasonable responses
-
-Based on the analysis summary AND conversation context, determine if the user's response was:
-- COMPLETE: Specific enough, addresses the question requirements, or shows good faith effort after previous clarifications
-- INCOMPLETE: Still genuinely vague/missing key information AND this is a reasonable first/second clarification request
-
-The analysis summary will often indicate if something is missing, but consider the conversation flow and clarification history.
-
-Respond with only one word: "COMPLETE" or "INCOMPLETE"
-"""
+CLARIFICATION ATTEMPTS: {clarification_count}"""
             
             print(f"SENDING COMPLETENESS CHECK TO OPENAI WITH HISTORY...")
             print(f"Clarification attempts: {clarification_count}")
             print(f"Conversation history length: {len(conversation_history)}")
             print(f"Analysis Summary: {analysis_summary}")
             
-            # Call OpenAI for completeness analysis
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": analysis_prompt}],
+            # Call OpenAI for completeness analysis (static instructions first for prompt caching)
+            result = llm.chat_parsed(
+                "completeness",
+                parse=parse_completeness_verdict,
+                messages=[
+                    {"role": "system", "content": COMPLETENESS_PROMPT},
+                    {"role": "user", "content": analysis_input}
+                ],
                 temperature=0,
                 max_tokens=10
             )
-            
-            result = response.choices[0].message.content.strip().upper()
             print(f"OPENAI COMPLETENESS RESULT: {result}")
             
             is_complete = result == "COMPLETE"
@@ -579,160 +963,142 @@ Respond with only one word: "COMPLETE" or "INCOMPLETE"
         print(f"BUSINESS CONSULTANT: Tool Call Started - {tool_name}")
         print(f"Arguments: {json.dumps(arguments, indent=2)}")
         print(f"{'='*60}")
-        
-        if tool_name == "get_business_status":
-            result = self.state_manager.handle_tool_call("get_tic_status", {})
-            print(f"BUSINESS STATUS RETRIEVED: {result['data']['phase']}, {result['data']['completed_count']}/7")
-            return result
-            
-        elif tool_name == "analyze_user_response":
-            tic_name = arguments.get('tic_name')
-            user_response = arguments.get('user_response')
-            analysis_summary = arguments.get('analysis_summary')
-            
-            print(f"ANALYZING USER RESPONSE: {tic_name}")
-            print(f"ANALYSIS SUMMARY: {analysis_summary}")
-            
-            # Validate response length/basic requirements
-            validation_result = self.state_manager.handle_tool_call("validate_tic_data", {
+
+        result = self.registry.dispatch(tool_name, arguments)
+        if not result['success'] and 'analysis_complete' not in result.get('data', {}):
+            print(f"BUSINESS CONSULTANT ERROR: {json.dumps(result, indent=2)}")
+        return result
+
+    def _get_business_status(self, arguments: dict) -> dict:
+        result = self.state_manager.handle_tool_call("get_tic_status", {})
+        print(f"BUSINESS STATUS RETRIEVED: {result['data']['phase']}, {result['data']['completed_count']}/7")
+        return result
+
+    def _analyze_user_response(self, arguments: dict) -> dict:
+        tic_name = arguments.get('tic_name')
+        user_response = arguments.get('user_response')
+        analysis_summary = arguments.get('analysis_summary')
+
+        print(f"ANALYZING USER RESPONSE: {tic_name}")
+        print(f"ANALYSIS SUMMARY: {analysis_summary}")
+
+        # Validate response length/basic requirements
+        validation_result = self.state_manager.handle_tool_call("validate_tic_data", {
+            "tic_name": tic_name,
+            "user_response": user_response
+        })
+
+        # Check if response is complete based on summary analysis using OpenAI
+        is_complete = self._analyze_summary_completeness(tic_name, user_response, analysis_summary)
+
+        # If basic validation passes AND response is complete, mark as confirmed
+        if validation_result['data']['is_valid'] and is_complete:
+            update_result = self.state_manager.handle_tool_call("update_tic_progress", {
                 "tic_name": tic_name,
+                "status": "confirmed",
+                "summary": analysis_summary,
                 "user_response": user_response
             })
-            
-            # Check if response is complete based on summary analysis using OpenAI
-            is_complete = self._analyze_summary_completeness(tic_name, user_response, analysis_summary)
-            
-            # If basic validation passes AND response is complete, mark as confirmed
-            if validation_result['data']['is_valid'] and is_complete:
-                update_result = self.state_manager.handle_tool_call("update_tic_progress", {
-                    "tic_name": tic_name,
-                    "status": "confirmed",
-                    "summary": analysis_summary,
-                    "user_response": user_response
-                })
-                
-                final_result = {
-                    "success": True,
-                    "data": {
-                        "analysis_complete": True,
-                        "response_complete": True,
-                        "validation_result": validation_result['data'],
-                        "update_result": update_result['data']
-                    },
-                    "message": f"TIC {tic_name} analyzed and confirmed",
-                    "instruction": "ask next TIC question only. NO business advice.and do not say anything else like thank you and do not give any summary or anything"
-                }
-                
-                print(f"ANALYSIS COMPLETE: {json.dumps(final_result, indent=2)}")
-                return final_result
-            else:
-                # Response needs clarification
-                incomplete_result = {
-                    "success": False,
-                    "data": {
-                        "analysis_complete": False,
-                        "response_complete": is_complete,
-                        "validation_result": validation_result['data'],
-                        "reason": "Needs clarification" if not is_complete else "Basic validation failed"
-                    },
-                    "message": "Response needs improvement or clarification",
-                    "instruction": "Ask clarifying question to get more specific details. Stay on current TIC.the clarifying question should be concise."
-                }
-                
-                print(f"ANALYSIS INCOMPLETE: {json.dumps(incomplete_result, indent=2)}")
-                return incomplete_result
 
-        elif tool_name == "generate_benchmark_companies":
-            company_suggestions = arguments.get('company_suggestions', [])
-            
-            print(f"GENERATING BENCHMARK COMPANIES: {len(company_suggestions)}")
-            
-            # Store benchmark companies in state
-            st.session_state.business_state['benchmark_companies'] = [
-                f"{comp['name']} - {comp['description']}" for comp in company_suggestions
-            ]
-            st.session_state.business_state['phase'] = 'benchmarking'
-            
-            result = {
-                "success": True,
-                "data": {
-                    "companies": company_suggestions,
-                    "phase": "benchmarking"
-                },
-                "message": f"Generated {len(company_suggestions)} benchmark companies"
-            }
-            
-            print(f"BENCHMARK COMPANIES GENERATED: {json.dumps(result, indent=2)}")
-            return result
-        
-        elif tool_name == "provide_help":
-            user_question = arguments.get('user_question', '')
-            help_type = arguments.get('help_type', 'explanation')
-            context = arguments.get('context', '')
-            
-            print(f"PROVIDING HELP: {help_type} for '{user_question}'")
-            
-            # This tool just acknowledges that help was requested
-            # The actual helpful response will be in the LLM's chat response
-            result = {
+            final_result = {
                 "success": True,
                 "data": {
-                    "help_provided": True,
-                    "help_type": help_type,
-                    "user_question": user_question
+                    "analysis_complete": True,
+                    "response_complete": True,
+                    "validation_result": validation_result['data'],
+                    "update_result": update_result['data']
                 },
-                "message": "Help provided to user"
+                "message": f"TIC {tic_name} analyzed and confirmed",
+                "instruction": "ask next TIC question only. NO business advice.and do not say anything else like thank you and do not give any summary or anything"
             }
-            
-            print(f"HELP PROVIDED: {json.dumps(result, indent=2)}")
-            return result
-        
+
+            print(f"ANALYSIS COMPLETE: {json.dumps(final_result, indent=2)}")
+            return final_result
         else:
-            error_result = {
+            # Response needs clarification
+            incomplete_result = {
                 "success": False,
-                "data": {},
-                "message": f"Unknown function: {tool_name}"
+                "data": {
+                    "analysis_complete": False,
+                    "response_complete": is_complete,
+                    "validation_result": validation_result['data'],
+                    "reason": "Needs clarification" if not is_complete else "Basic validation failed"
+                },
+                "message": "Response needs improvement or clarification",
+                "instruction": "Ask clarifying question to get more specific details. Stay on current TIC.the clarifying question should be concise."
             }
-            print(f"BUSINESS CONSULTANT ERROR: {json.dumps(error_result, indent=2)}")
-            return error_result
+
+            print(f"ANALYSIS INCOMPLETE: {json.dumps(incomplete_result, indent=2)}")
+            return incomplete_result
+
+    def _generate_benchmark_companies(self, arguments: dict) -> dict:
+        company_suggestions = arguments.get('company_suggestions', [])
+
+        print(f"GENERATING BENCHMARK COMPANIES: {len(company_suggestions)}")
+
+        # Store benchmark companies in state
+        st.session_state.business_state['benchmark_companies'] = [
+            f"{comp['name']} - {comp['description']}" for comp in company_suggestions
+        ]
+        st.session_state.business_state['phase'] = 'benchmarking'
+
+        result = {
+            "success": True,
+            "data": {
+                "companies": company_suggestions,
+                "phase": "benchmarking"
+            },
+            "message": f"Generated {len(company_suggestions)} benchmark companies"
+        }
+
+        print(f"BENCHMARK COMPANIES GENERATED: {json.dumps(result, indent=2)}")
+        return result
+
+    def _provide_help(self, arguments: dict) -> dict:
+        user_question = arguments.get('user_question', '')
+        help_type = arguments.get('help_type', 'explanation')
+        context = arguments.get('context', '')
+
+        print(f"PROVIDING HELP: {help_type} for '{user_question}'")
+        # Lets the orchestrator cache the reply that follows this tool call
+        self.help_requested = True
+
+        # This tool just acknowledges that help was requested
+        # The actual helpful response will be in the LLM's chat response
+        result = {
+            "success": True,
+            "data": {
+                "help_provided": True,
+                "help_type": help_type,
+                "user_question": user_question
+            },
+            "message": "Help provided to user"
+        }
+
+        print(f"HELP PROVIDED: {json.dumps(result, indent=2)}")
+        return result
 
     def _generate_first_question(self) -> str:
         """Generate the first brainstorming question based on TIC context and benchmark companies"""
         try:
-            # Get business context from TICs
-            tic_progress = st.session_state.business_state['tic_progress']
-            industry = st.session_state.business_state['industry']
             selected_companies = st.session_state.business_state.get('selected_companies', [])
 
-            # Build context from completed TICs
-            business_context = f"Industry: {industry}\n"
-            for tic_name, tic_data in tic_progress.items():
-                if tic_data['status'] == 'confirmed' and tic_data['summary']:
-                    display_name = TIC_DISPLAY_NAMES.get(tic_name, tic_name)
-                    business_context += f"{display_name}: {tic_data['summary']}\n"
+            # Industry and confirmed TIC summaries, cached until a TIC changes
+            business_context = context_builder().business_context()
+
+            banked = self._pick_banked_question(0, business_context, [])
+            if banked:
+                return banked
 
             # Add benchmark companies context
             benchmark_context = f"Selected benchmark companies: {', '.join(selected_companies)}"
 
-            question_prompt = f"""You are an expert business analyst conducting a deep-dive evaluation. Based on the business idea and benchmark companies below, generate the FIRST strategic question to begin a comprehensive 20-question evaluation.
-
-Business Context:
-{business_context}
-
-{benchmark_context}
-
-Generate the most important first question that will:
-1. Build on the existing TIC information
-2. Consider the competitive landscape from benchmark companies
-3. Focus on the 7 evaluation criteria: Vision, Market Opportunity, USP & Competitive Advantage, Value Proposition, Sustainability, or Execution Feasibility
-4. Be specific and strategic (not generic)
-5. Help evaluate investment potential
-
-Return only the question text, no numbering or formatting."""
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": question_prompt}],
+            response = llm.chat(
+                "question_gen",
+                messages=[
+                    {"role": "system", "content": FIRST_QUESTION_PROMPT},
+                    {"role": "user", "content": f"Business Context:\n{business_context}\n{benchmark_context}"}
+                ],
                 temperature=0.3
             )
 
@@ -746,54 +1112,38 @@ Return only the question text, no numbering or formatting."""
     def _generate_next_question(self, completed_count: int) -> str:
         """Generate the next question based on previous answers and business context"""
         try:
-            # Get business context
-            tic_progress = st.session_state.business_state['tic_progress']
-            industry = st.session_state.business_state['industry']
             selected_companies = st.session_state.business_state.get('selected_companies', [])
             brainstorming_progress = st.session_state.business_state.get('brainstorming_progress', {})
             previous_answers = brainstorming_progress.get('answers', {})
 
-            # Build comprehensive context
-            business_context = f"Industry: {industry}\n"
-            for tic_name, tic_data in tic_progress.items():
-                if tic_data['status'] == 'confirmed' and tic_data['summary']:
-                    display_name = TIC_DISPLAY_NAMES.get(tic_name, tic_name)
-                    business_context += f"{display_name}: {tic_data['summary']}\n"
+            # Industry and confirmed TIC summaries, cached until a TIC changes
+            business_context = context_builder().business_context()
+
+            previous_questions = [qa.get('question', '') for qa in previous_answers.values()]
+            banked = self._pick_banked_question(completed_count, business_context, previous_questions)
+            if banked:
+                return banked
 
             # Add previous Q&A context
-            qa_context = "\nPrevious Questions & Answers:\n"
-            for i in range(completed_count):
-                if i in previous_answers:
-                    qa_context += f"Q{i+1}: {previous_answers[i].get('question', 'Unknown')}\n"
-                    qa_context += f"A{i+1}: {previous_answers[i].get('answer', 'No answer')}\n\n"
+            qa_context = context_builder().qa_context(completed_count)
 
             # Determine focus area based on progress
             focus_guidance = self._get_question_focus_guidance(completed_count)
 
-            question_prompt = f"""You are an expert business analyst conducting a deep-dive evaluation. Based on the business context, previous Q&A, and benchmark companies, generate the NEXT strategic question (Question {completed_count + 1} of 20).
-
-Business Context:
+            # Most stable context first, current question number and focus last
+            question_input = f"""Business Context:
 {business_context}
-
 Selected Benchmark Companies: {', '.join(selected_companies)}
-
 {qa_context}
-
-Focus for this question: {focus_guidance}
-
-Generate a strategic question that:
-1. Builds on previous answers and identified gaps
-2. Considers the competitive landscape and benchmark companies
-3. Focuses on the 7 evaluation criteria: Vision, Market Opportunity, USP & Competitive Advantage, Value Proposition, Sustainability, or Execution Feasibility
-4. Is specific and contextual (not generic)
-5. Helps evaluate investment potential and business viability
-6. Avoids repeating topics already well-covered
-
-Return only the question text, no numbering or formatting."""
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": question_prompt}],
+Generate Question {completed_count + 1} of 20.
+Focus for this question: {focus_guidance}"""
+
+            response = llm.chat(
+                "question_gen",
+                messages=[
+                    {"role": "system", "content": NEXT_QUESTION_PROMPT},
+                    {"role": "user", "content": question_input}
+                ],
                 temperature=0.4
             )
 
@@ -804,150 +1154,89 @@ Return only the question text, no numbering or formatting."""
             # Fallback questions based on progress
             fallback_questions = [
                 "How does your solution address customer pain points better than existing alternatives?",
-                "What specific market trends support the timing of this business opportunity?",
-                "What key resources and capabilities do you need to execute this vision successfully?",
-                "How will you differentiate from competitors in a sustainable way?",
-                "What assumptions about customer behavior need to be validated?",
-                "What are the biggest risks to successful implementation and how will you mitigate them?",
-                "How does this business model create long-term value for all stakeholders?",
-                "What regulatory or compliance considerations could impact your business?",
-                "How will you measure success and key performance indicators?",
-                "What partnerships or strategic alliances could accelerate your growth?"
-            ]
-
-            if completed_count < len(fallback_questions):
-                return fallback_questions[completed_count]
-            else:
-                return "What additional insights about your business model would be most valuable for potential investors?"
-
-    def _get_question_focus_guidance(self, completed_count: int) -> str:
-        """Provide focus guidance for question generation based on progress"""
-        if completed_count < 3:
-            return "Focus on Vision and core value proposition - understanding the fundamental purpose and impact"
-        elif completed_count < 7:
-            return "Focus on Market Opportunity & Growth - market size, timing, trends, and revenue model"
-        elif completed_count < 10:
-            return "Focus on USP & Competitive Advantage - differentiation, competitive landscape, and defensibility"
-        elif completed_count < 14:
-            return "Focus on Value Proposition - customer needs, solution fit, and market positioning"
-        elif completed_count < 16:
-            return "Focus on Sustainability - environmental, social, and economic long-term viability"
-        else:
-            return "Focus on Execution Feasibility - implementation challenges, resources, funding, and risks"
-
-# ===================================================================
-# EVALUATION SYSTEM
-# ===================================================================
-
-def generate_evaluation_report(conversation_id: str, selected_companies: list) -> dict:
-    try:
-        print(f"\nGENERATING EVALUATION REPORT")
-        print(f"Conversation ID: {conversation_id}")
-        print(f"Selected Companies: {selected_companies}")
-        
-        # Get full conversation
-        conversation_messages = get_conversation_messages(conversation_id)
-        
-        # Convert to text format
-        full_conversation_text = ""
-        for msg in conversation_messages:
-            full_conversation_text += f"{msg['role']}: {msg['content']}\n\n"
-        
-        print(f"CONVERSATION LENGTH: {len(full_conversation_text)} characters")
-        
-        # Evaluation prompt
-        evaluation_prompt = f"""
-You are an expert venture analyst with extensive experience evaluating startup pitches across various industries. You have a deep understanding of market dynamics, business models, and investment criteria. Based on the detailed business idea context and benchmark companies provided below, perform a comprehensive, data-driven evaluation.
-
-Return your analysis **STRICTLY** in the **following JSON format only** (no explanation or extra text):
-
-{{
-  "detailed_feedback": "<Insightful comments and qualitative evaluation from the AI reviewer. Provide comprehensive analysis highlighting key strengths, areas for improvement, and strategic recommendations.>",
-  "evaluation_feedback": {{
-    "Market Opportunity & Growth": {{
-      "score": "x/5",
-      "rationale": "<How large and fast-growing is the target market? Is this the right time to enter? Include TAM/SAM/SOM analysis, growth trends, timing, and revenue model assessment.>"
-    }},
-    "USP & Competitive Advantage": {{
-      "score": "x/5",
-      "rationale": "<What makes the idea unique? Can it stand out and stay ahead of competitors? Analyze differentiation, competitive landscape, barriers to entry, and defensibility.>"
-    }},
-    "Value Proposition": {{
-      "score": "x/5",
-      "rationale": "<What problem does it solve for users—and does it excite or inspire them? Evaluate customer pain points, solution fit, and emotional appeal.>"
-    }},
-    "Sustainability": {{
-      "score": "x/5",
-      "rationale": "<Is the business model environmentally, socially, and economically sustainable? Assess long-term viability and impact.>"
-    }},
-    "Execution Feasibility": {{
-      "score": "x/5",
-      "rationale": "<Can the idea be built and scaled with available resources and technology? Evaluate technical requirements, team capabilities, funding needs, and implementation risks.>"
-    }},
-    "overall": {{
-      "score": "x/25",
-      "feedback": "<Executive summary highlighting key strengths, critical risks, and strategic recommendations>"
-    }}
-  }},
-  "paradigm_shift_drivers": [
-    "<Key trend 1 influencing this business (e.g., generative AI, personalization, sustainability)>",
-    "<Key trend 2 influencing this business (e.g., remote work, digital transformation)>",
-    "<Key trend 3 influencing this business (e.g., social commerce, climate change)>"
-  ],
-  "benchmark_insights": "<Analysis of selected benchmark companies: What can we learn from their strategies? How do they validate market opportunity and competitive positioning?>",
-  "spider_chart_business_opportunity": {{
-    "Market Opportunity & Growth": "x/5",
-    "USP & Competitive Advantage": "x/5",
-    "Value Proposition": "x/5",
-    "Sustainability": "x/5",
-    "Execution Feasibility": "x/5",
-    "total": "x/25"
-  }},
-  "investment_attractiveness": {{
-    "Market Opportunity & Growth": {{
-      "score": "x/5",
-      "rationale": "<Analysis of market attractiveness, growth trajectory, and timing>"
-    }},
-    "USP & Competitive Advantage": {{
-      "score": "x/5",
-      "rationale": "<Evaluation of uniqueness and competitive defensibility>"
-    }},
-    "Execution Feasibility": {{
-      "score": "x/5",
-      "rationale": "<Assessment of implementation potential and resource availability>"
-    }},
-    "total": "x/15"
-  }},
-  "ai_investment_recommendation": "<One of: YES, MAYBE, NEUTRAL, NO>",
-  "investment_rationale": "<Concise explanation of the investment recommendation with key decision factors>"
-}}
+                "What specific market trends support the timing of this business opportunity?",
+                "What key resources and capabilities do you need to execute this vision successfully?",
+                "How will you differentiate from competitors in a sustainable way?",
+                "What assumptions about customer behavior need to be validated?",
+                "What are the biggest risks to successful implementation and how will you mitigate them?",
+                "How does this business model create long-term value for all stakeholders?",
+                "What regulatory or compliance considerations could impact your business?",
+                "How will you measure success and key performance indicators?",
+                "What partnerships or strategic alliances could accelerate your growth?"
+            ]
 
-Respond only with valid JSON. Avoid markdown or code fences. Provide precise, professional, and data-backed reasoning. Keep rationales concise but insightful (2-3 sentences each).
+            if completed_count < len(fallback_questions):
+                return fallback_questions[completed_count]
+            else:
+                return "What additional insights about your business model would be most valuable for potential investors?"
 
-ALL SCORES MUST BE OUT OF 5, not 10. The "overall" score must be the SUM of all five category scores, with a total out of 25. For the AI investment recommendation, provide one of these exact values: YES, MAYBE, NEUTRAL, or NO.
+    def _get_question_focus_guidance(self, completed_count: int) -> str:
+        """Provide focus guidance for question generation based on progress"""
+        return question_bank.focus_area(completed_count)['guidance']
+
+    def _pick_banked_question(self, completed_count: int, business_context: str, previous_questions: list) -> Optional[str]:
+        """Pick a precomputed question for this turn; None means generate one live"""
+        focus = question_bank.focus_area(completed_count)['key']
+        if QUESTION_SOURCE != 'bank':
+            question_bank.record_outcome(focus, 'live')
+            return None
+        picked = question_bank.load_bank().pick(
+            st.session_state.business_state['industry'],
+            completed_count,
+            business_context,
+            previous_questions,
+            st.session_state.business_state.get('selected_companies', [])
+        )
+        if picked is None:
+            print(f"QUESTION BANK: nothing fits for {focus}, generating live")
+            question_bank.record_outcome(focus, 'live')
+            return None
+        print(f"QUESTION BANK: Q{completed_count + 1} from {picked['industry']}/{focus} (score {picked['score']})")
+        question_bank.record_outcome(focus, 'bank')
+        return picked['text']
+
+# ===================================================================
+# EVALUATION SYSTEM
+# ===================================================================
 
-### Full Business Conversation:
+@profiled
+def generate_evaluation_report(conversation_id: str, selected_companies: list) -> dict:
+    try:
+        print(f"\nGENERATING EVALUATION REPORT")
+        print(f"Conversation ID: {conversation_id}")
+        print(f"Selected Companies: {selected_companies}")
+        
+        # Get full conversation
+        conversation_messages = get_conversation_messages(conversation_id)
+        
+        # Convert to text format
+        full_conversation_text = ""
+        for msg in conversation_messages:
+            full_conversation_text += f"{msg['role']}: {msg['content']}\n\n"
+        
+        print(f"CONVERSATION LENGTH: {len(full_conversation_text)} characters")
+        
+        evaluation_input = f"""### Full Business Conversation:
 {full_conversation_text}
 
 ### Selected Benchmark Companies:
 {', '.join(selected_companies)}
-
-Critically compare this business idea against the benchmark companies. Consider industry trends, competitive dynamics, market saturation, and unique opportunities or challenges in this space.
 """
 
         print("SENDING EVALUATION REQUEST TO LLM...")
         
-        # Call OpenAI for evaluation
-        evaluation_response = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=[{"role": "user", "content": evaluation_prompt}],
+        # Call OpenAI for evaluation (static rubric first for prompt caching)
+        evaluation_data = llm.chat_parsed(
+            "evaluation",
+            parse=parse_json_content,
+            messages=[
+                {"role": "system", "content": EVALUATION_PROMPT},
+                {"role": "user", "content": evaluation_input}
+            ],
             response_format={"type": "json_object"},
             temperature=0.3
         )
         
-        # Parse JSON response
-        evaluation_data = json.loads(evaluation_response.choices[0].message.content)
-        
         print("EVALUATION COMPLETE!")
         print(f"Overall Score: {evaluation_data['evaluation_feedback']['overall']['score']}")
         print(f"Investment Recommendation: {evaluation_data['ai_investment_recommendation']}")
@@ -975,8 +1264,11 @@ class AgentOrchestrator:
     def __init__(self):
         self.state_manager = StateManagerAgent()
         self.consultant = BusinessConsultantAgent(self.state_manager)
+        self.local_engine = LocalEngine(self)
         
+    @profiled
     def process_user_input(self, user_input: str, conversation_id: str) -> str:
+        turn_start = (st.session_state.business_state['phase'], st.session_state.business_state['current_tic'])
         try:
             print(f"\nORCHESTRATOR: Processing User Input")
             print(f"Input Length: {len(user_input)} characters")
@@ -985,18 +1277,35 @@ class AgentOrchestrator:
             print(f"Current Phase: {current_phase}")
             
             # Handle different phases
-            if current_phase == 'tic_collection':
-                # Normal TIC collection with LLM
-                response = client.responses.create(
-                    model="gpt-4.1",
-                    tools=self.consultant.tools,
-                    instructions=self.consultant.system_instructions,
-                    conversation=conversation_id,
-                    input=[{"role": "user", "content": user_input}],
-                    temperature=0.7
-                )
-                
-                assistant_content = self._handle_agent_response(response, conversation_id)
+            if current_phase == 'tic_collection' and llm_offline():
+                return self.local_engine.tic_turn(user_input, conversation_id)
+
+            elif current_phase == 'tic_collection':
+                help_scope = f"tic:{st.session_state.business_state['current_tic']}"
+                assistant_content = self._cached_help_answer(help_scope, user_input)
+                if assistant_content is not None:
+                    self._append_turn_to_conversation(conversation_id, user_input, assistant_content)
+                    return assistant_content
+
+                if TIC_TURN_MODE == 'structured':
+                    assistant_content = self._handle_structured_tic_turn(user_input, conversation_id)
+
+                if assistant_content is None:
+                    # Normal TIC collection with LLM
+                    self.consultant.help_requested = False
+                    response = llm.respond(
+                        "tic_turn",
+                        tools=self.consultant.tools,
+                        instructions=self.consultant.system_instructions,
+                        conversation=conversation_id,
+                        input=[{"role": "user", "content": user_input}],
+                        temperature=0.7
+                    )
+
+                    assistant_content = self._handle_agent_response(response, conversation_id)
+                    # A turn that moved on to the next TIC answered more than the help question
+                    if self.consultant.help_requested and st.session_state.business_state['current_tic'] == turn_start[1]:
+                        self._cache_help_answer(help_scope, self._tic_help_topic(turn_start[1]), user_input)
                 
                 # Check if TIC 7 just completed - if so, auto-generate benchmark companies
                 if (st.session_state.business_state['current_tic'] == 'completed' and 
@@ -1015,27 +1324,16 @@ class AgentOrchestrator:
                 if len(selected_companies) == 3:
                     # Auto-start brainstorming
                     print("3 COMPANIES SELECTED - AUTO-STARTING BRAINSTORMING")
-                    st.session_state.business_state['phase'] = 'brainstorming'
-                    if 'brainstorming_progress' not in st.session_state.business_state:
-                        st.session_state.business_state['brainstorming_progress'] = {
-                            'current_question': 0,
-                            'completed_count': 0,
-                            'answers': {}
-                        }
-                    
-                    # Generate first question based on TIC context and benchmark companies
-                    first_question = self.consultant._generate_first_question()
-                    # Store the question for validation and mark that first question is presented
-                    st.session_state.business_state['brainstorming_progress']['current_question_text'] = first_question
-                    st.session_state.business_state['brainstorming_progress']['first_question_presented'] = True
-                    st.session_state.business_state['brainstorming_progress']['awaiting_first_answer'] = True
+                    first_question = self.start_brainstorming()
                     return f"Great! Now that you've selected your benchmark companies, let's dive deep into your business idea with detailed questions.\n\n**Question 1/20:** {first_question}"
+                elif llm_offline():
+                    return self.local_engine.benchmark_turn(user_input, conversation_id)
                 else:
                     # Use LLM for conversational response about company selection
-                    response = client.responses.create(
-                        model="gpt-4.1",
+                    response = llm.respond(
+                        "benchmark_chat",
                         tools=[],
-                        instructions="You are a business consultant. The user is in benchmarking phase and needs to select 3 companies from the sidebar. Be helpful and guide them to complete the selection. Keep response brief and conversational.",
+                        instructions=BENCHMARKING_CHAT_PROMPT,
                         conversation=conversation_id,
                         input=[{"role": "user", "content": user_input}],
                         temperature=0.7
@@ -1069,64 +1367,255 @@ class AgentOrchestrator:
             else:
                 return "I'm ready to help you develop your business concept!"
 
+        except RateLimitTimeout as e:
+            print(f"ORCHESTRATOR BACKPRESSURE: {str(e)}")
+            return "I'm handling a lot of conversations right now and couldn't get to yours in time. Please send your message again in a moment."
         except Exception as e:
+            business_state = st.session_state.business_state
+            if is_unavailable(e) and (business_state['phase'], business_state['current_tic']) == turn_start:
+                # The API went down before this turn changed anything: answer it locally
+                print(f"ORCHESTRATOR: API UNAVAILABLE ({type(e).__name__}), ANSWERING LOCALLY")
+                return self.local_engine.answer(user_input, conversation_id)
             error_msg = f"Error processing input: {str(e)}"
             print(f"ORCHESTRATOR ERROR: {error_msg}")
             return error_msg
     
-    def _auto_generate_benchmark_companies(self) -> dict:
-        """Automatically generate benchmark companies based on business idea"""
-        try:
-            # Get business context from TICs
-            tic_progress = st.session_state.business_state['tic_progress']
-            industry = st.session_state.business_state['industry']
-            
-            # Build context from completed TICs
-            business_context = f"Industry: {industry}\n"
-            for tic_name, tic_data in tic_progress.items():
-                if tic_data['status'] == 'confirmed' and tic_data['summary']:
-                    display_name = TIC_DISPLAY_NAMES.get(tic_name, tic_name)
-                    business_context += f"{display_name}: {tic_data['summary']}\n"
-            
-            # Generate companies using OpenAI
-            company_prompt = f"""Based on this business idea, suggest 5-6 real companies that would serve as good benchmarks for comparison and analysis.
+    @profiled
+    def start_brainstorming(self) -> str:
+        """
+        Switch to brainstorming and return the first question. Both the sidebar company
+        selection and the benchmarking chat branch call this; the question is generated
+        once and reused by any later call.
+        """
+        st.session_state.business_state['phase'] = 'brainstorming'
+        if 'brainstorming_progress' not in st.session_state.business_state:
+            st.session_state.business_state['brainstorming_progress'] = {
+                'current_question': 0,
+                'completed_count': 0,
+                'answers': {}
+            }
+        brainstorming_state = st.session_state.business_state['brainstorming_progress']
+
+        if brainstorming_state.get('completed_count', 0) == 0 and brainstorming_state.get('current_question_text'):
+            print("FIRST QUESTION ALREADY GENERATED - REUSING")
+            single_flight.record_suppressed("first_question")
+            return brainstorming_state['current_question_text']
+
+        # Generate first question based on TIC context and benchmark companies
+        first_question = self.consultant._generate_first_question()
+        # Store the question for validation and mark that first question is presented
+        brainstorming_state['current_question_text'] = first_question
+        brainstorming_state['first_question_presented'] = True
+        brainstorming_state['awaiting_first_answer'] = True
+        return first_question
+
+    def _handle_structured_tic_turn(self, user_input: str, conversation_id: str) -> Optional[str]:
+        """
+        Handle a TIC answer with a single strict structured-output call that returns the analysis summary,
+        completeness verdict and follow-up questions together; state is updated locally from the result.
+        Returns None if the structured call fails so the caller can fall back to the tool loop.
+        """
+        business_state = st.session_state.business_state
+        tic_name = business_state['current_tic']
+        if tic_name not in TIC_SEQUENCE:
+            return None
+
+        tic_data = business_state['tic_progress'].get(tic_name, {})
+        clarification_count = tic_data.get('clarification_attempts', 0)
+        tic_index = TIC_SEQUENCE.index(tic_name)
+        next_tic = TIC_SEQUENCE[tic_index + 1] if tic_index + 1 < len(TIC_SEQUENCE) else None
+
+        turn_context = (
+            f"TURN CONTEXT:\n"
+            f"Industry: {business_state['industry']}\n"
+            f"Current component: {tic_name} ({TIC_DISPLAY_NAMES[tic_name]})\n"
+            f"Next component: {TIC_DISPLAY_NAMES[next_tic] if next_tic else 'none - this is the last one'}\n"
+            f"Clarification attempts so far: {clarification_count}"
+        )
+        # The user message was already appended to the chat history by the UI
+        history = [
+            {"role": msg['role'], "content": msg['content']}
+            for msg in st.session_state.messages[-9:-1]
+        ]
 
-Business Context:
-{business_context}
+        try:
+            turn = llm.respond_parsed(
+                "tic_turn",
+                parse=lambda response: json.loads(response.output_text),
+                instructions=self.consultant.structured_tic_instructions,
+                input=history + [
+                    {"role": "developer", "content": turn_context},
+                    {"role": "user", "content": user_input}
+                ],
+                text={"format": {"type": "json_schema", "name": "tic_turn", "schema": TIC_TURN_SCHEMA, "strict": True}},
+                temperature=0.3,
+                store=False
+            )
+        except Exception as e:
+            print(f"STRUCTURED TIC TURN FAILED, FALLING BACK TO TOOL LOOP: {str(e)}")
+            return None
+
+        print(f"STRUCTURED TIC TURN: intent={turn['intent']}, complete={turn['is_complete']}")
+
+        if turn['intent'] == 'question':
+            assistant_content = turn['help_reply'] or turn['clarification_question']
+            if not assistant_content:
+                print("STRUCTURED TIC TURN HAD NO REPLY, FALLING BACK TO TOOL LOOP")
+                return None
+            if turn['help_reply']:
+                self._cache_help_answer(f"tic:{tic_name}", self._tic_help_topic(tic_name), user_input)
+        else:
+            validation_result = self.state_manager.handle_tool_call("validate_tic_data", {
+                "tic_name": tic_name,
+                "user_response": user_input
+            })
+            is_complete = turn['is_complete']
+            # Same leniency as the completeness check: stop looping after two clarifications
+            if not is_complete and clarification_count >= 2 and len(user_input.split()) >= 5:
+                print(f"AUTO-ACCEPTING AFTER {clarification_count} CLARIFICATIONS")
+                is_complete = True
 
-Provide real companies that are:
-1. Similar in business model or target market
-2. Well-known and established
-3. Relevant for competitive analysis
-4. Mix of direct and indirect competitors
+            if validation_result['data']['is_valid'] and is_complete:
+                self.state_manager.handle_tool_call("update_tic_progress", {
+                    "tic_name": tic_name,
+                    "status": "confirmed",
+                    "summary": turn['analysis_summary'],
+                    "user_response": user_input
+                })
+                assistant_content = turn['next_question'] or "Perfect! That covers all the key components of your business."
+            else:
+                tic_data['clarification_attempts'] = clarification_count + 1
+                business_state['tic_progress'][tic_name] = tic_data
+                # The model may judge the answer complete (no question) while validation rejects it
+                assistant_content = turn['clarification_question'] or (
+                    f"Could you add a bit more detail?\n\n**{TIC_DISPLAY_NAMES[tic_name]}:** "
+                    f"{TIC_QUESTIONS[tic_name]['question']}"
+                )
 
-Return as JSON array with this format:
-[
-  {{
-    "name": "Company Name",
-    "description": "Brief description of what they do and why relevant",
-    "relevance": "Why this is a good benchmark"
-  }}
-]
+        self._append_turn_to_conversation(conversation_id, user_input, assistant_content)
+        return assistant_content
 
-Return only valid JSON, no other text."""
+    def _append_turn_to_conversation(self, conversation_id: str, user_input: str, assistant_content: str,
+                                     raise_errors: bool = False):
+        """Record a turn answered without a Responses call so the server-side conversation stays complete
+        for session reloads and evaluation"""
+        try:
+            llm.append_items(
+                "conversation_items",
+                conversation_id=conversation_id,
+                items=[
+                    {"type": "message", "role": "user", "content": [{"type": "input_text", "text": user_input}]},
+                    {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": assistant_content}]}
+                ]
+            )
+        except Exception as e:
+            if raise_errors:
+                raise
+            if is_unavailable(e):
+                # Replayed once the API is back, like turns answered in offline mode
+                defer_job("conversation_items", {
+                    "conversation_id": conversation_id,
+                    "user_input": user_input,
+                    "assistant_content": assistant_content
+                })
+                return
+            print(f"ERROR APPENDING LOCAL TURN TO CONVERSATION: {str(e)}")
 
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": company_prompt}],
-                response_format={"type": "json_object"},
-                temperature=0.3
+    def _cache_help_answer(self, scope: str, topic: str, user_input: str):
+        """
+        Store an answer to a help question for other founders. The reply this founder got drew on their
+        own conversation, so the cached answer is generated separately from the topic and question alone.
+        """
+        try:
+            response = llm.chat(
+                "help_answer",
+                messages=[
+                    {"role": "system", "content": HELP_ANSWER_PROMPT},
+                    {"role": "user", "content": f"Topic: {topic}\nQuestion: {user_input}"}
+                ],
+                temperature=0.3,
+                max_tokens=300
             )
+            answer = (response.choices[0].message.content or "").strip()
+        except Exception as e:
+            print(f"HELP ANSWER NOT CACHED: {str(e)}")
+            return
+        help_cache.add(scope, user_input, answer)
+
+    def _tic_help_topic(self, tic_name: str) -> str:
+        if tic_name not in TIC_SEQUENCE:
+            return "Business concept"
+        return f"{TIC_DISPLAY_NAMES[tic_name]}\nQuestion to return to: {TIC_QUESTIONS[tic_name]['question']}"
+
+    def _cached_help_answer(self, scope: str, user_input: str) -> Optional[str]:
+        """Answer a help question from the local cache when a similar one was answered before"""
+        if not looks_like_question(user_input):
+            return None
+        try:
+            cached = help_cache.lookup(scope, user_input)
+        except Exception as e:
+            print(f"HELP CACHE LOOKUP ERROR: {str(e)}")
+            return None
+        return cached['answer'] if cached else None
+
+    @profiled
+    def _auto_generate_benchmark_companies(self) -> dict:
+        """Automatically generate benchmark companies based on business idea"""
+        try:
+            industry = st.session_state.business_state['industry']
             
-            companies_data = json.loads(response.choices[0].message.content)
+            # Industry and confirmed TIC summaries, cached until a TIC changes
+            business_context = context_builder().business_context()
             
-            # Handle both array and object responses
-            if isinstance(companies_data, dict) and 'companies' in companies_data:
-                companies = companies_data['companies']
-            elif isinstance(companies_data, list):
-                companies = companies_data
-            else:
-                companies = []
+            # Retrieve candidates locally; the LLM re-ranks them, or generates a list when the catalog is thin
+            candidates = benchmark_catalog.candidates(industry, business_context, limit=BENCHMARK_CANDIDATES)
+            try:
+                if len(candidates) >= 5:
+                    candidate_list = "\n".join(
+                        f"- {company['name']}: {company['description']}" for company in candidates
+                    )
+                    mode = "rerank"
+                    companies = llm.chat_parsed(
+                        "benchmarks",
+                        parse=parse_company_suggestions,
+                        messages=[
+                            {"role": "system", "content": BENCHMARK_RERANK_PROMPT},
+                            {"role": "user", "content": f"Business Context:\n{business_context}\nCandidate companies:\n{candidate_list}"}
+                        ],
+                        response_format={"type": "json_object"},
+                        temperature=0.3
+                    )
+                else:
+                    mode = "generate"
+                    companies = llm.chat_parsed(
+                        "benchmarks",
+                        parse=parse_company_suggestions,
+                        messages=[
+                            {"role": "system", "content": BENCHMARK_COMPANIES_PROMPT},
+                            {"role": "user", "content": f"Business Context:\n{business_context}"}
+                        ],
+                        response_format={"type": "json_object"},
+                        temperature=0.3
+                    )
+            except RateLimitTimeout:
+                raise
+            except Exception as e:
+                # Offline, a thin retrieval is topped up with the industry's most chosen companies
+                if len(candidates) < 5 and is_unavailable(e):
+                    candidates += benchmark_catalog.popular(industry, 6 - len(candidates),
+                                                            exclude=[company['name'] for company in candidates])
+                if not candidates:
+                    raise
+                # Retrieval alone still gives a usable list
+                print(f"BENCHMARK RE-RANK FAILED, USING CATALOG ORDER: {str(e)}")
+                mode = "catalog_only"
+                companies = [
+                    {"name": company['name'], "description": company['description'],
+                     "relevance": f"Closest match in the {company['industry']} benchmark catalog"}
+                    for company in candidates[:6]
+                ]
+            benchmark_catalog.record_mode(mode)
+            benchmark_catalog.add_suggestions(industry, companies)
             
             # Call the actual tool
             result = self.consultant.handle_tool_call("generate_benchmark_companies", {
@@ -1245,43 +1734,32 @@ Return only valid JSON, no other text."""
                     "response": "Please provide a more detailed answer (at least a few words)."
                 }
             
-            # Use LLM to analyze if the response is a valid answer or needs help
-            validation_prompt = f"""Analyze this user response to a brainstorming question.
-
-Question: "{question}"
-User Response: "{user_input}"
-
-Determine if the user response is:
-
-1. VALID_ANSWER: A meaningful attempt to answer the question (even if brief or needs more detail)
-2. ASKING_QUESTION: User is asking for clarification or doesn't understand the question 
-3. GIBBERISH: Random letters, nonsense, or completely unrelated content
-4. NEEDS_HELP: User seems confused or stuck
-
-For ASKING_QUESTION, provide a helpful explanation and rephrase the question.
-For GIBBERISH or NEEDS_HELP, provide guidance to help them answer properly.
-
-Respond in this exact JSON format:
-{{
-  "category": "VALID_ANSWER|ASKING_QUESTION|GIBBERISH|NEEDS_HELP",
-  "explanation": "Brief explanation of why this category was chosen",
-  "response": "What to say to the user (if not VALID_ANSWER)"
-}}
-
-Be helpful and encouraging. If user asks about terms like TAM, explain them clearly."""
+            # Questions already answered for this focus area are served locally
+            help_scope = f"brainstorming:{self._get_question_category(question_index)}"
+            cached_answer = self._cached_help_answer(help_scope, user_input)
+            if cached_answer is not None:
+                return {
+                    "is_valid": False,
+                    "reason": "asking_question",
+                    "response": f"{cached_answer}\n\n**Back to the question:** {question}"
+                }
 
+            # Use LLM to analyze if the response is a valid answer or needs help
             print("SENDING VALIDATION REQUEST TO LLM...")
             
             # Call OpenAI for validation
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": validation_prompt}],
+            validation_data = llm.chat_parsed(
+                "validation",
+                parse=parse_json_content,
+                confidence=lambda data: data['confidence'] if isinstance(data.get('confidence'), (int, float)) else None,
+                messages=[
+                    {"role": "system", "content": ANSWER_VALIDATION_PROMPT},
+                    {"role": "user", "content": f"Question: \"{question}\"\nUser Response: \"{user_input}\""}
+                ],
                 response_format={"type": "json_object"},
                 temperature=0.3,
                 max_tokens=300
             )
-            
-            validation_data = json.loads(response.choices[0].message.content)
             category = validation_data.get('category', 'NEEDS_HELP')
             
             print(f"VALIDATION RESULT: {category}")
@@ -1296,6 +1774,8 @@ Be helpful and encouraging. If user asks about terms like TAM, explain them clea
             else:
                 # For all other categories, provide helpful response
                 helpful_response = validation_data.get('response', 'Please provide a meaningful answer to the question.')
+                if category == 'ASKING_QUESTION':
+                    self._cache_help_answer(help_scope, self._get_question_category(question_index), user_input)
                 return {
                     "is_valid": False,
                     "reason": category.lower(),
@@ -1321,87 +1801,120 @@ Be helpful and encouraging. If user asks about terms like TAM, explain them clea
             current_answers = st.session_state.business_state['brainstorming_progress']['answers']
             current_question = current_answers.get(str(question_index), {}).get('question', 'Unknown question')
 
-            # Get all TIC summaries and current status for context
-            tic_context = ""
-            for tic_name in TIC_SEQUENCE:
-                tic_data = st.session_state.business_state['tic_progress'][tic_name]
-                if tic_data['summary']:
-                    display_name = TIC_QUESTIONS[tic_name]['display_name']
-                    tic_context += f"{display_name}: {tic_data['summary']}\n"
-
-            # Use OpenAI to analyze how this answer relates to and updates the user's business vision
-            analysis_prompt = f"""You are analyzing a user's brainstorming response to understand how it relates to and updates their business vision across different components.
-
-CURRENT BUSINESS CONTEXT:
-{tic_context}
-
-BRAINSTORMING QUESTION: "{current_question}"
-USER'S ANSWER: "{user_answer}"
-
-Analyze this answer and determine:
-1. Which TIC component(s) this most significantly relates to and enhances
-2. What new insights about the user's vision this reveals
-3. How this should update/enhance the existing summaries to better reflect their evolving vision
-
-Available TIC categories:
-- vision: Long-term goals, purpose, impact the business aims to achieve
-- businessOverview: Core offering, what the business does, how it works
-- marketSize: Market opportunity, size, growth trends, timing
-- targetCustomers: Customer segments, demographics, characteristics
-- valueProposition: Customer benefits, problems solved, value delivered
-- usp: Unique advantages, differentiation, competitive positioning
-- businessModel: Revenue streams, cost structure, sustainability, funding
-
-Provide your response in this JSON format:
-{
-  "primary_tic": "tic_name",
-  "secondary_tics": ["tic_name1", "tic_name2"],
-  "vision_insights": "Key insights about user's evolving vision",
-  "enhanced_summaries": {
-    "tic_name": "Enhanced summary that better reflects user's vision"
-  }
-}"""
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": analysis_prompt}],
-                temperature=0.2,
-                max_tokens=500
-            )
-
             try:
-                analysis = json.loads(response.choices[0].message.content.strip())
-
-                # Update primary TIC
-                primary_tic = analysis.get('primary_tic')
-                if primary_tic and primary_tic in TIC_SEQUENCE:
-                    enhanced_summaries = analysis.get('enhanced_summaries', {})
-                    if primary_tic in enhanced_summaries:
-                        current_tic_data = st.session_state.business_state['tic_progress'][primary_tic]
-                        current_tic_data['summary'] = enhanced_summaries[primary_tic]
-                        current_tic_data['enhanced_from_brainstorming'] = True
-                        current_tic_data['vision_insights'] = analysis.get('vision_insights', '')
-
-                # Update secondary TICs if provided
-                secondary_tics = analysis.get('secondary_tics', [])
-                enhanced_summaries = analysis.get('enhanced_summaries', {})
-                for tic_name in secondary_tics:
-                    if tic_name in TIC_SEQUENCE and tic_name in enhanced_summaries:
-                        tic_data = st.session_state.business_state['tic_progress'][tic_name]
-                        tic_data['summary'] = enhanced_summaries[tic_name]
-                        tic_data['enhanced_from_brainstorming'] = True
-
-                print(f"ENHANCED TICS FROM BRAINSTORMING: Primary={primary_tic}, Secondary={secondary_tics}")
-
+                self._enhance_tics(current_question, user_answer)
             except json.JSONDecodeError:
                 # Fallback: simple enhancement of most relevant TIC
                 self._fallback_tic_enhancement(current_question, user_answer)
+            except Exception as e:
+                if not is_unavailable(e):
+                    raise
+                # Keyword mapping for now; the model's enhancement runs once the API is back
+                defer_job("tic_enhance", {"question": current_question, "answer": user_answer})
+                self._fallback_tic_enhancement(current_question, user_answer)
 
         except Exception as e:
             print(f"ERROR UPDATING TICS FROM BRAINSTORMING: {str(e)}")
             # Fallback enhancement
             self._fallback_tic_enhancement("Current question", user_answer)
 
+    def _enhance_tics(self, question: str, user_answer: str):
+        """Rewrite the TIC summaries a brainstorming answer adds to, as the model sees it"""
+        # Get all TIC summaries and current status for context
+        tic_context = context_builder().tic_context()
+
+        # Use OpenAI to analyze how this answer relates to and updates the user's business vision
+        analysis_input = f"""CURRENT BUSINESS CONTEXT:
+{tic_context}
+
+BRAINSTORMING QUESTION: "{question}"
+USER'S ANSWER: "{user_answer}\""""
+
+        analysis = llm.chat_parsed(
+            "tic_enhance",
+            parse=parse_json_content,
+            messages=[
+                {"role": "system", "content": TIC_ENHANCEMENT_PROMPT},
+                {"role": "user", "content": analysis_input}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.2,
+            max_tokens=500
+        )
+
+        # Update primary TIC
+        primary_tic = analysis.get('primary_tic')
+        if primary_tic and primary_tic in TIC_SEQUENCE:
+            enhanced_summaries = analysis.get('enhanced_summaries', {})
+            if primary_tic in enhanced_summaries:
+                current_tic_data = st.session_state.business_state['tic_progress'][primary_tic]
+                current_tic_data['summary'] = enhanced_summaries[primary_tic]
+                current_tic_data['enhanced_from_brainstorming'] = True
+                current_tic_data['vision_insights'] = analysis.get('vision_insights', '')
+                context_builder().invalidate_tic(primary_tic)
+
+        # Update secondary TICs if provided
+        secondary_tics = analysis.get('secondary_tics', [])
+        enhanced_summaries = analysis.get('enhanced_summaries', {})
+        for tic_name in secondary_tics:
+            if tic_name in TIC_SEQUENCE and tic_name in enhanced_summaries:
+                tic_data = st.session_state.business_state['tic_progress'][tic_name]
+                tic_data['summary'] = enhanced_summaries[tic_name]
+                tic_data['enhanced_from_brainstorming'] = True
+                context_builder().invalidate_tic(tic_name)
+
+        print(f"ENHANCED TICS FROM BRAINSTORMING: Primary={primary_tic}, Secondary={secondary_tics}")
+
+    def _summarize_tic(self, tic_name: str, user_response: str):
+        """Replace a provisional TIC summary (the raw answer, accepted in degraded mode) with the model's"""
+        tic_data = st.session_state.business_state['tic_progress'].get(tic_name, {})
+        if (not tic_data.get('provisional') or tic_data.get('enhanced_from_brainstorming')
+                or tic_data.get('user_response') != user_response):
+            # Answered again or enhanced since; nothing to replace
+            return
+        response = llm.chat(
+            "tic_summary",
+            messages=[
+                {"role": "system", "content": TIC_SUMMARY_PROMPT},
+                {"role": "user", "content": f"Component: {TIC_DISPLAY_NAMES[tic_name]}\n"
+                                            f"Question: {TIC_QUESTIONS[tic_name]['question']}\n"
+                                            f"Answer: {user_response}"}
+            ],
+            temperature=0.2,
+            max_tokens=200
+        )
+        summary = (response.choices[0].message.content or "").strip()
+        if summary:
+            tic_data['summary'] = summary
+            tic_data.pop('provisional', None)
+            context_builder().invalidate_tic(tic_name)
+
+    def run_deferred_job(self, kind: str, payload: dict):
+        """Do work that was skipped in degraded mode; raises so the job is retried later"""
+        business_state = st.session_state.business_state
+        if kind == 'conversation_items':
+            self._append_turn_to_conversation(payload['conversation_id'], payload['user_input'],
+                                              payload['assistant_content'], raise_errors=True)
+        elif kind == 'tic_summary':
+            self._summarize_tic(payload['tic_name'], payload['user_response'])
+        elif kind == 'tic_enhance':
+            self._enhance_tics(payload['question'], payload['answer'])
+        elif kind == 'benchmarks':
+            if not business_state.get('benchmark_companies'):
+                result = self._auto_generate_benchmark_companies()
+                if not result['success']:
+                    raise RuntimeError(result['message'])
+        elif kind == 'evaluation':
+            result = generate_evaluation_report(payload['conversation_id'], payload['selected_companies'])
+            if not result['success']:
+                raise RuntimeError(result['message'])
+            business_state['evaluation_report'] = result['data']
+            storage.save_report(st.session_state.current_session_id, result['data'])
+            score_analytics.record_scores(conn, st.session_state.current_session_id,
+                                          business_state['industry'], result['data'])
+        else:
+            raise ValueError(f"Unknown deferred job kind: {kind}")
+
     def _fallback_tic_enhancement(self, question: str, user_answer: str):
         """Simple fallback TIC enhancement when advanced analysis fails"""
         try:
@@ -1433,6 +1946,7 @@ Provide your response in this JSON format:
 
             current_tic_data['summary'] = enhanced_summary
             current_tic_data['enhanced_from_brainstorming'] = True
+            context_builder().invalidate_tic(target_tic)
 
         except Exception as e:
             print(f"FALLBACK TIC ENHANCEMENT ERROR: {str(e)}")
@@ -1492,10 +2006,13 @@ Provide your response in this JSON format:
                     "output": json.dumps(result)
                 })
 
-            # Continue conversation with tool outputs
-            if tool_outputs:
-                response = client.responses.create(
-                    model="gpt-4.1",
+            # Continue conversation with tool outputs. Same instructions and tools as the
+            # first call so the follow-up shares its cached prompt prefix.
+            if tool_outputs and tool_call_count <= MAX_TOOL_ROUNDS:
+                response = llm.respond(
+                    "tic_turn",
+                    tools=self.consultant.tools,
+                    instructions=self.consultant.system_instructions,
                     conversation=conversation_id,
                     input=tool_outputs,
                     temperature=0
@@ -1543,13 +2060,134 @@ Provide your response in this JSON format:
         
         return assistant_content or "I'm ready to help you develop your business concept!"
 
+# ===================================================================
+# LOCAL ENGINE - DEGRADED MODE
+# ===================================================================
+
+class LocalEngine:
+    """
+    Rule-based turns for when the LLM API is down (see degraded_mode.py): the fixed TIC questions,
+    length validation, cached help answers and catalog benchmarks. Brainstorming needs no engine of
+    its own, since its validation and question generation already fall back to local rules and the
+    question bank. Model work that can wait is deferred and reconciled once the API is back.
+    """
+
+    def __init__(self, orchestrator: 'AgentOrchestrator'):
+        self.orchestrator = orchestrator
+        self.state_manager = orchestrator.state_manager
+
+    def answer(self, user_input: str, conversation_id: str) -> str:
+        phase = st.session_state.business_state['phase']
+        if phase == 'tic_collection':
+            return self.tic_turn(user_input, conversation_id)
+        if phase == 'benchmarking':
+            return self.benchmark_turn(user_input, conversation_id)
+        return "The AI service is unavailable right now. Please send your message again in a moment."
+
+    def tic_turn(self, user_input: str, conversation_id: str) -> str:
+        business_state = st.session_state.business_state
+        tic_name = business_state['current_tic']
+        if tic_name not in TIC_SEQUENCE:
+            return self.benchmark_turn(user_input, conversation_id)
+        question = f"**{TIC_DISPLAY_NAMES[tic_name]}:** {TIC_QUESTIONS[tic_name]['question']}"
+
+        if looks_like_question(user_input):
+            cached = self.orchestrator._cached_help_answer(f"tic:{tic_name}", user_input)
+            reply = cached or ("I can't look that up while the AI service is unavailable, but a rough answer "
+                               "is fine for now; you can refine it later.")
+            return self._record(conversation_id, user_input, f"{reply}\n\n{question}")
+
+        validation_result = self.state_manager.handle_tool_call("validate_tic_data", {
+            "tic_name": tic_name,
+            "user_response": user_input
+        })
+        if not validation_result['data']['is_valid']:
+            tic_data = business_state['tic_progress'].get(tic_name, {})
+            tic_data['clarification_attempts'] = tic_data.get('clarification_attempts', 0) + 1
+            business_state['tic_progress'][tic_name] = tic_data
+            return self._record(conversation_id, user_input, f"Could you add a bit more detail?\n\n{question}")
+
+        # The answer stands in for its summary until the model writes one
+        self.state_manager.handle_tool_call("update_tic_progress", {
+            "tic_name": tic_name,
+            "status": "confirmed",
+            "summary": user_input.strip(),
+            "user_response": user_input
+        })
+        business_state['tic_progress'][tic_name]['provisional'] = True
+        defer_job("tic_summary", {"tic_name": tic_name, "user_response": user_input})
+
+        next_tic = business_state['current_tic']
+        if next_tic in TIC_SEQUENCE:
+            reply = f"Thanks, noted. Next up, **{TIC_DISPLAY_NAMES[next_tic]}:** {TIC_QUESTIONS[next_tic]['question']}"
+        else:
+            print("TIC 7 COMPLETED (LOCAL) - BENCHMARK COMPANIES FROM CATALOG")
+            reply = "Perfect! That covers all the key components of your business.\n\n" + self._benchmark_companies()
+        return self._record(conversation_id, user_input, reply)
+
+    def benchmark_turn(self, user_input: str, conversation_id: str) -> str:
+        business_state = st.session_state.business_state
+        if not business_state.get('benchmark_companies'):
+            reply = self._benchmark_companies()
+        else:
+            selected = len(business_state.get('selected_companies', []))
+            reply = f"Please select 3 companies from the sidebar to continue ({selected} selected so far)."
+        return self._record(conversation_id, user_input, reply)
+
+    def _benchmark_companies(self) -> str:
+        """Suggest companies from the local catalog (the LLM re-rank fails fast and falls back to it)"""
+        result = self.orchestrator._auto_generate_benchmark_companies()
+        if result['success']:
+            return "I've picked benchmark companies from our catalog. Please select 3 companies from the sidebar to proceed with detailed brainstorming."
+        defer_job("benchmarks", {})
+        return "Benchmark companies will be suggested as soon as the AI service is back. Your answers so far are saved."
+
+    def _record(self, conversation_id: str, user_input: str, reply: str) -> str:
+        # Replayed into the server-side conversation later, so reloads and the evaluation see this turn
+        defer_job("conversation_items", {
+            "conversation_id": conversation_id,
+            "user_input": user_input,
+            "assistant_content": reply
+        })
+        return reply
+
 # ===================================================================
 # HELPER FUNCTIONS
 # ===================================================================
 
+def default_business_state(industry: str = '') -> dict:
+    return {
+        'industry': industry,
+        'current_tic': 'vision',
+        'tic_progress': {tic: {'status': 'pending', 'summary': '', 'user_response': ''} for tic in TIC_SEQUENCE},
+        'phase': 'tic_collection',
+        'benchmark_companies': [],
+        'selected_companies': [],
+        'completed_count': 0,
+        'brainstorming_progress': {
+            'current_question': 0,
+            'completed_count': 0,
+            'answers': {}
+        },
+        'evaluation_report': None,
+        # The full chat log is in storage (sessions from before that are copied from the server once)
+        'chat_log_stored': True
+    }
+
+def new_message_store(session_id: Optional[int]) -> MessageStore:
+    return MessageStore(storage, session_id, capacity=MESSAGE_WINDOW,
+                        topics=TIC_DISPLAY_NAMES, cues=CLARIFICATION_CUES)
+
+def context_builder() -> ContextBuilder:
+    """The session's prompt-context cache, bound to the current business_state"""
+    builder = st.session_state.context_builder
+    builder.bind(st.session_state.business_state)
+    return builder
+
+@profiled
 def initialize_session_state():
     if 'messages' not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = new_message_store(None)
     if 'current_session_id' not in st.session_state:
         st.session_state.current_session_id = None
     if 'conversation_id' not in st.session_state:
@@ -1557,42 +2195,111 @@ def initialize_session_state():
     if 'auto_start' not in st.session_state:
         st.session_state.auto_start = False
     if 'business_state' not in st.session_state:
-        st.session_state.business_state = {
-            'industry': '',
-            'current_tic': 'vision',
-            'tic_progress': {tic: {'status': 'pending', 'summary': '', 'user_response': ''} for tic in TIC_SEQUENCE},
-            'phase': 'tic_collection',
-            'benchmark_companies': [],
-            'selected_companies': [],
-            'completed_count': 0,
-            'brainstorming_progress': {
-                'current_question': 0,
-                'completed_count': 0,
-                'answers': {}
-            },
-            'evaluation_report': None
-        }
+        st.session_state.business_state = default_business_state()
+    if 'state_version' not in st.session_state:
+        # Version and snapshot of business_state as last read from / written to the DB
+        st.session_state.state_version = 0
+        st.session_state.state_base = None
+    if 'context_builder' not in st.session_state:
+        st.session_state.context_builder = ContextBuilder(TIC_SEQUENCE, TIC_DISPLAY_NAMES)
     if 'orchestrator' not in st.session_state:
         st.session_state.orchestrator = AgentOrchestrator()
-
+    if 'earlier_shown' not in st.session_state:
+        # Messages before the window the user has paged in
+        st.session_state.earlier_shown = 0
+    if 'deferred_jobs' not in st.session_state:
+        # Jobs queued by the current turn; written to the deferred_jobs table when its state is saved
+        st.session_state.deferred_jobs = []
+
+@profiled
 def load_business_state_from_db(session_id: int):
-    result = conn.execute("SELECT business_state FROM business_sessions WHERE id = ?", (session_id,)).fetchone()
-    if result and result[0]:
-        try:
-            loaded_state = json.loads(result[0])
-            # Ensure required fields exist
-            if 'brainstorming_progress' not in loaded_state:
-                loaded_state['brainstorming_progress'] = {
-                    'current_question': 0,
-                    'completed_count': 0,
-                    'answers': {}
-                }
-            if 'evaluation_report' not in loaded_state:
-                loaded_state['evaluation_report'] = None
-            st.session_state.business_state = loaded_state
-        except json.JSONDecodeError:
-            pass
-
+    loaded_state, version = storage.load_state(session_id)
+    st.session_state.state_version = version
+    st.session_state.state_base = copy.deepcopy(loaded_state)
+    if loaded_state:
+        # Ensure required fields exist
+        if 'brainstorming_progress' not in loaded_state:
+            loaded_state['brainstorming_progress'] = {
+                'current_question': 0,
+                'completed_count': 0,
+                'answers': {}
+            }
+        if 'evaluation_report' not in loaded_state:
+            loaded_state['evaluation_report'] = None
+        st.session_state.business_state = loaded_state
+    else:
+        st.session_state.business_state = default_business_state(st.session_state.business_state.get('industry', ''))
+
+@profiled
+def save_business_state_to_db():
+    """Persist business_state with compare-and-swap, merging concurrent edits from other replicas/tabs"""
+    session_id = st.session_state.current_session_id
+    if session_id is None:
+        return
+    try:
+        saved_state, version = storage.save_state(
+            session_id,
+            st.session_state.state_base,
+            st.session_state.state_version,
+            st.session_state.business_state
+        )
+        st.session_state.business_state = saved_state
+        st.session_state.state_version = version
+        st.session_state.state_base = copy.deepcopy(saved_state)
+    except session_store.StateConflictError as e:
+        print(f"STATE CONFLICT UNRESOLVED: {str(e)}")
+        load_business_state_from_db(session_id)
+        st.warning("This session was changed in another tab or window. The latest saved progress has been loaded.")
+    flush_deferred_jobs()
+
+def llm_offline() -> bool:
+    """Turns are answered by the local engine: the API is down or this session's LLM budget is used up"""
+    return api_health.degraded or llm.budget_decision(st.session_state.current_session_id) == "local"
+
+def defer_job(kind: str, payload: dict):
+    """Queue model work skipped in degraded mode; kept only if the current turn is saved"""
+    st.session_state.deferred_jobs.append((kind, payload))
+
+def flush_deferred_jobs():
+    session_id = st.session_state.current_session_id
+    for kind, payload in st.session_state.deferred_jobs:
+        degraded_mode.enqueue(conn, session_id, kind, payload)
+    st.session_state.deferred_jobs = []
+
+@profiled
+def reconcile_deferred_jobs():
+    """Run the session's deferred jobs, oldest first, once the API answers again"""
+    session_id = st.session_state.current_session_id
+    jobs = degraded_mode.pending_jobs(conn, session_id)
+    if not jobs:
+        return
+    print(f"RECONCILING {len(jobs)} DEFERRED JOBS FOR SESSION {session_id}")
+    with st.spinner(f"Catching up on {len(jobs)} updates from offline mode..."):
+        for job in jobs:
+            if not degraded_mode.claim(conn, job['id']):
+                continue
+            try:
+                st.session_state.orchestrator.run_deferred_job(job['kind'], job['payload'])
+                save_business_state_to_db()
+            except Exception as e:
+                print(f"DEFERRED JOB FAILED: {job['kind']} #{job['id']}: {str(e)}")
+                degraded_mode.fail(conn, job['id'], f"{type(e).__name__}: {str(e)}")
+                if is_unavailable(e) or llm_offline():
+                    # Down again; the rest waits for the next recovery
+                    break
+                continue
+            degraded_mode.complete(conn, job['id'])
+
+def format_percentile_rank(rank: dict, industry: str) -> str:
+    """One-line portfolio comparison for a score, e.g. 'Higher than 73% of 120 evaluated ideas'"""
+    if rank['portfolio'] is None:
+        return "No portfolio comparison available yet"
+    text = f"Higher than {rank['portfolio']:.0f}% of {score_store.count()} evaluated ideas"
+    if rank['industry'] is not None:
+        text += f" ({rank['industry']:.0f}% in {industry})"
+    return text
+
+@profiled
 def get_conversation_messages(conversation_id):
     try:
         items_response = client.conversations.items.list(
@@ -1626,6 +2333,63 @@ def get_conversation_messages(conversation_id):
         st.error(f"Error retrieving conversation: {str(e)}")
         return []
 
+# Printed once per process when Streamlit's private rerun request state cannot be read
+RERUN_PROBE_DISABLED = "TURN CONTROL: STREAMLIT RERUN REQUESTS NOT READABLE, SUPERSEDED CHECK DISABLED"
+
+def rerun_requested(ctx) -> bool:
+    """
+    True once Streamlit has queued a rerun or stop for this browser session (new message, navigation).
+    Streamlit has no public API for this: it reads the private ScriptRequests._state, present in the
+    versions requirements.txt allows. If a Streamlit upgrade moves it, the check turns itself off
+    and says so once in the log: turns then only end on a newer turn or their deadline.
+    """
+    state = getattr(getattr(ctx, 'script_requests', None), '_state', None)
+    name = getattr(state, 'name', None)
+    if not isinstance(name, str):
+        warn_once(RERUN_PROBE_DISABLED)
+        return False
+    return name != 'CONTINUE'
+
+@contextmanager
+def turn_transaction(kind: str, timeout: float, key: Optional[str] = None):
+    """
+    Run one user action as a cancellable turn with a deadline. Until turn.commit() is called,
+    any exit other than normal completion (cancellation, deadline, error, Streamlit stopping
+    the run) restores business_state and the chat history to where the turn started.
+    The turn cancels the session's running turns unless they have the same key (a duplicate submit).
+    """
+    ctx = get_script_run_ctx()
+    superseded = (lambda: rerun_requested(ctx)) if ctx is not None else None
+    turn = turn_registry.begin(st.session_state.current_session_id, kind, timeout,
+                               superseded=superseded, key=key)
+    state_snapshot = copy.deepcopy(st.session_state.business_state)
+    message_count = st.session_state.messages.total
+    deferred_count = len(st.session_state.deferred_jobs)
+    token = current_turn.set(turn)
+    try:
+        yield turn
+    except BaseException as e:
+        if not turn.committed:
+            print(f"TURN ROLLED BACK: {kind} #{turn.id} ({type(e).__name__})")
+            st.session_state.business_state = state_snapshot
+            st.session_state.messages.truncate(message_count)
+            del st.session_state.deferred_jobs[deferred_count:]
+            # Items this turn's calls added to the OpenAI conversation
+            turn.rollback()
+        turn_registry.finish(turn, e)
+        raise
+    else:
+        turn_registry.finish(turn)
+    finally:
+        current_turn.reset(token)
+
+def report_cancelled_turn(error: TurnCancelled):
+    # If the user already moved on, Streamlit starts the queued rerun at this call
+    if isinstance(error, DeadlineExceeded):
+        st.error("That took longer than expected, so nothing was saved. Please try again.")
+    else:
+        st.warning("This request was replaced by a newer one, so nothing was saved.")
+
 def auto_start_conversation():
     if st.session_state.conversation_id and st.session_state.auto_start:
         try:
@@ -1642,13 +2406,27 @@ def auto_start_conversation():
 # MAIN STREAMLIT APP
 # ===================================================================
 
+script_profiler.mark("init & reconcile")
 st.title("Business Consultation System with Manual Tool Control")
 st.markdown("*Automated TIC Collection → Auto Benchmarking → Auto Brainstorming → AI Evaluation*")
 
 initialize_session_state()
+# Identical in-flight LLM requests within this session are coalesced
+call_scope.set(st.session_state.current_session_id)
+# LLM usage is booked under the session's phase in the cost ledger
+call_phase.set(st.session_state.business_state['phase'])
+
+if api_health.degraded:
+    st.warning("⚠️ The AI service is unavailable, so answers come from offline mode. Detailed summaries and reports will catch up automatically.")
+elif llm_offline():
+    st.info("This session has reached its AI usage limit, so answers now come from offline mode.")
+elif st.session_state.current_session_id is not None:
+    # Work deferred while the API was down (summaries, conversation items, reports)
+    reconcile_deferred_jobs()
 
 # Sidebar for session management
 with st.sidebar:
+    script_profiler.mark("sidebar: sessions")
     st.header("Business Sessions")
     
     # Industry selection for new sessions
@@ -1664,17 +2442,17 @@ with st.sidebar:
             )
             
             # Store in database
-            cursor = conn.execute(
-                "INSERT INTO business_sessions (name, conversation_id, industry) VALUES (?, ?, ?)", 
-                (new_session_name, conversation.id, selected_industry)
-            )
-            conn.commit()
+            session_id = storage.create_session(new_session_name, conversation.id, selected_industry)
             
             # Initialize session
-            st.session_state.current_session_id = cursor.lastrowid
+            st.session_state.current_session_id = session_id
             st.session_state.conversation_id = conversation.id
-            st.session_state.messages = []
-            st.session_state.business_state['industry'] = selected_industry
+            st.session_state.messages = new_message_store(session_id)
+            st.session_state.earlier_shown = 0
+            st.session_state.business_state = default_business_state(selected_industry)
+            st.session_state.state_version = 0
+            st.session_state.state_base = None
+            save_business_state_to_db()
             st.session_state.auto_start = True
             
             st.success(f"Created session: {new_session_name}")
@@ -1683,20 +2461,31 @@ with st.sidebar:
             st.error(f"Error creating session: {str(e)}")
 
     # List existing sessions
-    sessions = conn.execute("SELECT id, name, conversation_id, industry FROM business_sessions ORDER BY created_at DESC").fetchall()
+    sessions = storage.list_sessions()
     st.subheader("Load Session")
-    for sid, name, conv_id, industry in sessions:
+    for session in sessions:
+        sid, name, conv_id, industry = session['id'], session['name'], session['conversation_id'], session['industry']
         if st.button(f"{name} ({industry})", key=f"load_{sid}"):
             st.session_state.current_session_id = sid
             st.session_state.conversation_id = conv_id
             st.session_state.business_state['industry'] = industry
-            st.session_state.messages = get_conversation_messages(conv_id)
             load_business_state_from_db(sid)
-            st.session_state.auto_start = len(st.session_state.messages) == 0
+            # Open with the last window of messages; earlier ones stay in storage until paged in
+            st.session_state.messages = new_message_store(sid)
+            st.session_state.earlier_shown = 0
+            if (st.session_state.state_base or {}).get('chat_log_stored'):
+                st.session_state.messages.restore()
+            else:
+                # Saved before every message was stored: copy the conversation from the server once
+                st.session_state.messages.load(get_conversation_messages(conv_id))
+                st.session_state.business_state['chat_log_stored'] = True
+                save_business_state_to_db()
+            st.session_state.auto_start = st.session_state.messages.total == 0
             st.success(f"Loaded session: {name}")
             st.rerun()
     
     # Progress Display
+    script_profiler.mark("sidebar: progress")
     if st.session_state.current_session_id:
         st.header("Progress Tracker")
         st.write(f"**Industry:** {st.session_state.business_state['industry']}")
@@ -1729,6 +2518,7 @@ with st.sidebar:
                 st.write(f"⏳ {i+1}. {TIC_DISPLAY_NAMES[tic]}")
         
         # Benchmark Companies - Interactive Selection
+        script_profiler.mark("sidebar: benchmarks")
         if st.session_state.business_state['benchmark_companies']:
             st.subheader("Select Benchmark Companies")
             st.caption("Click to select companies for idea refinement (Max 3)")
@@ -1760,60 +2550,48 @@ with st.sidebar:
                 
                 # Create button
                 if st.button(button_text, key=f"company_btn_{i}", disabled=button_disabled):
-                    if is_selected:
-                        # Remove from selection
-                        st.session_state.business_state['selected_companies'].remove(company_name)
-                        print(f"COMPANY DESELECTED: {company_name}")
-                    else:
-                        # Add to selection
-                        st.session_state.business_state['selected_companies'].append(company_name)
-                        print(f"COMPANY SELECTED: {company_name}")
+                    try:
+                        with turn_transaction("selection", TURN_DEADLINE_SECONDS) as turn:
+                            if is_selected:
+                                # Remove from selection
+                                st.session_state.business_state['selected_companies'].remove(company_name)
+                                print(f"COMPANY DESELECTED: {company_name}")
+                            else:
+                                # Add to selection
+                                st.session_state.business_state['selected_companies'].append(company_name)
+                                print(f"COMPANY SELECTED: {company_name}")
+                                benchmark_catalog.record_selection(st.session_state.business_state['industry'], company_name)
                         
-                        # If 3 companies selected, auto-start brainstorming immediately
-                        if len(st.session_state.business_state['selected_companies']) == 3:
-                            print(f"3 COMPANIES SELECTED - AUTO-STARTING BRAINSTORMING IMMEDIATELY")
-                            
-                            # Change phase to brainstorming
-                            st.session_state.business_state['phase'] = 'brainstorming'
+                                # If 3 companies selected, auto-start brainstorming immediately
+                                if len(st.session_state.business_state['selected_companies']) == 3:
+                                    print(f"3 COMPANIES SELECTED - AUTO-STARTING BRAINSTORMING IMMEDIATELY")
                             
-                            # Initialize brainstorming progress
-                            if 'brainstorming_progress' not in st.session_state.business_state:
-                                st.session_state.business_state['brainstorming_progress'] = {
-                                    'current_question': 0,
-                                    'completed_count': 0,
-                                    'answers': {}
-                                }
+                                    # Switch to brainstorming and generate the first question (once per session)
+                                    try:
+                                        first_question = st.session_state.orchestrator.start_brainstorming()
+
+                                        # Create message with the first question
+                                        auto_message = f"Great! Now that you've selected your benchmark companies ({', '.join(st.session_state.business_state['selected_companies'])}), let's dive deep into your business idea with detailed questions.\n\n**Question 1/20:** {first_question}"
+
+                                        st.session_state.messages.append({"role": "assistant", "content": auto_message})
+                                    except Exception as e:
+                                        print(f"Error generating first question: {str(e)}")
+                                        # Fallback approach - just set a message without dynamic question
+                                        fallback_question = "What specific problem does your business idea solve that existing solutions don't address effectively?"
+                                        st.session_state.business_state['brainstorming_progress']['current_question_text'] = fallback_question
+                                        auto_message = f"Great! Now that you've selected your benchmark companies ({', '.join(st.session_state.business_state['selected_companies'])}), let's dive deep into your business idea with detailed questions.\n\n**Question 1/20:** {fallback_question}"
+                                        st.session_state.messages.append({"role": "assistant", "content": auto_message})
+
+                                    # Question is now generated and displayed immediately
                             
-                            # Generate the first question immediately
-                            try:
-                                orchestrator = st.session_state.orchestrator
-
-                                # Ensure consultant has the method
-                                if hasattr(orchestrator.consultant, '_generate_first_question'):
-                                    first_question = orchestrator.consultant._generate_first_question()
-                                else:
-                                    # Fallback question if method doesn't exist
-                                    first_question = "What specific problem does your business idea solve that existing solutions don't address effectively?"
-
-                                # Store the question in brainstorming progress
-                                st.session_state.business_state['brainstorming_progress']['current_question_text'] = first_question
-                                # Create message with the first question
-                                auto_message = f"Great! Now that you've selected your benchmark companies ({', '.join(st.session_state.business_state['selected_companies'])}), let's dive deep into your business idea with detailed questions.\n\n**Question 1/20:** {first_question}"
-
-                                st.session_state.messages.append({"role": "assistant", "content": auto_message})
-                            except Exception as e:
-                                print(f"Error generating first question: {str(e)}")
-                                # Fallback approach - just set a message without dynamic question
-                                fallback_question = "What specific problem does your business idea solve that existing solutions don't address effectively?"
-                                st.session_state.business_state['brainstorming_progress']['current_question_text'] = fallback_question
-                                auto_message = f"Great! Now that you've selected your benchmark companies ({', '.join(st.session_state.business_state['selected_companies'])}), let's dive deep into your business idea with detailed questions.\n\n**Question 1/20:** {fallback_question}"
-                                st.session_state.messages.append({"role": "assistant", "content": auto_message})
-
-                            # Question is now generated and displayed immediately
-                            
-                            print(f"AUTO-STARTED BRAINSTORMING WITH FIRST QUESTION")
+                                    print(f"AUTO-STARTED BRAINSTORMING WITH FIRST QUESTION")
                     
-                    st.rerun()
+                            turn.commit()
+                            save_business_state_to_db()
+                    except TurnCancelled as e:
+                        report_cancelled_turn(e)
+                    else:
+                        st.rerun()
             
             # Show current selection
             if selected_companies:
@@ -1827,6 +2605,7 @@ with st.sidebar:
                     st.info(f"Select {3 - len(selected_companies)} more companies to start brainstorming!")
 
         # Brainstorming Progress
+        script_profiler.mark("sidebar: brainstorming")
         if st.session_state.business_state['phase'] == 'brainstorming':
             brainstorming_state = st.session_state.business_state.get('brainstorming_progress', {})
             completed_questions = brainstorming_state.get('completed_count', 0)
@@ -1866,6 +2645,7 @@ with st.sidebar:
                 with col1:
                     if st.button("🚪 Exit Brainstorming"):
                         st.session_state.business_state['phase'] = 'evaluation_ready'
+                        save_business_state_to_db()
                         st.success("Brainstorming completed! You can now generate your evaluation report.")
                         st.rerun()
                 
@@ -1880,34 +2660,65 @@ with st.sidebar:
                     st.write(f"• {company}")
 
         # Evaluation Report
+        script_profiler.mark("sidebar: evaluation report")
         if (st.session_state.business_state['phase'] in ['brainstorming', 'evaluation_ready'] and 
             st.session_state.business_state.get('brainstorming_progress', {}).get('completed_count', 0) >= 10):
             
             st.subheader("📊 AI Evaluation Report")
             
-            if st.button("🔍 Generate Evaluation Report"):
+            generate_clicked = st.button("🔍 Generate Evaluation Report")
+            if generate_clicked and api_health.degraded:
+                session_id = st.session_state.current_session_id
+                if not any(job['kind'] == 'evaluation' for job in degraded_mode.pending_jobs(conn, session_id)):
+                    defer_job("evaluation", {
+                        "conversation_id": st.session_state.conversation_id,
+                        "selected_companies": st.session_state.business_state['selected_companies']
+                    })
+                    save_business_state_to_db()
+                st.info("📥 The AI service is unavailable. Your evaluation report is queued and will be generated when it's back.")
+            elif generate_clicked:
+                if rate_limiter.pressure()['busy']:
+                    st.info("⏳ The AI service is busy; evaluation runs after live conversations and may take longer.")
                 with st.spinner("Generating comprehensive evaluation report..."):
-                    evaluation_result = generate_evaluation_report(
-                        st.session_state.conversation_id,
-                        st.session_state.business_state['selected_companies']
-                    )
-                    
-                    if evaluation_result['success']:
-                        st.session_state.business_state['evaluation_report'] = evaluation_result['data']
-                        st.success("Evaluation report generated successfully!")
-                        st.rerun()
+                    try:
+                        with turn_transaction("evaluation", EVALUATION_DEADLINE_SECONDS) as turn:
+                            evaluation_result = generate_evaluation_report(
+                                st.session_state.conversation_id,
+                                st.session_state.business_state['selected_companies']
+                            )
+                            
+                            if evaluation_result['success']:
+                                turn.commit()
+                                st.session_state.business_state['evaluation_report'] = evaluation_result['data']
+                                save_business_state_to_db()
+                                storage.save_report(st.session_state.current_session_id, evaluation_result['data'])
+                                score_analytics.record_scores(
+                                    conn,
+                                    st.session_state.current_session_id,
+                                    st.session_state.business_state['industry'],
+                                    evaluation_result['data']
+                                )
+                    except TurnCancelled as e:
+                        report_cancelled_turn(e)
                     else:
-                        st.error(f"Error generating report: {evaluation_result['message']}")
+                        if evaluation_result['success']:
+                            st.success("Evaluation report generated successfully!")
+                            st.rerun()
+                        else:
+                            st.error(f"Error generating report: {evaluation_result['message']}")
             
             # Display evaluation report if exists
             if st.session_state.business_state.get('evaluation_report'):
                 report = st.session_state.business_state['evaluation_report']
+                report_industry = st.session_state.business_state['industry']
+                score_ranks = score_store.rank_report(report, report_industry)
 
                 # Overall Score & Investment Recommendation (Header)
                 col1, col2 = st.columns(2)
                 with col1:
                     overall_score = report['evaluation_feedback']['overall']['score']
                     st.metric("Overall Score", overall_score)
+                    st.caption(format_percentile_rank(score_ranks['overall'], report_industry))
 
                 with col2:
                     recommendation = report['ai_investment_recommendation']
@@ -1919,129 +2730,321 @@ with st.sidebar:
                     }.get(recommendation, 'gray')
                     st.markdown(f"**Investment Recommendation:** :{rec_color}[{recommendation}]")
 
-                st.write(f"**Investment Rationale:** {report['investment_rationale']}")
-
-                # Business Opportunity Evaluation (Top to Bottom View)
-                st.subheader("📊 Business Opportunity Evaluation")
-
-                # 1. Detailed Feedback
-                with st.expander("💬 Detailed Feedback", expanded=True):
-                    st.write(report.get('detailed_feedback', 'No detailed feedback available'))
-
-                eval_feedback = report['evaluation_feedback']
-
-                # 2. Market Opportunity & Growth
-                with st.expander("📈 Market Opportunity & Growth", expanded=True):
-                    st.metric("Score", eval_feedback['Market Opportunity & Growth']['score'])
-                    st.write(eval_feedback['Market Opportunity & Growth']['rationale'])
+                # Portfolio standing per criterion (live; changes as more ideas are evaluated)
+                for criterion_name, column in score_analytics.CRITERIA.items():
+                    if column != 'overall':
+                        st.caption(f"**{criterion_name}** {report['evaluation_feedback'].get(criterion_name, {}).get('score', '?')}: "
+                                   f"{format_percentile_rank(score_ranks[column], report_industry)}")
 
-                # 3. USP & Competitive Advantage
-                with st.expander("🏆 USP & Competitive Advantage", expanded=True):
-                    st.metric("Score", eval_feedback['USP & Competitive Advantage']['score'])
-                    st.write(eval_feedback['USP & Competitive Advantage']['rationale'])
-
-                # 4. Value Proposition
-                with st.expander("🎯 Value Proposition", expanded=True):
-                    st.metric("Score", eval_feedback['Value Proposition']['score'])
-                    st.write(eval_feedback['Value Proposition']['rationale'])
-
-                # 5. Sustainability
-                with st.expander("🌱 Sustainability", expanded=True):
-                    st.metric("Score", eval_feedback['Sustainability']['score'])
-                    st.write(eval_feedback['Sustainability']['rationale'])
-
-                # 6. Execution Feasibility
-                with st.expander("⚙️ Execution Feasibility", expanded=True):
-                    st.metric("Score", eval_feedback['Execution Feasibility']['score'])
-                    st.write(eval_feedback['Execution Feasibility']['rationale'])
-
-                # 7. Paradigm Shift Drivers
-                with st.expander("🔮 Paradigm Shift Drivers", expanded=True):
-                    if 'paradigm_shift_drivers' in report:
-                        st.write("**Key trends and societal shifts influencing this business idea:**")
-                        for i, driver in enumerate(report['paradigm_shift_drivers'], 1):
-                            st.write(f"{i}. {driver}")
-                    else:
-                        st.write("Paradigm shift analysis not available")
-
-                # 8. Benchmark Companies
-                with st.expander("🏢 Benchmark Companies", expanded=True):
-                    if 'benchmark_insights' in report:
-                        st.write("**Leading companies and case studies used for reference:**")
-                        for company in st.session_state.business_state['selected_companies']:
-                            st.write(f"• {company}")
-                        st.write("\n**Strategic Insights:**")
-                        st.write(report['benchmark_insights'])
+                # The full report is rendered once to a static HTML page keyed by its content
+                artifact_key, report_html = report_artifacts.get_or_render(report, {
+                    'industry': report_industry,
+                    'selected_companies': st.session_state.business_state['selected_companies']
+                })
+                st.markdown(f"🔗 [Open shareable report]({report_artifacts.url_for(artifact_key)})")
+                st.download_button(
+                    "⬇️ Download report (HTML)",
+                    data=report_html,
+                    file_name=f"evaluation-report-{artifact_key[:8]}.html",
+                    mime="text/html"
+                )
+                with st.expander("📄 Full Report", expanded=True):
+                    components.html(report_html, height=900, scrolling=True)
+
+                # Portfolio comparison across all evaluated ideas
+                with st.expander("📊 Portfolio Comparison"):
+                    overall_quartiles = score_store.percentiles('overall')
+                    if overall_quartiles:
+                        st.write(
+                            f"**Overall score quartiles:** 25th {overall_quartiles[25]}, median {overall_quartiles[50]}, "
+                            f"75th {overall_quartiles[75]}, 90th {overall_quartiles[90]}"
+                        )
+                        for industry_name, stats in sorted(score_store.means_by_industry('overall').items()):
+                            st.write(f"**{industry_name}:** mean {stats['mean']}/25 across {stats['count']} ideas")
                     else:
-                        st.write("**Selected Benchmark Companies:**")
-                        for company in st.session_state.business_state['selected_companies']:
-                            st.write(f"• {company}")
-
-                # Investment Attractiveness Analysis
-                with st.expander("💰 Investment Attractiveness Analysis"):
-                    if 'investment_attractiveness' in report:
-                        inv_data = report['investment_attractiveness']
+                        st.write("No evaluated ideas to compare against yet")
+
+    # Operator panels: usage, spend and state across all sessions, so end users don't see them
+    script_profiler.mark("sidebar: admin panels")
+    if ADMIN_PANELS:
+        # LLM call metrics per purpose, including provider prompt-cache hits
+        usage_stats = llm_metrics.snapshot()
+        if usage_stats:
+            with st.expander("📉 LLM Usage & Prompt Cache"):
+                for purpose, stats in sorted(usage_stats.items()):
+                    st.write(
+                        f"**{purpose}:** {stats['calls']} calls, avg {stats['avg_latency_ms']} ms, "
+                        f"{stats['input_tokens']} in / {stats['cached_tokens']} cached "
+                        f"({stats['cache_hit_rate']:.0%}), {stats['output_tokens']} out"
+                    )
+                    if stats['escalations'] or stats['cost']:
+                        st.caption(f"Cost ${stats['cost']:.4f}, {stats['escalations']} tier escalations, models: {stats['models']}")
+                    if stats['avg_cached_latency_ms'] is not None and stats['avg_uncached_latency_ms'] is not None:
+                        st.caption(
+                            f"Latency with cache hit {stats['avg_cached_latency_ms']} ms vs "
+                            f"{stats['avg_uncached_latency_ms']} ms without"
+                        )
+
+        tier_stats = llm_metrics.tier_snapshot()
+        if tier_stats:
+            with st.expander("🧭 Model Tiers"):
+                for tier_name, stats in sorted(tier_stats.items()):
+                    st.write(
+                        f"**{tier_name}** ({llm.router.tiers[tier_name].model if tier_name in llm.router.tiers else '?'}): "
+                        f"{stats['calls']} calls, avg {stats['avg_latency_ms']} ms, ${stats['cost']:.4f}, {stats['errors']} errors"
+                    )
 
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Market Opportunity", inv_data['Market Opportunity & Growth']['score'])
-                            st.caption(inv_data['Market Opportunity & Growth']['rationale'])
+        # Outbound LLM queue (rate limiter) per priority class
+        pressure = rate_limiter.pressure()
+        if any(stats['admitted'] or stats['timeouts'] for stats in pressure['priorities'].values()):
+            with st.expander("🚦 LLM Queue"):
+                st.write(f"**Queued now:** {pressure['queue_depth']}")
+                for priority_name, stats in pressure['priorities'].items():
+                    st.write(
+                        f"**{priority_name}:** {stats['queued']} queued, avg wait {stats['avg_wait_ms']} ms, "
+                        f"max {stats['max_wait_ms']} ms, {stats['timeouts']} timeouts"
+                    )
 
-                        with col2:
-                            st.metric("USP & Advantage", inv_data['USP & Competitive Advantage']['score'])
-                            st.caption(inv_data['USP & Competitive Advantage']['rationale'])
+        # Tool call metrics (shared by all sessions in this process)
+        tool_stats = tool_metrics.snapshot()
+        if tool_stats:
+            with st.expander("🛠️ Tool Metrics"):
+                for tool_name, stats in sorted(tool_stats.items()):
+                    st.write(
+                        f"**{tool_name}:** {stats['calls']} calls, avg {stats['avg_latency_ms']} ms, "
+                        f"max {stats['max_latency_ms']} ms, {stats['validation_failures']} invalid"
+                    )
 
-                        with col3:
-                            st.metric("Execution Feasibility", inv_data['Execution Feasibility']['score'])
-                            st.caption(inv_data['Execution Feasibility']['rationale'])
+        # Benchmark catalog size and how company lists were produced
+        catalog_stats = benchmark_catalog.snapshot()
+        if catalog_stats['retrievals']:
+            with st.expander("🏢 Benchmark Catalog"):
+                st.write(f"**Companies:** {catalog_stats['companies']} ({', '.join(f'{count} {source}' for source, count in catalog_stats['by_source'].items())})")
+                st.write(f"**Retrievals:** {catalog_stats['retrievals']}, avg {catalog_stats['avg_retrieval_ms']} ms")
+                st.write(f"**Lists by mode:** {', '.join(f'{mode}: {count}' for mode, count in catalog_stats['modes'].items()) or 'none'}")
+                st.write(f"**Added from suggestions:** {catalog_stats['added']}")
+
+        # Brainstorming questions served from the precomputed bank vs generated live
+        bank_stats = question_bank.stats_snapshot()
+        if bank_stats:
+            with st.expander("🗂️ Question Bank"):
+                for focus, stats in bank_stats.items():
+                    st.write(f"**{focus}:** {stats['bank']} from bank, {stats['live']} generated live")
+
+        # Recorded or replayed OpenAI interactions
+        if LLM_CASSETTE_MODE in ("record", "replay"):
+            cassette_stats = client.cassette_recorder.snapshot()
+            with st.expander("📼 LLM Cassettes"):
+                st.write(f"**Mode:** {cassette_stats['mode']}")
+                st.write(f"**Recorded / replayed:** {cassette_stats['recorded']} / {cassette_stats['replayed']}")
+                st.write(f"**Replay misses:** {cassette_stats['misses']} across {cassette_stats['cassettes']} cassettes")
+
+        # Help answers served from the local similarity cache
+        help_stats = help_cache.snapshot()
+        if help_stats['hits'] or help_stats['misses'] or help_stats['stored']:
+            with st.expander("💡 Help Answer Cache"):
+                st.write(f"**Cached answers:** {help_stats['entries']}")
+                st.write(f"**Hits / misses:** {help_stats['hits']} / {help_stats['misses']} ({help_stats['hit_rate']:.0%} hit rate)")
+                st.write(f"**Stored this process:** {help_stats['stored']}")
+
+        # Prompt context blocks reused between turns of this session
+        context_stats = st.session_state.context_builder.snapshot()
+        if context_stats['builds']:
+            with st.expander("🧱 Business Context"):
+                st.write(f"**Version:** {context_stats['version']} ({context_stats['invalidations']} invalidations)")
+                st.write(f"**Blocks reused / built:** {context_stats['hits']} / {context_stats['builds']}")
+
+        # Duplicate requests sent for slow calls on hedged routes, and which copy answered first
+        hedge_stats = hedge_policy.snapshot()
+        if any(stats['hedged'] for stats in hedge_stats.values()):
+            with st.expander("🪞 Hedged Requests"):
+                for purpose, stats in sorted(hedge_stats.items()):
+                    win_rate = f"{stats['hedge_win_rate']:.0%}" if stats['hedge_win_rate'] is not None else "n/a"
+                    st.write(
+                        f"**{purpose}:** {stats['hedged']} hedged of {stats['calls']} calls ({stats['hedge_rate']:.1%}), "
+                        f"hedge won {win_rate}, {stats['skipped_budget']} skipped over budget"
+                    )
 
-                        st.metric("**Total Investment Score**", inv_data['total'])
-                    else:
-                        st.write("Investment attractiveness analysis not available")
+        # Turns cut short by a newer request or their deadline (their partial state was discarded)
+        turn_stats = turn_registry.snapshot()
+        if turn_stats['superseded'] or turn_stats['deadline']:
+            with st.expander("⏱️ Turn Deadlines"):
+                st.write(f"**Turns:** {turn_stats['started']} started, {turn_stats['completed']} completed, {turn_stats['failed']} failed")
+                st.write(f"**Cancelled:** {turn_stats['superseded']} superseded, {turn_stats['deadline']} past deadline")
+                cancelled_calls = sum(stats['cancelled'] for stats in llm_metrics.snapshot().values())
+                st.write(f"**LLM calls abandoned:** {cancelled_calls}")
+
+        # Admin view: LLM spend per session, phase and purpose against the budgets
+        cost_stats = cost_ledger.snapshot()
+        if cost_stats['calls'] or cost_stats['today']:
+            with st.expander("💰 LLM Cost & Budgets"):
+                session_id = st.session_state.current_session_id
+                session_budget = f" of ${cost_stats['session_budget']:.2f}" if cost_stats['session_budget'] else ""
+                daily_budget = f" of ${cost_stats['daily_budget']:.2f}" if cost_stats['daily_budget'] else ""
+                if session_id is not None:
+                    st.write(f"**This session:** ${cost_ledger.session_spend(session_id):.4f}{session_budget} "
+                             f"({llm.budget_decision(session_id)})")
+                    for row in cost_ledger.breakdown(session_id):
+                        st.caption(f"{row['phase'] or '-'} / {row['purpose']}: {row['calls']} calls, "
+                                   f"{row['input_tokens']} in ({row['cached_tokens']} cached), {row['output_tokens']} out, ${row['cost']:.4f}")
+                st.write(f"**Today (UTC):** ${cost_stats['today']:.4f}{daily_budget}")
+                st.write(f"**Enforced:** {cost_stats['downgraded']} calls downgraded to {cost_stats['downgrade_tier'] or '-'}, "
+                         f"{cost_stats['refused']} refused")
+                for row in cost_ledger.top_sessions(limit=5):
+                    st.caption(f"Session {row['session_id']}: {row['calls']} calls, {row['tokens']} tokens, ${row['cost']:.4f}")
+
+        # Circuit breaker state and work queued while the LLM API was down
+        health_stats = api_health.snapshot()
+        job_stats = degraded_mode.job_counts(conn, st.session_state.current_session_id) if st.session_state.current_session_id else {}
+        if health_stats['degraded'] or health_stats['trips'] or job_stats:
+            with st.expander("🛟 Degraded Mode"):
+                st.write(f"**Mode:** {health_stats['mode']} ({'degraded' if health_stats['degraded'] else 'healthy'}"
+                         f"{', for ' + str(health_stats['degraded_for_s']) + ' s' if health_stats['degraded_for_s'] else ''})")
+                st.write(f"**Trips / recoveries:** {health_stats['trips']} / {health_stats['recoveries']}, "
+                         f"{health_stats['rejected']} calls not sent")
+                st.write(f"**Deferred jobs (this session):** {', '.join(f'{count} {status}' for status, count in sorted(job_stats.items())) or 'none'}")
+                if health_stats['last_error']:
+                    st.caption(f"Last outage error: {health_stats['last_error']}")
+
+        # Recent state changes of this session from its event log (full replay: python session_log.py --session N)
+        if st.session_state.current_session_id is not None and st.session_state.state_version:
+            with st.expander("🧾 Session History"):
+                session_id = st.session_state.current_session_id
+                version = st.session_state.state_version
+                st.write(f"**Version:** {version} (snapshot at {storage.load_snapshot(session_id, version)[1]})")
+                for event in reversed(storage.load_events(session_id, after=max(version - 10, 0), upto=version)):
+                    changed = ", ".join(".".join(map(str, op[1])) or "*" for op in event['ops'][:4])
+                    more = f" +{len(event['ops']) - 4}" if len(event['ops']) > 4 else ""
+                    st.caption(f"v{event['seq']} {datetime.fromtimestamp(event['created_at']).strftime('%H:%M:%S')} "
+                               f"{event['kind']}: {changed}{more}")
+
+        # Where this browser session's reruns spend their time (opt-in, see script_profiler.py)
+        if rerun_profiler is not None and rerun_profiler.last() is not None:
+            with st.expander("🔬 Rerun Profile"):
+                last_rerun = rerun_profiler.last()
+                profile_stats = rerun_profiler.snapshot()
+                st.write(f"**Last rerun:** {last_rerun['total_ms']} ms"
+                         f"{' (cut short by a rerun or error)' if last_rerun['interrupted'] else ''}, "
+                         f"{profile_stats['reruns']} reruns profiled")
+                section_summary = rerun_profiler.summary()
+                for section, elapsed in sorted(last_rerun['sections'].items(), key=lambda item: -item[1]):
+                    summary = section_summary.get(section, {})
+                    st.caption(f"{section}: {elapsed} ms (p50 {summary.get('p50_ms', 0)} ms, max {summary.get('max_ms', 0)} ms "
+                               f"over {summary.get('reruns', 0)} reruns)")
+                for call, stats in sorted(last_rerun['calls'].items(), key=lambda item: -item[1]['ms']):
+                    st.write(f"**{call}:** {stats['count']}× {stats['ms']} ms")
+                if last_rerun['cprofile']:
+                    st.write(f"**cProfile:** {last_rerun['cprofile']['path'] or 'not saved'}")
+                    for function in last_rerun['cprofile']['top']:
+                        st.caption(f"{function['function']}: {function['cumtime_ms']} ms cumulative, "
+                                   f"{function['tottime_ms']} ms own, {function['calls']} calls")
+                elif profile_stats['cprofile_busy']:
+                    st.caption(f"cProfile skipped on {profile_stats['cprofile_busy']} reruns (another profiler was active)")
+
+        # Duplicate work avoided by single-flight and idempotent turn replay
+        dedup_stats = single_flight.snapshot()
+        if dedup_stats:
+            with st.expander("🔁 Deduplication"):
+                for label, stats in sorted(dedup_stats.items()):
+                    st.write(f"**{label}:** {stats['executed']} executed, {stats['suppressed']} suppressed")
 
 # Main chat interface
+script_profiler.mark("chat history")
 if st.session_state.current_session_id is None:
     st.info("👈 Please create or load a business session to start the consultation process.")
 else:
     # Auto-start conversation if needed
     auto_start_conversation()
     
-    # Display chat history
-    for message in st.session_state.messages:
+    # Display chat history: the in-memory window, plus earlier pages the user has asked for
+    chat_history = st.session_state.messages
+    if st.session_state.earlier_shown < chat_history.offset and st.button(
+            f"⬆️ Load earlier messages ({chat_history.offset - st.session_state.earlier_shown} more)",
+            key="load_earlier_messages"):
+        st.session_state.earlier_shown = min(st.session_state.earlier_shown + MESSAGE_PAGE, chat_history.offset)
+    for message in chat_history.earlier(st.session_state.earlier_shown):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+    for message in chat_history:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
     # Chat input
+    script_profiler.mark("chat turn")
     user_input = st.chat_input("Share your business idea or answer the current question...")
 
     if user_input:
-        # Add user message
-        st.session_state.messages.append({"role": "user", "content": user_input})
-        with st.chat_message("user"):
-            st.markdown(user_input)
-
-        with st.spinner("Processing with automated tool control..."):
-            print(f"\nUSER INPUT RECEIVED: {user_input}")
-            print(f"Current Session: {st.session_state.current_session_id}")
-            print(f"Current Business State: {st.session_state.business_state['phase']}")
-            
-            # Process through orchestrator with manual control
-            assistant_response = st.session_state.orchestrator.process_user_input(
-                user_input, 
-                st.session_state.conversation_id
-            )
-            
-            print(f"PROCESSING COMPLETE!")
-            print(f"Response Generated: {len(assistant_response)} characters")
-            
-            # Add assistant response
-            st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-            with st.chat_message("assistant"):
-                st.markdown(assistant_response)
-                
+        # Idempotent turns: a duplicate submit of this message against the same saved state
+        # (double click, rerun race, another tab) replays the first reply instead of re-running
+        session_id = st.session_state.current_session_id
+        turn_id = session_store.turn_key(session_id, st.session_state.state_version, user_input)
+        try:
+            # Keyed, so a duplicate waits for the running turn instead of cancelling it
+            with turn_transaction("chat", TURN_DEADLINE_SECONDS, key=turn_id) as turn:
+                with st.chat_message("user"):
+                    st.markdown(user_input)
+
+                if rate_limiter.pressure()['busy']:
+                    st.info("⏳ High demand right now — your response may take a little longer than usual.")
+
+                with st.spinner("Processing with automated tool control..."):
+                    print(f"\nUSER INPUT RECEIVED: {user_input}")
+                    print(f"Current Session: {st.session_state.current_session_id}")
+                    print(f"Current Business State: {st.session_state.business_state['phase']}")
+
+                    # Claimed before anything is stored, so a replay adds nothing to the chat log
+                    replayed_response = storage.claim_turn(session_id, turn_id, turn=turn)
+
+                    if replayed_response is not None:
+                        print("DUPLICATE TURN SUPPRESSED - REPLAYING EARLIER RESPONSE")
+                        single_flight.record_suppressed("user_turn")
+                        turn.commit()
+                        # The original submission already saved its state changes and both messages
+                        load_business_state_from_db(session_id)
+                        st.session_state.messages.restore()
+                    else:
+                        message_count = st.session_state.messages.total
+                        try:
+                            # Add user message
+                            st.session_state.messages.append({"role": "user", "content": user_input})
+
+                            # Process through orchestrator with manual control
+                            assistant_response = st.session_state.orchestrator.process_user_input(
+                                user_input, 
+                                st.session_state.conversation_id
+                            )
+                            # Nothing below may be cancelled: the turn's results are saved from here on
+                            turn.commit()
+                        except BaseException:
+                            # Includes cancellation and Streamlit stopping this run; let a resubmission process the turn
+                            storage.release_turn(turn_id)
+                            raise
+
+                        print(f"PROCESSING COMPLETE!")
+                        print(f"Response Generated: {len(assistant_response)} characters")
+
+                        try:
+                            save_business_state_to_db()
+                        except BaseException:
+                            # Nothing was saved: drop the user message and let a resubmission run the turn
+                            st.session_state.messages.truncate(message_count)
+                            storage.release_turn(turn_id)
+                            raise
+
+                        # Add assistant response; stored before the reply is released to duplicates
+                        st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+                        storage.complete_turn(turn_id, assistant_response)
+                        with st.chat_message("assistant"):
+                            st.markdown(assistant_response)
+        except TurnCancelled as e:
+            report_cancelled_turn(e)
+        else:
             # Force UI update
             st.rerun()
 
 # Footer
+script_profiler.mark("footer")
 st.markdown("---")
 st.markdown("**Business Consultation System with Automated Tool Control** - Complete workflow automation!")
+if rerun_profiler is not None:
+    rerun_profiler.finish()
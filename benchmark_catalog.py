@@ -0,0 +1,203 @@
+"""
+Local catalog of benchmark companies, indexed per industry.
+
+The catalog starts from a curated seed file (benchmark_catalog.json) covering
+the industries offered in the sidebar and grows with every company the LLM
+suggests. Candidates for a business are retrieved from the TIC summaries with
+a TF-IDF index partitioned by industry, so the LLM only has to re-rank a short
+list (or fill gaps when the catalog has too few good matches) instead of
+inventing companies from scratch. Companies users actually pick are boosted.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import session_store
+from text_index import TfidfIndex
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_catalog.json')
+
+# Candidates below this similarity are treated as unrelated
+MIN_CANDIDATE_SCORE = 0.05
+
+# Industries without their own partition (e.g. "Other") search the whole catalog
+CROSS_INDUSTRY = "Other"
+
+
+class BenchmarkCatalog:
+    def __init__(self, conn: sqlite3.Connection, seed_path: Optional[str] = SEED_PATH):
+        self.conn = conn
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._companies: Dict[int, Dict[str, Any]] = {}
+        self._index = TfidfIndex()
+        self._stats = {"retrievals": 0, "retrieval_time": 0.0, "added": 0, "modes": {}}
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS benchmark_companies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                industry TEXT,
+                name TEXT COLLATE NOCASE,
+                description TEXT,
+                tags TEXT,
+                source TEXT,
+                times_suggested INTEGER NOT NULL DEFAULT 0,
+                times_selected INTEGER NOT NULL DEFAULT 0,
+                created_at REAL,
+                UNIQUE(industry, name)
+            )
+        ''')
+        if seed_path and os.path.exists(seed_path):
+            self._seed(seed_path)
+
+    def _seed(self, seed_path: str):
+        with open(seed_path) as f:
+            companies = json.load(f).get('companies', [])
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO benchmark_companies (industry, name, description, tags, source, created_at) "
+            "VALUES (?, ?, ?, ?, 'seed', ?)",
+            [(c['industry'], c['name'], c['description'], json.dumps(c.get('tags', [])), now) for c in companies]
+        )
+
+    def _refresh(self):
+        rows = self.conn.execute(
+            "SELECT id, industry, name, description, tags, source FROM benchmark_companies WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for company_id, industry, name, description, tags, source in rows:
+            tags = json.loads(tags or '[]')
+            self._companies[company_id] = {
+                "industry": industry, "name": name, "description": description, "tags": tags, "source": source
+            }
+            self._index.add(company_id, f"{name} {description} {' '.join(tags)}", partition=industry)
+            self._last_id = company_id
+
+    def candidates(self, industry: str, business_context: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Companies most similar to the business context, same industry first, then any industry"""
+        started = time.perf_counter()
+        with self._lock:
+            self._refresh()
+            matches = []
+            if industry != CROSS_INDUSTRY:
+                matches = self._index.search(business_context, partitions=[industry], limit=limit)
+            matches = [(company_id, score) for company_id, score in matches if score >= MIN_CANDIDATE_SCORE]
+            if len(matches) < limit:
+                seen = {company_id for company_id, _ in matches}
+                # Over-fetch so same-industry hits we already have don't crowd out new ones
+                extra = self._index.search(business_context, limit=2 * limit)
+                matches += [(company_id, score) for company_id, score in extra
+                            if company_id not in seen and score >= MIN_CANDIDATE_SCORE][:limit - len(matches)]
+
+        if matches:
+            placeholders = ','.join('?' * len(matches))
+            selections = dict(self.conn.execute(
+                f"SELECT id, times_selected FROM benchmark_companies WHERE id IN ({placeholders})",
+                [company_id for company_id, _ in matches]
+            ).fetchall())
+        else:
+            selections = {}
+
+        results = []
+        for company_id, score in matches:
+            # Companies users actually chose before rank a little higher
+            boosted = score * (1 + 0.1 * math.log1p(selections.get(company_id, 0)))
+            results.append({**self._companies[company_id], "score": round(boosted, 3)})
+        results.sort(key=lambda company: company["score"], reverse=True)
+        # The same company can be catalogued under several industries; offer it once
+        names = set()
+        results = [company for company in results
+                   if company["name"].lower() not in names and not names.add(company["name"].lower())]
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["retrievals"] += 1
+            self._stats["retrieval_time"] += elapsed
+        print(f"BENCHMARK CATALOG: {len(results)} candidates for {industry} in {1000 * elapsed:.1f} ms")
+        return results
+
+    def popular(self, industry: str, limit: int = 6, exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Most often chosen companies of an industry, without text matching (offline fallback)"""
+        excluded = {name.lower() for name in exclude or []}
+        rows = self.conn.execute(
+            "SELECT industry, name, description FROM benchmark_companies WHERE ? = ? OR industry = ? "
+            "ORDER BY times_selected DESC, times_suggested DESC, id LIMIT ?",
+            (industry, CROSS_INDUSTRY, industry, limit + len(excluded))
+        ).fetchall()
+        results = []
+        for company_industry, name, description in rows:
+            if name.lower() in excluded:
+                continue
+            excluded.add(name.lower())
+            results.append({"industry": company_industry, "name": name, "description": description})
+        return results[:limit]
+
+    def add_suggestions(self, industry: str, companies: List[Dict[str, Any]]) -> int:
+        """Grow the catalog from LLM suggestions; companies already present only get their counter bumped"""
+        added = 0
+        now = time.time()
+        for company in companies:
+            name = (company.get('name') or '').strip()
+            description = (company.get('description') or '').strip()
+            if not name or not description:
+                continue
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO benchmark_companies (industry, name, description, tags, source, created_at) "
+                "VALUES (?, ?, ?, '[]', 'generated', ?)",
+                (industry, name, description, now)
+            )
+            added += cursor.rowcount
+            self.conn.execute(
+                "UPDATE benchmark_companies SET times_suggested = times_suggested + 1 WHERE industry = ? AND name = ?",
+                (industry, name)
+            )
+        with self._lock:
+            self._stats["added"] += added
+        if added:
+            print(f"BENCHMARK CATALOG: added {added} companies to {industry}")
+        return added
+
+    def record_selection(self, industry: str, name: str):
+        self.conn.execute(
+            "UPDATE benchmark_companies SET times_selected = times_selected + 1 WHERE industry = ? AND name = ?",
+            (industry, name)
+        )
+
+    def record_mode(self, mode: str):
+        """Count how a benchmark list was produced: rerank, generate or catalog_only"""
+        with self._lock:
+            self._stats["modes"][mode] = self._stats["modes"].get(mode, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            retrievals = self._stats["retrievals"]
+            by_source: Dict[str, int] = {}
+            for company in self._companies.values():
+                by_source[company["source"]] = by_source.get(company["source"], 0) + 1
+            return {
+                "companies": len(self._companies),
+                "by_source": by_source,
+                "retrievals": retrievals,
+                "avg_retrieval_ms": round(1000 * self._stats["retrieval_time"] / retrievals, 2) if retrievals else 0.0,
+                "added": self._stats["added"],
+                "modes": dict(self._stats["modes"])
+            }
+
+
+_shared_catalogs: Dict[str, BenchmarkCatalog] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_catalog(path: str = session_store.DB_PATH) -> BenchmarkCatalog:
+    """One catalog (and index) per database file for the whole process"""
+    with _shared_lock:
+        catalog = _shared_catalogs.get(path)
+        if catalog is None:
+            catalog = BenchmarkCatalog(session_store.connect(path))
+            _shared_catalogs[path] = catalog
+        return catalog
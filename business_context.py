@@ -0,0 +1,127 @@
+"""
+Incrementally maintained prompt context for a business session.
+
+Several agents send the model the same blocks of text: "Industry + confirmed
+TIC summaries", every TIC summary, and the brainstorming Q&A so far. A
+ContextBuilder renders each TIC line and each Q&A pair once and caches the
+assembled blocks. Writers call invalidate_tic / invalidate_answer for the
+pieces they change, which drops only those lines and the blocks built from
+them.
+
+The builder is bound to one business_state dict. When the session's state is
+replaced (new or loaded session, or a save that merged another tab's edits)
+it is a different object and everything is rebuilt on the next read.
+
+version increases on every invalidation, so callers and caches can key on
+(session, version) instead of hashing the rendered text.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ContextBuilder:
+    def __init__(self, tic_sequence: List[str], display_names: Dict[str, str]):
+        self.tic_sequence = list(tic_sequence)
+        self.display_names = dict(display_names)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        # tic -> (line if confirmed with a summary, line if it has any summary)
+        self._tic_lines: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        # answer key -> "Qn: ...\nAn: ...\n\n"
+        self._qa_lines: Dict[str, str] = {}
+        self._blocks: Dict[Any, str] = {}
+        self._stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    def bind(self, state: Dict[str, Any]):
+        """Point the builder at the session's current business_state"""
+        with self._lock:
+            if state is not self._state:
+                self._state = state
+                self._reset()
+
+    def _reset(self):
+        self._tic_lines.clear()
+        self._qa_lines.clear()
+        self._blocks.clear()
+        self.version += 1
+        self._stats["invalidations"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    def invalidate_tic(self, tic_name: str):
+        """A TIC's status or summary changed"""
+        with self._lock:
+            self._tic_lines.pop(tic_name, None)
+            for key in [key for key in self._blocks if key[0] in ("business", "tics")]:
+                del self._blocks[key]
+            self.version += 1
+            self._stats["invalidations"] += 1
+
+    def invalidate_answer(self, question_index: int):
+        """A brainstorming answer was recorded or changed"""
+        with self._lock:
+            self._qa_lines.pop(str(question_index), None)
+            for key in [key for key in self._blocks if key[0] == "qa"]:
+                del self._blocks[key]
+            self.version += 1
+            self._stats["invalidations"] += 1
+
+    def _tic_line(self, tic_name: str) -> Tuple[Optional[str], Optional[str]]:
+        lines = self._tic_lines.get(tic_name)
+        if lines is None:
+            tic_data = self._state['tic_progress'].get(tic_name) or {}
+            summary = tic_data.get('summary')
+            line = f"{self.display_names.get(tic_name, tic_name)}: {summary}\n" if summary else None
+            lines = (line if tic_data.get('status') == 'confirmed' else None, line)
+            self._tic_lines[tic_name] = lines
+        return lines
+
+    def _block(self, key: Any, render) -> str:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._stats["hits"] += 1
+                return block
+            block = render()
+            self._blocks[key] = block
+            self._stats["builds"] += 1
+            return block
+
+    def business_context(self) -> str:
+        """Industry line followed by the confirmed TIC summaries"""
+        industry = self._state['industry']
+        return self._block(("business", industry), lambda: f"Industry: {industry}\n" + "".join(
+            self._tic_line(tic)[0] or "" for tic in self.tic_sequence
+        ))
+
+    def tic_context(self) -> str:
+        """Every TIC that has a summary, confirmed or not"""
+        return self._block(("tics",), lambda: "".join(
+            self._tic_line(tic)[1] or "" for tic in self.tic_sequence
+        ))
+
+    def qa_context(self, completed_count: int) -> str:
+        """Previous brainstorming questions and answers, up to completed_count"""
+        def render() -> str:
+            answers = self._state.get('brainstorming_progress', {}).get('answers', {})
+            parts = ["\nPrevious Questions & Answers:\n"]
+            for i in range(completed_count):
+                key = str(i)
+                if key not in answers:
+                    continue
+                line = self._qa_lines.get(key)
+                if line is None:
+                    qa = answers[key]
+                    line = f"Q{i+1}: {qa.get('question', 'Unknown')}\nA{i+1}: {qa.get('answer', 'No answer')}\n\n"
+                    self._qa_lines[key] = line
+                parts.append(line)
+            return "".join(parts)
+        return self._block(("qa", completed_count), render)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "version": self.version, "blocks": len(self._blocks)}
@@ -0,0 +1,244 @@
+"""
+Per-session LLM token and cost accounting, with budgets.
+
+The gateway reports the usage of every completed call to a CostLedger. Each
+report carries the session (llm_gateway.call_scope), the session's phase at the
+start of the script run (llm_gateway.call_phase) and the call's purpose. It is
+written as one row of the llm_usage table. The ledger also keeps running totals
+in memory: one per session, and one for the current UTC day. Budget checks on
+the request path read only those totals. The day total is re-read from the
+table every DAY_REFRESH seconds and a session's total every SESSION_REFRESH
+seconds, so spend by other replicas counts too.
+
+Budgets live next to the routing config in model_routing.json:
+
+    "budgets": {"session_usd": 1.00, "daily_usd": 50.0, "downgrade_at": 0.8,
+                "downgrade_tier": "fast", "local_exempt": ["evaluation"]}
+
+Once a session or the day reaches downgrade_at of its budget, calls run on
+downgrade_tier. Once a budget is used up, calls are refused with
+BudgetExceeded. That error is an APIUnavailable, so the orchestrator falls back
+to its local paths, the same as it does during an outage. Purposes listed in
+local_exempt have no local path (the evaluation report), so they are only
+downgraded. A budget of 0 means unlimited.
+
+The shipped model_routing.json sets both budgets to 0, so spend is recorded
+but nothing is downgraded or refused. To enforce limits, set session_usd
+and/or daily_usd there, e.g. 1.00 and 50.0. The file is re-read on change.
+Once the daily budget is used up, every session is answered locally until
+the UTC day ends.
+
+    python cost_ledger.py --top 10           # costliest sessions today
+    python cost_ledger.py --session 42       # one session by phase and purpose
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import session_store
+from degraded_mode import APIUnavailable
+
+DEFAULT_BUDGETS = {"session_usd": 0.0, "daily_usd": 0.0, "downgrade_at": 0.8,
+                   "downgrade_tier": None, "local_exempt": ["evaluation"]}
+
+# Seconds between re-reads of today's total from the table
+DAY_REFRESH = 30.0
+
+# Seconds between re-reads of a session's total from the table
+SESSION_REFRESH = 30.0
+
+
+class BudgetExceeded(APIUnavailable):
+    """The session or the day is over its LLM budget; the call was not sent"""
+
+
+def utc_day(timestamp: Optional[float] = None) -> str:
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            phase TEXT,
+            purpose TEXT,
+            model TEXT,
+            tier TEXT,
+            input_tokens INTEGER,
+            cached_tokens INTEGER,
+            output_tokens INTEGER,
+            cost REAL,
+            day TEXT,
+            created_at REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_session ON llm_usage(session_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_day ON llm_usage(day, session_id)")
+
+
+class CostLedger:
+    def __init__(self, conn: sqlite3.Connection, config: Optional[Dict[str, Any]] = None):
+        self.conn = conn
+        ensure_schema(conn)
+        self._lock = threading.Lock()
+        # session_id -> [total, monotonic time it was read from the table]
+        self._sessions: Dict[Any, List[float]] = {}
+        self._day = ""
+        self._day_total = 0.0
+        self._day_checked = 0.0
+        self._stats = {"calls": 0, "downgraded": 0, "refused": 0}
+        self.configure(config or {})
+
+    def configure(self, config: Dict[str, Any]):
+        config = {**DEFAULT_BUDGETS, **config}
+        with self._lock:
+            self.session_budget = float(config["session_usd"] or 0.0)
+            self.daily_budget = float(config["daily_usd"] or 0.0)
+            self.downgrade_at = float(config["downgrade_at"])
+            self.downgrade_tier = config["downgrade_tier"]
+            self.local_exempt = set(config["local_exempt"] or [])
+
+    def record(self, session_id: Any, phase: Optional[str], purpose: str, model: Optional[str],
+               tier: Optional[str], usage: Dict[str, int], cost: float):
+        now = time.time()
+        day = utc_day(now)
+        with self._lock:
+            try:
+                self.conn.execute(
+                    "INSERT INTO llm_usage (session_id, phase, purpose, model, tier, input_tokens, cached_tokens, "
+                    "output_tokens, cost, day, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, phase, purpose, model, tier, usage.get("input_tokens", 0),
+                     usage.get("cached_tokens", 0), usage.get("output_tokens", 0), cost, day, now)
+                )
+            except sqlite3.Error as e:
+                # The call already happened; keep the in-memory totals so budgets still apply
+                print(f"COST LEDGER WRITE FAILED: {str(e)}")
+            self._stats["calls"] += 1
+            if session_id is not None and session_id in self._sessions:
+                self._sessions[session_id][0] += cost
+            if day == self._day:
+                self._day_total += cost
+
+    def session_spend(self, session_id: Any) -> float:
+        if session_id is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            entry = self._sessions.get(session_id)
+            if entry is None or now - entry[1] >= SESSION_REFRESH:
+                spent = self.conn.execute(
+                    "SELECT COALESCE(SUM(cost), 0) FROM llm_usage WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                entry = self._sessions[session_id] = [spent, now]
+            return entry[0]
+
+    def day_spend(self) -> float:
+        day = utc_day()
+        with self._lock:
+            now = time.monotonic()
+            if day != self._day or now - self._day_checked >= DAY_REFRESH:
+                self._day_total = self.conn.execute(
+                    "SELECT COALESCE(SUM(cost), 0) FROM llm_usage WHERE day = ?", (day,)
+                ).fetchone()[0]
+                self._day = day
+                self._day_checked = now
+            return self._day_total
+
+    def decision(self, session_id: Any) -> str:
+        """'ok', 'downgrade' or 'local' for the next call of this session"""
+        used = 0.0
+        if self.session_budget:
+            used = self.session_spend(session_id) / self.session_budget
+        if self.daily_budget:
+            used = max(used, self.day_spend() / self.daily_budget)
+        if used >= 1.0:
+            return "local"
+        if used >= self.downgrade_at:
+            return "downgrade"
+        return "ok"
+
+    def record_enforcement(self, action: str):
+        """Count a call that was downgraded or refused"""
+        with self._lock:
+            self._stats[action] += 1
+
+    def breakdown(self, session_id: Any) -> List[Dict[str, Any]]:
+        """A session's usage by phase and purpose, costliest first"""
+        rows = self.conn.execute(
+            "SELECT phase, purpose, COUNT(*), SUM(input_tokens), SUM(cached_tokens), SUM(output_tokens), SUM(cost) "
+            "FROM llm_usage WHERE session_id = ? GROUP BY phase, purpose ORDER BY SUM(cost) DESC",
+            (session_id,)
+        ).fetchall()
+        return [
+            {"phase": phase, "purpose": purpose, "calls": calls, "input_tokens": input_tokens,
+             "cached_tokens": cached_tokens, "output_tokens": output_tokens, "cost": round(cost, 6)}
+            for phase, purpose, calls, input_tokens, cached_tokens, output_tokens, cost in rows
+        ]
+
+    def top_sessions(self, day: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Costliest sessions of a UTC day (default today)"""
+        rows = self.conn.execute(
+            "SELECT session_id, COUNT(*), SUM(input_tokens + output_tokens), SUM(cost) FROM llm_usage "
+            "WHERE day = ? GROUP BY session_id ORDER BY SUM(cost) DESC LIMIT ?",
+            (day or utc_day(), limit)
+        ).fetchall()
+        return [{"session_id": session_id, "calls": calls, "tokens": tokens, "cost": round(cost, 6)}
+                for session_id, calls, tokens, cost in rows]
+
+    def snapshot(self) -> Dict[str, Any]:
+        today = self.day_spend()
+        with self._lock:
+            return {
+                **self._stats,
+                "today": round(today, 6),
+                "session_budget": self.session_budget,
+                "daily_budget": self.daily_budget,
+                "downgrade_tier": self.downgrade_tier
+            }
+
+
+_shared_ledgers: Dict[str, CostLedger] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_ledger(path: str = session_store.DB_PATH) -> CostLedger:
+    """One ledger per database file for the whole process"""
+    with _shared_lock:
+        ledger = _shared_ledgers.get(path)
+        if ledger is None:
+            ledger = CostLedger(session_store.connect(path))
+            _shared_ledgers[path] = ledger
+        return ledger
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="LLM token and cost accounting")
+    parser.add_argument("--db", default=session_store.DB_PATH)
+    parser.add_argument("--day", default=None, help="UTC day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--top", type=int, default=10, help="Costliest sessions to list")
+    parser.add_argument("--session", type=int, default=None, help="Break one session down by phase and purpose")
+    args = parser.parse_args()
+
+    ledger = CostLedger(session_store.connect(args.db))
+    if args.session is not None:
+        report = {"session_id": args.session, "cost": round(ledger.session_spend(args.session), 6),
+                  "breakdown": ledger.breakdown(args.session)}
+    else:
+        day = args.day or utc_day()
+        by_purpose = ledger.conn.execute(
+            "SELECT purpose, COUNT(*), SUM(cost) FROM llm_usage WHERE day = ? GROUP BY purpose ORDER BY SUM(cost) DESC",
+            (day,)
+        ).fetchall()
+        report = {
+            "day": day,
+            "total": round(sum(cost for _, _, cost in by_purpose), 6),
+            "by_purpose": {purpose: {"calls": calls, "cost": round(cost, 6)} for purpose, calls, cost in by_purpose},
+            "top_sessions": ledger.top_sessions(day, args.top)
+        }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,214 @@
+"""
+Offline degraded mode: API health tracking and deferred LLM jobs.
+
+APIHealth is a circuit breaker around the provider. Consecutive outage-type
+failures (connection errors, timeouts, 5xx) trip it. While it is open the
+gateway fails calls immediately with APIUnavailable instead of waiting on
+timeouts, and the orchestrator answers from its local engine: deterministic
+TIC questions, local validation, the question bank and catalog benchmark
+suggestions. After a cooldown one probe call is let through; if it succeeds
+the API is healthy again.
+
+Work that needs the model but can wait is queued in the deferred_jobs table
+while degraded: TIC summaries for answers accepted locally, brainstorming
+enrichment, conversation items for locally answered turns, and evaluation
+reports. Jobs run in order, per session, once the API is back (see
+reconcile_deferred_jobs in app.py).
+
+    DEGRADED_MODE=auto   # default: follow the circuit breaker
+    DEGRADED_MODE=on     # always local (demos, outages announced in advance)
+    DEGRADED_MODE=off    # never switch
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Consecutive outage failures that switch to degraded mode
+FAILURE_THRESHOLD = 3
+
+# Seconds between probe calls while degraded
+PROBE_INTERVAL = 30.0
+
+# A job that keeps failing after this many attempts is parked as 'failed'
+MAX_JOB_ATTEMPTS = 5
+
+_OUTAGE_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailableError",
+                  "ConnectionError", "Timeout", "TimeoutError", "ConnectTimeout", "ReadTimeout"}
+
+
+class APIUnavailable(Exception):
+    """The provider is treated as down; the call was not sent"""
+
+
+def is_outage(error: BaseException) -> bool:
+    """Errors that say the provider is unreachable or failing, as opposed to a bad request"""
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return type(error).__name__ in _OUTAGE_ERRORS
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """The call failed because the API is down, whether or not the breaker has tripped yet"""
+    return isinstance(error, APIUnavailable) or is_outage(error)
+
+
+class APIHealth:
+    def __init__(self, mode: str = "auto", failure_threshold: int = FAILURE_THRESHOLD,
+                 probe_interval: float = PROBE_INTERVAL):
+        self._lock = threading.Lock()
+        self.mode = mode
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._failures = 0
+        self._degraded_since: Optional[float] = None
+        self._last_probe = 0.0
+        self._probing = False
+        self._stats = {"trips": 0, "recoveries": 0, "rejected": 0, "last_error": ""}
+
+    @property
+    def degraded(self) -> bool:
+        if self.mode == "on":
+            return True
+        if self.mode == "off":
+            return False
+        with self._lock:
+            return self._degraded_since is not None
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now; while degraded only one probe per interval is"""
+        if self.mode == "on":
+            return False
+        if self.mode == "off":
+            return True
+        with self._lock:
+            if self._degraded_since is None:
+                return True
+            now = time.monotonic()
+            if not self._probing and now - self._last_probe >= self.probe_interval:
+                self._probing = True
+                self._last_probe = now
+                print("API HEALTH: probing provider")
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._degraded_since is not None:
+                print(f"API HEALTH: provider recovered after {time.monotonic() - self._degraded_since:.0f}s")
+                self._degraded_since = None
+                self._stats["recoveries"] += 1
+
+    def release_probe(self):
+        """A call ended without telling us anything about the provider (e.g. its turn was cancelled)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, error: BaseException):
+        if not is_outage(error):
+            # The provider answered (bad request, throttling): it is reachable
+            self.record_success()
+            return
+        with self._lock:
+            self._probing = False
+            self._failures += 1
+            self._stats["last_error"] = f"{type(error).__name__}: {str(error)[:200]}"
+            if self._degraded_since is None and self._failures >= self.failure_threshold:
+                self._degraded_since = time.monotonic()
+                self._last_probe = self._degraded_since
+                self._stats["trips"] += 1
+                print(f"API HEALTH: {self._failures} consecutive failures, switching to degraded mode")
+
+    def snapshot(self) -> Dict[str, Any]:
+        degraded = self.degraded
+        with self._lock:
+            return {
+                **self._stats,
+                "mode": self.mode,
+                "degraded": degraded,
+                "consecutive_failures": self._failures,
+                "degraded_for_s": round(time.monotonic() - self._degraded_since, 1) if self._degraded_since else 0.0
+            }
+
+
+default_health = APIHealth()
+
+
+# ===================================================================
+# DEFERRED JOBS
+# ===================================================================
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS deferred_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            kind TEXT,
+            payload TEXT,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            created_at REAL,
+            completed_at REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deferred_jobs_pending ON deferred_jobs(session_id, status, id)")
+
+
+def enqueue(conn: sqlite3.Connection, session_id: int, kind: str, payload: Dict[str, Any]) -> int:
+    ensure_schema(conn)
+    cursor = conn.execute(
+        "INSERT INTO deferred_jobs (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+        (session_id, kind, json.dumps(payload), time.time())
+    )
+    print(f"DEFERRED JOB QUEUED: {kind} for session {session_id}")
+    return cursor.lastrowid
+
+
+def pending_jobs(conn: sqlite3.Connection, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Pending jobs in queue order, for one session or all"""
+    ensure_schema(conn)
+    query = "SELECT id, session_id, kind, payload, attempts FROM deferred_jobs WHERE status = 'pending'"
+    params: tuple = ()
+    if session_id is not None:
+        query += " AND session_id = ?"
+        params = (session_id,)
+    rows = conn.execute(query + " ORDER BY id", params).fetchall()
+    return [
+        {"id": job_id, "session_id": sid, "kind": kind, "payload": json.loads(payload), "attempts": attempts}
+        for job_id, sid, kind, payload, attempts in rows
+    ]
+
+
+def claim(conn: sqlite3.Connection, job_id: int) -> bool:
+    """Mark a pending job as running; False if another tab or replica got it first"""
+    cursor = conn.execute("UPDATE deferred_jobs SET status = 'running' WHERE id = ? AND status = 'pending'", (job_id,))
+    return cursor.rowcount == 1
+
+
+def complete(conn: sqlite3.Connection, job_id: int):
+    conn.execute("UPDATE deferred_jobs SET status = 'done', completed_at = ? WHERE id = ?", (time.time(), job_id))
+
+
+def fail(conn: sqlite3.Connection, job_id: int, error: str):
+    conn.execute(
+        "UPDATE deferred_jobs SET attempts = attempts + 1, last_error = ?, "
+        "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+        (error[:500], MAX_JOB_ATTEMPTS, job_id)
+    )
+
+
+def job_counts(conn: sqlite3.Connection, session_id: Optional[int] = None) -> Dict[str, int]:
+    ensure_schema(conn)
+    query = "SELECT status, COUNT(*) FROM deferred_jobs"
+    params: tuple = ()
+    if session_id is not None:
+        query += " WHERE session_id = ?"
+        params = (session_id,)
+    return {status: count for status, count in conn.execute(query + " GROUP BY status", params).fetchall()}
@@ -0,0 +1,284 @@
+"""
+Streaming bulk export of sessions, TIC summaries, brainstorming Q&A and
+evaluation reports for analysis.
+
+Rows are read in small keyset-paginated batches over a read-only connection,
+each batch in its own short read transaction, so memory stays constant and
+the app's writers are never blocked (WAL readers don't take write locks, and
+no long-lived snapshot holds back checkpoints). Each session's state is rebuilt
+from its latest state snapshot and event tail (see session_log), with three
+queries per batch. Output is chunked JSONL or CSV,
+optionally gzipped, one file series per table.
+
+Incremental exports: every run records a watermark (the database clock when
+the run started) in manifest.json in the output directory; ``--incremental``
+exports only sessions updated at or after the previous watermark. Rows carry
+the session's state version so consumers can de-duplicate re-exported rows.
+
+    python export_sessions.py --out exports/ --format csv
+    python export_sessions.py --out exports/ --incremental
+"""
+
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import session_log
+from session_store import DB_PATH
+
+TABLES = {
+    "sessions": [
+        "session_id", "version", "name", "industry", "conversation_id", "created_at", "updated_at", "phase",
+        "current_tic", "tics_confirmed", "selected_companies", "brainstorming_completed", "overall_score"
+    ],
+    "tic_summaries": ["session_id", "version", "tic", "status", "summary", "user_response"],
+    "brainstorming_qa": ["session_id", "version", "question_index", "question", "answer"],
+    "evaluations": [
+        "session_id", "version", "overall_score", "market_opportunity", "competitive_advantage",
+        "value_proposition", "sustainability", "execution_feasibility", "recommendation",
+        "detailed_feedback", "report"
+    ],
+}
+
+# evaluation_feedback keys -> export columns
+_CRITERIA = {
+    "Market Opportunity & Growth": "market_opportunity",
+    "USP & Competitive Advantage": "competitive_advantage",
+    "Value Proposition": "value_proposition",
+    "Sustainability": "sustainability",
+    "Execution Feasibility": "execution_feasibility",
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def connect_readonly(path: str = DB_PATH) -> sqlite3.Connection:
+    """Read-only autocommit connection; each query is its own short read transaction"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def iter_sessions(conn: sqlite3.Connection, since: Optional[str] = None,
+                  batch_size: int = 200) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Yield (session row, business_state) one at a time, paging by id"""
+    last_id = 0
+    while True:
+        query = ("SELECT id, name, conversation_id, industry, business_state, created_at, updated_at, version "
+                 "FROM business_sessions WHERE id > ?")
+        params: List[Any] = [last_id]
+        if since:
+            query += " AND COALESCE(updated_at, created_at) >= ?"
+            params.append(since)
+        query += " ORDER BY id LIMIT ?"
+        params.append(batch_size)
+        # fetchall on a bounded page closes the read transaction before we do any work
+        rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return
+        states = _page_states(conn, rows)
+        for session_id, name, conversation_id, industry, _, created_at, updated_at, version in rows:
+            state, version = states.get(session_id, (None, version or 0))
+            yield {
+                "session_id": session_id, "version": version, "name": name, "industry": industry,
+                "conversation_id": conversation_id, "created_at": created_at, "updated_at": updated_at
+            }, state or {}
+        last_id = rows[-1][0]
+
+
+def _page_states(conn: sqlite3.Connection, rows: List[tuple]) -> Dict[int, Tuple[Optional[Dict[str, Any]], int]]:
+    """Current state of a page of sessions: latest snapshot plus event tail"""
+    try:
+        return session_log.load_states(conn, [row[0] for row in rows])
+    except sqlite3.OperationalError:
+        # Database from before the event log (no tables yet; read-only, so they can't be created)
+        states = {}
+        for session_id, _, _, _, state_json, _, _, version in rows:
+            try:
+                states[session_id] = (json.loads(state_json) if state_json else None, version or 0)
+            except json.JSONDecodeError:
+                states[session_id] = (None, version or 0)
+        return states
+
+
+def session_records(session: Dict[str, Any], state: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Flatten one session into (table, record) pairs"""
+    key = {"session_id": session["session_id"], "version": session["version"]}
+    tic_progress = state.get("tic_progress") or {}
+    brainstorming = state.get("brainstorming_progress") or {}
+    report = state.get("evaluation_report") or None
+    overall = ((report or {}).get("evaluation_feedback") or {}).get("overall") or {}
+
+    yield "sessions", {
+        **session,
+        "phase": state.get("phase"),
+        "current_tic": state.get("current_tic"),
+        "tics_confirmed": sum(1 for tic in tic_progress.values() if tic.get("status") == "confirmed"),
+        "selected_companies": state.get("selected_companies") or [],
+        "brainstorming_completed": brainstorming.get("completed_count", 0),
+        "overall_score": overall.get("score")
+    }
+
+    for tic_name, tic in tic_progress.items():
+        yield "tic_summaries", {
+            **key, "tic": tic_name, "status": tic.get("status"),
+            "summary": tic.get("summary"), "user_response": tic.get("user_response")
+        }
+
+    # Answers are keyed by int in memory but by str once round-tripped through JSON
+    for index, qa in sorted((brainstorming.get("answers") or {}).items(), key=lambda item: int(item[0])):
+        yield "brainstorming_qa", {
+            **key, "question_index": int(index), "question": qa.get("question"), "answer": qa.get("answer")
+        }
+
+    if report:
+        feedback = report.get("evaluation_feedback") or {}
+        yield "evaluations", {
+            **key,
+            "overall_score": overall.get("score"),
+            **{column: (feedback.get(criterion) or {}).get("score") for criterion, column in _CRITERIA.items()},
+            "recommendation": report.get("ai_investment_recommendation"),
+            "detailed_feedback": report.get("detailed_feedback"),
+            "report": report
+        }
+
+
+class ChunkedWriter:
+    """Writes one table to numbered files, starting a new file every chunk_rows records"""
+
+    def __init__(self, out_dir: str, prefix: str, columns: List[str], fmt: str,
+                 chunk_rows: int, compress: bool):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.columns = columns
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.compress = compress
+        self.files: List[str] = []
+        self.rows = 0
+        self._file = None
+        self._csv = None
+        self._rows_in_chunk = 0
+
+    def _open(self):
+        self.close()
+        extension = self.fmt + (".gz" if self.compress else "")
+        path = os.path.join(self.out_dir, f"{self.prefix}-{len(self.files) + 1:05d}.{extension}")
+        opener = gzip.open if self.compress else open
+        self._file = opener(path, "wt", newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+            self._csv.writeheader()
+        self.files.append(path)
+        self._rows_in_chunk = 0
+
+    def write(self, record: Dict[str, Any]):
+        if self._file is None or self._rows_in_chunk >= self.chunk_rows:
+            self._open()
+        if self.fmt == "csv":
+            self._csv.writerow({
+                column: ("; ".join(map(str, value)) if isinstance(value, list)
+                         else json.dumps(value) if isinstance(value, dict) else value)
+                for column, value in record.items()
+            })
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._rows_in_chunk += 1
+        self.rows += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _read_manifest(out_dir: str) -> Dict[str, Any]:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"watermark": None, "runs": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def export_sessions(db_path: str = DB_PATH, out_dir: str = "exports", fmt: str = "jsonl",
+                    since: Optional[str] = None, incremental: bool = False, chunk_rows: int = 50000,
+                    batch_size: int = 200, tables: Optional[List[str]] = None,
+                    compress: bool = False) -> Dict[str, Any]:
+    """Stream the selected tables to out_dir and record the run in the manifest"""
+    if fmt not in ("jsonl", "csv"):
+        return {"success": False, "data": {}, "message": f"Unsupported format: {fmt}"}
+    tables = tables or list(TABLES)
+    unknown = [table for table in tables if table not in TABLES]
+    if unknown:
+        return {"success": False, "data": {}, "message": f"Unknown tables: {', '.join(unknown)}"}
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _read_manifest(out_dir)
+    if incremental and since is None:
+        since = manifest.get("watermark")
+
+    conn = connect_readonly(db_path)
+    # Taken from the database clock before reading, so writes during the export land in the next run
+    watermark = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    run_stamp = time.strftime("%Y%m%dT%H%M%S")
+    started = time.perf_counter()
+
+    writers = {
+        table: ChunkedWriter(out_dir, f"{table}-{run_stamp}", TABLES[table], fmt, chunk_rows, compress)
+        for table in tables
+    }
+    sessions = 0
+    try:
+        for session, state in iter_sessions(conn, since, batch_size):
+            sessions += 1
+            for table, record in session_records(session, state):
+                if table in writers:
+                    writers[table].write(record)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        conn.close()
+
+    run = {
+        "run": run_stamp,
+        "since": since,
+        "watermark": watermark,
+        "format": fmt,
+        "sessions": sessions,
+        "rows": {table: writer.rows for table, writer in writers.items()},
+        "files": [os.path.basename(path) for writer in writers.values() for path in writer.files],
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+    manifest["watermark"] = watermark
+    manifest["runs"].append(run)
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"EXPORT COMPLETE: {sessions} sessions, {run['rows']} in {run['seconds']}s")
+    return {"success": True, "data": run, "message": f"Exported {sessions} sessions"}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream sessions and reports to chunked JSONL/CSV")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", default="exports", help="Output directory (holds manifest.json)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--since", default=None, help="Only sessions updated at/after 'YYYY-MM-DD HH:MM:SS' (UTC)")
+    parser.add_argument("--incremental", action="store_true", help="Continue from the previous run's watermark")
+    parser.add_argument("--tables", nargs="*", default=None, choices=list(TABLES))
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    result = export_sessions(args.db, args.out, args.format, args.since, args.incremental,
+                             args.chunk_rows, args.batch_size, args.tables, args.gzip)
+    print(json.dumps(result, indent=2))
+    raise SystemExit(0 if result["success"] else 1)
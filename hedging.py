@@ -0,0 +1,151 @@
+"""
+Hedged requests for tail-latency-critical LLM calls.
+
+Routes opt in with ``"hedge": true`` in model_routing.json. For those
+purposes the gateway starts the call as usual, and if it has not answered
+after the purpose's observed p95 latency it sends one duplicate. The first
+response to arrive is used. The other call is abandoned: the synchronous SDK
+cannot abort a request in flight, so it finishes on its own thread and its
+result is dropped. Only calls without server-side effects (no
+``conversation``) are hedged.
+
+Extra requests are capped by a budget: hedges may not exceed ``budget`` (a
+fraction) of calls per purpose, plus a small burst. The p95 is taken over a
+sliding window of recent latencies, and no hedge is sent until
+``min_samples`` have been seen. Hedges sent, won and skipped are counted per
+purpose.
+
+    "hedging": {"budget": 0.05, "min_samples": 20, "min_delay_ms": 150}
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from turn_control import POLL_INTERVAL, submit
+
+DEFAULT_HEDGING = {"budget": 0.05, "min_samples": 20, "min_delay_ms": 150, "window": 200, "burst": 2}
+
+
+class HedgePolicy:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.configure(config or {})
+
+    def configure(self, config: Dict[str, Any]):
+        config = {**DEFAULT_HEDGING, **config}
+        with self._lock:
+            self.budget = float(config["budget"])
+            self.min_samples = int(config["min_samples"])
+            self.min_delay = float(config["min_delay_ms"]) / 1000.0
+            self.window = int(config["window"])
+            self.burst = int(config["burst"])
+
+    def _entry(self, purpose: str) -> Dict[str, int]:
+        return self._stats.setdefault(purpose, {
+            "calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0,
+            "skipped_budget": 0, "skipped_rate_limit": 0
+        })
+
+    def observe(self, purpose: str, latency: float):
+        """Latency of a completed call, as seen by the caller"""
+        with self._lock:
+            samples = self._latencies.get(purpose)
+            if samples is None or samples.maxlen != self.window:
+                samples = deque(samples or (), maxlen=self.window)
+                self._latencies[purpose] = samples
+            samples.append(latency)
+
+    def delay(self, purpose: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history"""
+        with self._lock:
+            samples = self._latencies.get(purpose)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+            p95 = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+            return max(p95, self.min_delay)
+
+    def try_hedge(self, purpose: str) -> bool:
+        """Take one unit of hedge budget for this purpose"""
+        with self._lock:
+            stats = self._entry(purpose)
+            if stats["hedged"] + 1 > self.budget * stats["calls"] + self.burst:
+                stats["skipped_budget"] += 1
+                return False
+            stats["hedged"] += 1
+            return True
+
+    def record(self, purpose: str, field: str):
+        with self._lock:
+            self._entry(purpose)[field] += 1
+
+    def call(self, purpose: str, send: Callable[[], Any], acquire_hedge: Callable[[], bool],
+             check: Optional[Callable[[], None]] = None) -> Any:
+        """
+        Run send(), hedging with a second send() after the purpose's p95. acquire_hedge admits the
+        duplicate (rate limiter) and returns False to skip it; check() raises to abandon both calls.
+        """
+        self.record(purpose, "calls")
+        delay = self.delay(purpose)
+        primary = submit(send, name=f"hedge-{purpose}-primary")
+        if delay is None or not _wait_for([primary], delay, check):
+            if delay is not None and self.try_hedge(purpose):
+                if acquire_hedge():
+                    print(f"LLM HEDGE [{purpose}]: no answer after {delay*1000:.0f} ms, sending a duplicate")
+                    hedge = submit(send, name=f"hedge-{purpose}-duplicate")
+                    return self._first_result(purpose, primary, hedge, check)
+                with self._lock:
+                    stats = self._entry(purpose)
+                    stats["hedged"] -= 1
+                    stats["skipped_rate_limit"] += 1
+            _wait_for([primary], None, check)
+        return primary.result()
+
+    def _first_result(self, purpose: str, primary: Future, hedge: Future,
+                      check: Optional[Callable[[], None]]) -> Any:
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            _wait_for(list(pending), None, check)
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                if future.exception() is None:
+                    self.record(purpose, "hedge_wins" if future is hedge else "primary_wins")
+                    return future.result()
+                error = error or future.exception()
+        # Both failed: surface the first error
+        raise error
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for purpose, stats in self._stats.items():
+                decided = stats["hedge_wins"] + stats["primary_wins"]
+                result[purpose] = {
+                    **stats,
+                    "hedge_rate": round(stats["hedged"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                    "hedge_win_rate": round(stats["hedge_wins"] / decided, 3) if decided else None
+                }
+            return result
+
+
+def _wait_for(futures, timeout: Optional[float], check: Optional[Callable[[], None]]) -> bool:
+    """Wait until any future is done (True) or timeout passes (False), polling check() meanwhile"""
+    waited = 0.0
+    while True:
+        step = POLL_INTERVAL if timeout is None else min(POLL_INTERVAL, max(timeout - waited, 0.0))
+        done, _ = wait(futures, timeout=step, return_when=FIRST_COMPLETED)
+        if done:
+            return True
+        if check is not None:
+            check()
+        waited += step
+        if timeout is not None and waited >= timeout:
+            return False
+
+
+default_policy = HedgePolicy()
@@ -0,0 +1,140 @@
+"""
+Local semantic cache for help answers ("what is TAM?", "what's a USP?").
+
+Help answers are stored in SQLite, keyed by a scope (the current TIC or
+brainstorming focus area), and indexed in memory with TF-IDF vectors over
+word unigrams and bigrams. A new question whose cosine similarity to a
+stored one clears the threshold is answered from the cache without an LLM
+call. Everything runs locally; no embeddings service is involved.
+
+Cached answers are served to every founder, so the app stores a context-free
+answer generated from the topic and the question alone, never the reply a
+founder got in their own conversation.
+
+Rows written by other sessions or replicas are picked up by id on the next
+lookup; the index recomputes IDF weights only when the corpus changed.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import session_store
+from text_index import TfidfIndex, tokenize
+
+DEFAULT_THRESHOLD = 0.82
+
+_QUESTION_STARTS = (
+    "what", "how", "why", "which", "who", "can you", "could you", "explain", "i don't understand",
+    "i dont understand", "not sure what", "what do you mean", "meaning of", "define"
+)
+
+
+def looks_like_question(text: str) -> bool:
+    """Cheap check so the cache is only consulted for help requests, never for real answers"""
+    text = text.strip().lower()
+    if not text or len(text) > 300:
+        return False
+    return text.endswith("?") or text.startswith(_QUESTION_STARTS)
+
+
+class HelpAnswerCache:
+    def __init__(self, conn: sqlite3.Connection, threshold: float = DEFAULT_THRESHOLD):
+        self.conn = conn
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._last_id = 0
+        # id -> {"scope", "question", "answer"}; questions are indexed with the scope as partition
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._index = TfidfIndex()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0}
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS help_answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT,
+                question TEXT,
+                answer TEXT,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_help_answers_scope ON help_answers(scope)")
+
+    def _refresh(self):
+        rows = self.conn.execute(
+            "SELECT id, scope, question, answer FROM help_answers WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for entry_id, scope, question, answer in rows:
+            self._entries[entry_id] = {"scope": scope, "question": question, "answer": answer}
+            self._index.add(entry_id, question, partition=scope)
+            self._last_id = entry_id
+
+    def _best_match(self, scope: str, question: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        matches = self._index.search(question, partitions=[scope], limit=1)
+        if not matches:
+            return None
+        entry_id, score = matches[0]
+        return {"id": entry_id, "score": score, **self._entries[entry_id]}
+
+    def lookup(self, scope: str, question: str) -> Optional[Dict[str, Any]]:
+        """Return {"answer", "question", "score"} for a similar enough cached question, else None"""
+        started = time.perf_counter()
+        with self._lock:
+            match = self._best_match(scope, question)
+            if match is None or match["score"] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        self.conn.execute("UPDATE help_answers SET hits = hits + 1 WHERE id = ?", (match["id"],))
+        print(f"HELP CACHE HIT [{scope}]: {match['score']:.2f} ~ '{match['question'][:60]}' "
+              f"({1000 * (time.perf_counter() - started):.1f} ms)")
+        return {"answer": match["answer"], "question": match["question"], "score": round(match["score"], 3)}
+
+    def add(self, scope: str, question: str, answer: str) -> bool:
+        """Store a freshly generated help answer unless a near-duplicate is already cached"""
+        question, answer = question.strip(), (answer or "").strip()
+        if not question or not answer or not tokenize(question):
+            return False
+        with self._lock:
+            match = self._best_match(scope, question)
+            if match is not None and match["score"] >= self.threshold:
+                return False
+            try:
+                self.conn.execute(
+                    "INSERT INTO help_answers (scope, question, answer, created_at) VALUES (?, ?, ?, ?)",
+                    (scope, question, answer, time.time())
+                )
+            except sqlite3.Error as e:
+                # Caching is best effort; the user already has their answer
+                print(f"HELP CACHE STORE FAILED: {str(e)}")
+                return False
+            self._stats["stored"] += 1
+        print(f"HELP CACHE STORED [{scope}]: '{question[:60]}'")
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0
+            }
+
+
+_shared_caches: Dict[str, HelpAnswerCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(path: str = session_store.DB_PATH, threshold: float = DEFAULT_THRESHOLD) -> HelpAnswerCache:
+    """One cache (and index) per database file for the whole process, not per Streamlit rerun"""
+    with _shared_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = HelpAnswerCache(session_store.connect(path), threshold)
+            _shared_caches[path] = cache
+        cache.threshold = threshold
+        return cache
@@ -0,0 +1,260 @@
+"""
+Record/replay of OpenAI client interactions ("cassettes").
+
+Wrap the OpenAI client once at startup. In ``record`` mode every call made
+through it (responses, chat completions, conversations and their items) is
+passed through and appended, with its latency, to a JSONL cassette per
+session (the gateway's call_scope). In ``replay`` mode nothing touches the
+network: each call is matched to a recorded one by endpoint and a hash of its
+arguments and answered from the cassette, optionally sleeping for the
+recorded latency so profiles of AgentOrchestrator look like production.
+
+    LLM_CASSETTE_MODE=record  streamlit run app.py   # capture a session
+    LLM_CASSETTE_MODE=replay  streamlit run app.py   # rerun it offline
+
+Copy the production sessions database alongside the cassettes so session
+ids and conversation ids line up.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, Optional
+
+from llm_gateway import call_scope
+
+CASSETTE_DIR = 'cassettes'
+
+# Endpoints captured; anything else on the client passes straight through
+ENDPOINTS = {
+    "responses.create",
+    "chat.completions.create",
+    "conversations.create",
+    "conversations.retrieve",
+    "conversations.items.create",
+    "conversations.items.list",
+}
+
+
+class CassetteMiss(Exception):
+    """Replay found no recorded interaction for a call"""
+
+
+class ReplayedAPIError(Exception):
+    """An API error recorded in the cassette, raised again on replay"""
+
+    def __init__(self, message: str, error_type: str, status_code: Optional[int]):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, '__dict__'):
+        return {k: _jsonable(v) for k, v in vars(value).items() if not k.startswith('_')}
+    return repr(value)
+
+
+def request_hash(endpoint: str, kwargs: Dict[str, Any]) -> str:
+    canonical = json.dumps({"endpoint": endpoint, "kwargs": _jsonable(kwargs)}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_namespace(value: Any) -> Any:
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _rebuild(type_path: Optional[str], data: Any) -> Any:
+    """Recreate the SDK object (so properties like output_text work), else an attribute namespace"""
+    if type_path and isinstance(data, dict):
+        module_name, _, class_name = type_path.rpartition(".")
+        try:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            if hasattr(cls, "model_validate"):
+                rebuilt = cls.model_validate(data)
+                # Generic list pages validate their items as plain dicts; those need the namespace form
+                items = getattr(rebuilt, "data", None)
+                if not (isinstance(items, list) and items and isinstance(items[0], dict)):
+                    return rebuilt
+        except Exception:
+            pass
+    return _to_namespace(data)
+
+
+class Cassette:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._seq = 0
+        # (endpoint, request hash) -> queued interactions; endpoint -> queue for sequence matching
+        self._by_hash: Dict[Any, Deque[Dict[str, Any]]] = {}
+        self._by_endpoint: Dict[str, Deque[Dict[str, Any]]] = {}
+
+    def append(self, interaction: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            interaction = {"seq": self._seq, **interaction}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(interaction) + "\n")
+
+    def _load(self):
+        if self._loaded:
+            return
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    interaction = json.loads(line)
+                    interaction["used"] = False
+                    self._by_hash.setdefault((interaction["endpoint"], interaction["hash"]), deque()).append(interaction)
+                    self._by_endpoint.setdefault(interaction["endpoint"], deque()).append(interaction)
+        self._loaded = True
+
+    def take(self, endpoint: str, digest: str, match: str) -> Dict[str, Any]:
+        """Next unused interaction with the same arguments (or, with match=sequence, the same endpoint)"""
+        with self._lock:
+            self._load()
+            queue = self._by_hash.get((endpoint, digest))
+            while queue and queue[0]["used"]:
+                queue.popleft()
+            if not queue and match == "sequence":
+                queue = self._by_endpoint.get(endpoint)
+                while queue and queue[0]["used"]:
+                    queue.popleft()
+            if not queue:
+                raise CassetteMiss(f"No recorded {endpoint} call matches in {self.path}")
+            interaction = queue.popleft()
+            interaction["used"] = True
+            return interaction
+
+
+class CassetteRecorder:
+    """Shared state for a wrapped client: mode, cassette files and counters"""
+
+    def __init__(self, mode: str, directory: str = CASSETTE_DIR, match: str = "hash", realtime: float = 0.0):
+        self.mode = mode
+        self.directory = directory
+        self.match = match
+        # Replay sleeps recorded latency * realtime (0 = as fast as possible)
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        self._cassettes: Dict[str, Cassette] = {}
+        self._stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    def cassette(self) -> Cassette:
+        scope = call_scope.get()
+        name = f"session-{scope}.jsonl" if scope is not None else "unscoped.jsonl"
+        with self._lock:
+            cassette = self._cassettes.get(name)
+            if cassette is None:
+                cassette = Cassette(os.path.join(self.directory, name))
+                self._cassettes[name] = cassette
+            return cassette
+
+    def call(self, endpoint: str, method: Any, kwargs: Dict[str, Any]) -> Any:
+        digest = request_hash(endpoint, kwargs)
+        if self.mode == "replay":
+            return self._replay(endpoint, digest)
+
+        started = time.perf_counter()
+        try:
+            result = method(**kwargs)
+        except Exception as e:
+            self.cassette().append({
+                "endpoint": endpoint, "hash": digest, "request": _jsonable(kwargs),
+                "elapsed": round(time.perf_counter() - started, 4),
+                "error": {"type": type(e).__name__, "message": str(e), "status_code": getattr(e, "status_code", None)}
+            })
+            raise
+        self.cassette().append({
+            "endpoint": endpoint, "hash": digest, "request": _jsonable(kwargs),
+            "elapsed": round(time.perf_counter() - started, 4),
+            "response_type": f"{type(result).__module__}.{type(result).__qualname__}",
+            "response": _jsonable(result)
+        })
+        with self._lock:
+            self._stats["recorded"] += 1
+        return result
+
+    def _replay(self, endpoint: str, digest: str) -> Any:
+        try:
+            interaction = self.cassette().take(endpoint, digest, self.match)
+        except CassetteMiss:
+            with self._lock:
+                self._stats["misses"] += 1
+            raise
+        if self.realtime:
+            time.sleep(interaction.get("elapsed", 0.0) * self.realtime)
+        with self._lock:
+            self._stats["replayed"] += 1
+        if interaction.get("error"):
+            error = interaction["error"]
+            raise ReplayedAPIError(error["message"], error["type"], error.get("status_code"))
+        return _rebuild(interaction.get("response_type"), interaction["response"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, **self._stats, "cassettes": len(self._cassettes)}
+
+
+class _ClientProxy:
+    """Mirrors the client's attribute tree; endpoint methods go through the recorder"""
+
+    def __init__(self, target: Any, recorder: CassetteRecorder, path: str = ""):
+        self._target = target
+        self._recorder = recorder
+        self._path = path
+
+    def __getattr__(self, name: str) -> Any:
+        path = f"{self._path}.{name}" if self._path else name
+        attribute = getattr(self._target, name) if self._target is not None else None
+        if path in ENDPOINTS:
+            return lambda **kwargs: self._recorder.call(path, attribute, kwargs)
+        if any(endpoint.startswith(path + ".") for endpoint in ENDPOINTS):
+            return _ClientProxy(attribute, self._recorder, path)
+        if attribute is None:
+            raise AttributeError(f"{path} is not available in replay mode")
+        return attribute
+
+
+_recorders: Dict[Any, CassetteRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def wrap_client(client: Any, mode: str = "off", directory: str = CASSETTE_DIR,
+                match: str = "hash", realtime: float = 0.0) -> Any:
+    """Return the client unchanged (off) or a recording/replaying proxy; client may be None for replay.
+    The recorder is shared process-wide so replay position survives Streamlit reruns."""
+    if mode not in ("record", "replay"):
+        return client
+    with _recorders_lock:
+        recorder = _recorders.get((mode, directory))
+        if recorder is None:
+            recorder = CassetteRecorder(mode, directory, match, realtime)
+            _recorders[(mode, directory)] = recorder
+            print(f"LLM CASSETTES: {mode} mode, directory {directory}")
+        recorder.match = match
+        recorder.realtime = realtime
+    proxy = _ClientProxy(client, recorder)
+    proxy.cassette_recorder = recorder
+    return proxy
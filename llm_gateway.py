@@ -0,0 +1,488 @@
+"""
+Single entry point for outbound LLM calls.
+
+Every call site goes through LLMGateway with a ``purpose`` label (tic_turn,
+completeness, question_gen, ...). The gateway times each call and records the
+provider-reported usage, including ``cached_tokens``, so prompt-cache hit rates
+and latency can be compared per call site.
+
+Models are not chosen at call sites. Each purpose maps to a list of tiers in
+``model_routing.json``; calls start on the first tier and the ``*_parsed``
+methods escalate to the next tier on parse failure or low confidence when the
+route allows it.
+
+Before sending, each call is admitted by the process-wide rate limiter using
+the route's priority class (interactive, enrichment, background) and a token
+estimate that is settled against real usage afterwards. Identical requests
+issued concurrently within the same call scope (a session) are coalesced into
+one provider call whose response is shared.
+
+Routes marked ``"hedge": true`` send a duplicate request when a call runs
+past that purpose's observed p95 latency and use whichever answers first
+(see hedging.py).
+
+Provider outages trip a circuit breaker (degraded_mode.APIHealth). While it
+is open, calls fail immediately with APIUnavailable so callers can take their
+local paths instead of waiting on timeouts.
+
+With a CostLedger attached, the usage of every call is booked against its
+session, phase and purpose. Sessions or days that reach their budget are moved
+to a cheaper tier, then refused with BudgetExceeded (see cost_ledger.py).
+
+Calls made inside a turn (turn_control.current_turn) respect its deadline and
+cancellation: queueing is capped at the time left, and a cancelled turn stops
+waiting for the provider immediately.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from cost_ledger import BudgetExceeded, CostLedger
+from degraded_mode import APIHealth, APIUnavailable, default_health
+from hedging import HedgePolicy, default_policy as default_hedge_policy
+from rate_limiter import DEFAULT_MAX_WAIT, PRIORITIES, RateLimiter, default_limiter, estimate_tokens
+from single_flight import SingleFlight, default_group
+from turn_control import TurnCancelled, current_turn
+
+# Scope (e.g. session id) for single-flight deduplication, set once per script run/thread
+call_scope: contextvars.ContextVar = contextvars.ContextVar('llm_call_scope', default=None)
+
+# Purpose of the request being sent, visible to client wrappers (cassettes, load-test stubs)
+call_purpose: contextvars.ContextVar = contextvars.ContextVar('llm_call_purpose', default=None)
+
+# Session phase (tic_collection, brainstorming, ...) that calls are booked under in the cost ledger
+call_phase: contextvars.ContextVar = contextvars.ContextVar('llm_call_phase', default=None)
+
+ROUTING_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_routing.json')
+
+# Used when no routing file is present: every purpose on a single mid-size tier
+DEFAULT_ROUTING = {
+    "tiers": {
+        "standard": {"model": "gpt-4.1", "input_cost_per_1m": 2.00, "cached_input_cost_per_1m": 0.50, "output_cost_per_1m": 8.00}
+    },
+    "routes": {
+        "default": {"tiers": ["standard"]}
+    }
+}
+
+ESCALATION_REASONS = {"parse_failure", "low_confidence"}
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """Normalize usage from Responses API or Chat Completions objects"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {"input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+
+    # Responses API: input_tokens / input_tokens_details.cached_tokens
+    input_tokens = getattr(usage, 'input_tokens', None)
+    if input_tokens is not None:
+        details = getattr(usage, 'input_tokens_details', None)
+        return {
+            "input_tokens": input_tokens or 0,
+            "cached_tokens": (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+            "output_tokens": getattr(usage, 'output_tokens', 0) or 0
+        }
+
+    # Chat Completions: prompt_tokens / prompt_tokens_details.cached_tokens
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        "input_tokens": getattr(usage, 'prompt_tokens', 0) or 0,
+        "cached_tokens": (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+        "output_tokens": getattr(usage, 'completion_tokens', 0) or 0
+    }
+
+
+class Tier:
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.model = config["model"]
+        self.input_cost = float(config.get("input_cost_per_1m", 0.0))
+        self.cached_input_cost = float(config.get("cached_input_cost_per_1m", self.input_cost))
+        self.output_cost = float(config.get("output_cost_per_1m", 0.0))
+
+    def cost(self, usage: Dict[str, int]) -> float:
+        """USD cost of one call given its normalized usage"""
+        cached = usage.get("cached_tokens", 0)
+        uncached = max(usage.get("input_tokens", 0) - cached, 0)
+        return (uncached * self.input_cost + cached * self.cached_input_cost
+                + usage.get("output_tokens", 0) * self.output_cost) / 1_000_000
+
+
+class Route:
+    def __init__(self, purpose: str, tiers: List[Tier], escalate_on: List[str], min_confidence: float,
+                 priority: str = "interactive", hedge: bool = False):
+        self.purpose = purpose
+        self.tiers = tiers
+        self.escalate_on = set(escalate_on)
+        self.min_confidence = min_confidence
+        self.priority = priority
+        self.hedge = hedge
+
+
+class ModelRouter:
+    """Maps each call purpose to an ordered list of model tiers"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.tiers = {name: Tier(name, tier_config) for name, tier_config in config["tiers"].items()}
+        self.routes: Dict[str, Route] = {}
+        for purpose, route_config in config["routes"].items():
+            unknown = set(route_config.get("escalate_on", [])) - ESCALATION_REASONS
+            if unknown:
+                raise ValueError(f"Route '{purpose}' has unknown escalation reasons: {sorted(unknown)}")
+            priority = route_config.get("priority", "interactive")
+            if priority not in PRIORITIES:
+                raise ValueError(f"Route '{purpose}' has unknown priority: {priority}")
+            self.routes[purpose] = Route(
+                purpose,
+                [self.tiers[name] for name in route_config["tiers"]],
+                route_config.get("escalate_on", []),
+                float(route_config.get("min_confidence", 0.0)),
+                priority,
+                bool(route_config.get("hedge", False))
+            )
+        if "default" not in self.routes:
+            first_tier = next(iter(self.tiers.values()))
+            self.routes["default"] = Route("default", [first_tier], [], 0.0)
+        self.rate_limits = config.get("rate_limits", {})
+        self.hedging = config.get("hedging", {})
+        self.budgets = config.get("budgets", {})
+
+    def route(self, purpose: str) -> Route:
+        return self.routes.get(purpose) or self.routes["default"]
+
+    def tier_for_model(self, model: Optional[str]) -> Optional[Tier]:
+        for tier in self.tiers.values():
+            if tier.model == model:
+                return tier
+        return None
+
+
+_router_cache: Dict[str, Any] = {}
+_router_lock = threading.Lock()
+
+
+def load_router(path: Optional[str] = None) -> ModelRouter:
+    """Load the routing config, re-reading it only when the file changes"""
+    path = path or ROUTING_CONFIG_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _router_lock:
+        cached = _router_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        if mtime is None:
+            print(f"MODEL ROUTING: {path} not found, using built-in default routing")
+            router = ModelRouter(DEFAULT_ROUTING)
+        else:
+            with open(path) as f:
+                router = ModelRouter(json.load(f))
+            print(f"MODEL ROUTING LOADED: {path}")
+        _router_cache[path] = (mtime, router)
+        return router
+
+
+class UsageMetrics:
+    """Thread-safe per-purpose latency and token counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._tiers: Dict[str, Dict[str, float]] = {}
+
+    def _entry(self, purpose: str) -> Dict[str, Any]:
+        return self._stats.setdefault(purpose, {
+            "calls": 0, "errors": 0, "total_latency": 0.0, "cached_latency": 0.0, "cached_calls": 0,
+            "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "cost": 0.0,
+            "escalations": 0, "cancelled": 0, "models": {}
+        })
+
+    def record(self, purpose: str, model: Optional[str], latency: float, usage: Dict[str, int],
+               error: bool = False, tier: Optional[str] = None, cost: float = 0.0):
+        with self._lock:
+            stats = self._entry(purpose)
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+            stats["cost"] += cost
+            if tier:
+                tier_stats = self._tiers.setdefault(tier, {"calls": 0, "errors": 0, "total_latency": 0.0, "cost": 0.0})
+                tier_stats["calls"] += 1
+                tier_stats["total_latency"] += latency
+                tier_stats["cost"] += cost
+                if error:
+                    tier_stats["errors"] += 1
+            if error:
+                stats["errors"] += 1
+            stats["input_tokens"] += usage.get("input_tokens", 0)
+            stats["cached_tokens"] += usage.get("cached_tokens", 0)
+            stats["output_tokens"] += usage.get("output_tokens", 0)
+            if usage.get("cached_tokens", 0):
+                stats["cached_calls"] += 1
+                stats["cached_latency"] += latency
+            if model:
+                stats["models"][model] = stats["models"].get(model, 0) + 1
+
+    def record_escalation(self, purpose: str, from_tier: str, reason: str):
+        with self._lock:
+            stats = self._stats.get(purpose)
+            if stats is not None:
+                stats["escalations"] += 1
+        print(f"LLM ESCALATION [{purpose}]: {from_tier} -> next tier ({reason})")
+
+    def record_cancelled(self, purpose: str):
+        """A call abandoned because its turn was cancelled or ran out of time"""
+        with self._lock:
+            self._entry(purpose)["cancelled"] += 1
+
+    def tier_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_latency_ms": round(1000 * stats["total_latency"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                    "cost": round(stats["cost"], 6)
+                }
+                for name, stats in self._tiers.items()
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for purpose, stats in self._stats.items():
+                uncached_calls = stats["calls"] - stats["cached_calls"]
+                result[purpose] = {
+                    **stats,
+                    "models": dict(stats["models"]),
+                    "cost": round(stats["cost"], 6),
+                    "avg_latency_ms": round(1000 * stats["total_latency"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                    "avg_cached_latency_ms": round(1000 * stats["cached_latency"] / stats["cached_calls"], 1) if stats["cached_calls"] else None,
+                    "avg_uncached_latency_ms": round(
+                        1000 * (stats["total_latency"] - stats["cached_latency"]) / uncached_calls, 1
+                    ) if uncached_calls else None,
+                    "cache_hit_rate": round(stats["cached_tokens"] / stats["input_tokens"], 3) if stats["input_tokens"] else 0.0
+                }
+            return result
+
+
+default_usage_metrics = UsageMetrics()
+
+
+def request_fingerprint(scope: Any, purpose: str, kwargs: Dict[str, Any]) -> str:
+    payload = json.dumps({"scope": scope, "purpose": purpose, "request": kwargs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMGateway:
+    def __init__(self, client: Any, router: Optional[ModelRouter] = None, metrics: Optional[UsageMetrics] = None,
+                 limiter: Optional[RateLimiter] = None, single_flight: Optional[SingleFlight] = None,
+                 router_path: Optional[str] = None, hedging: Optional[HedgePolicy] = None,
+                 health: Optional[APIHealth] = None, ledger: Optional[CostLedger] = None):
+        self.client = client
+        self._router = router
+        self._router_path = router_path
+        self.metrics = metrics or default_usage_metrics
+        self.limiter = limiter or default_limiter
+        self.single_flight = single_flight or default_group
+        self.hedging = hedging or default_hedge_policy
+        self.health = health or default_health
+        self.ledger = ledger
+        self.limiter.configure(self.router.rate_limits)
+        self.hedging.configure(self.router.hedging)
+        if self.ledger is not None:
+            self.ledger.configure(self.router.budgets)
+
+    @property
+    def router(self) -> ModelRouter:
+        # Without an explicit router, follow edits to the routing file
+        return self._router or load_router(self._router_path)
+
+    def chat(self, purpose: str, **kwargs) -> Any:
+        """chat.completions.create on the purpose's first tier"""
+        return self._call(purpose, self.client.chat.completions.create, kwargs)
+
+    def respond(self, purpose: str, **kwargs) -> Any:
+        """responses.create on the purpose's first tier"""
+        return self._call(purpose, self.client.responses.create, kwargs)
+
+    def chat_parsed(self, purpose: str, parse: Callable[[Any], Any],
+                    confidence: Optional[Callable[[Any], Optional[float]]] = None, **kwargs) -> Any:
+        """chat.completions.create returning parse(response), escalating tiers per the route"""
+        return self._call_parsed(purpose, self.client.chat.completions.create, parse, confidence, kwargs)
+
+    def respond_parsed(self, purpose: str, parse: Callable[[Any], Any],
+                       confidence: Optional[Callable[[Any], Optional[float]]] = None, **kwargs) -> Any:
+        """responses.create returning parse(response), escalating tiers per the route"""
+        return self._call_parsed(purpose, self.client.responses.create, parse, confidence, kwargs)
+
+    def append_items(self, purpose: str, **kwargs) -> Any:
+        """conversations.items.create with the same admission, deadline and health checks as a model call"""
+        return self._send(purpose, self.client.conversations.items.create, kwargs, None)
+
+    def budget_decision(self, session_id: Any) -> str:
+        """'ok', 'downgrade' or 'local' for a session's next call (always 'ok' without a ledger)"""
+        return self.ledger.decision(session_id) if self.ledger is not None else "ok"
+
+    def _budget_tiers(self, purpose: str, tiers: List[Tier]) -> List[Tier]:
+        """The tiers a call may use under the current session's budget"""
+        decision = self.budget_decision(call_scope.get())
+        if decision == "ok":
+            return tiers
+        if decision == "local" and purpose not in self.ledger.local_exempt:
+            self.ledger.record_enforcement("refused")
+            raise BudgetExceeded(f"LLM budget exhausted; {purpose} call not sent")
+        downgrade = self.router.tiers.get(self.ledger.downgrade_tier)
+        if downgrade is None or tiers == [downgrade]:
+            return tiers
+        self.ledger.record_enforcement("downgraded")
+        print(f"LLM BUDGET [{purpose}]: {decision}, using tier {downgrade.name}")
+        return [downgrade]
+
+    def _call_parsed(self, purpose: str, create, parse, confidence, kwargs: Dict[str, Any]) -> Any:
+        route = self.router.route(purpose)
+        tiers = self._budget_tiers(purpose, route.tiers)
+        for index, tier in enumerate(tiers):
+            is_last = index == len(tiers) - 1
+            response = self._call(purpose, create, kwargs, tier)
+            try:
+                parsed = parse(response)
+            except Exception:
+                if is_last or 'parse_failure' not in route.escalate_on:
+                    raise
+                self.metrics.record_escalation(purpose, tier.name, 'parse_failure')
+                continue
+
+            if confidence is not None and not is_last and 'low_confidence' in route.escalate_on:
+                score = confidence(parsed)
+                if score is not None and score < route.min_confidence:
+                    self.metrics.record_escalation(purpose, tier.name, f"low_confidence {score:.2f}")
+                    continue
+            return parsed
+
+    def _call(self, purpose: str, create, kwargs: Dict[str, Any], tier: Optional[Tier] = None) -> Any:
+        if tier is None:
+            if 'model' in kwargs:
+                tier = self.router.tier_for_model(kwargs['model'])
+            else:
+                tier = self.router.route(purpose).tiers[0]
+            if tier is not None:
+                tier = self._budget_tiers(purpose, [tier])[0]
+        kwargs = dict(kwargs)
+        if tier is not None:
+            kwargs['model'] = tier.model
+
+        scope = call_scope.get()
+        if scope is None:
+            return self._send(purpose, create, kwargs, tier)
+        key = request_fingerprint(scope, purpose, kwargs)
+        turn = current_turn.get()
+        try:
+            response, _ = self.single_flight.do(key, lambda: self._send(purpose, create, kwargs, tier),
+                                                label=purpose, turn=turn)
+        except TurnCancelled:
+            if turn is None:
+                raise
+            # Raises if this turn is the one cancelled or overdue
+            turn.check()
+            # The shared call belonged to another tab's cancelled turn; this turn is still live
+            response = self._send(purpose, create, kwargs, tier)
+        return response
+
+    def _conversation_undo(self, kwargs: Dict[str, Any]) -> Optional[Callable[[Any], None]]:
+        """For a call that adds items to a conversation: a function deleting the items its response added"""
+        conversation = kwargs.get('conversation') or kwargs.get('conversation_id')
+        conversation_id = conversation.get('id') if isinstance(conversation, dict) else conversation
+        if not isinstance(conversation_id, str):
+            return None
+
+        def undo(response: Any):
+            if 'conversation_id' in kwargs:
+                # conversations.items.create returns the items it added
+                item_ids = [item.id for item in getattr(response, 'data', None) or []]
+            else:
+                # responses.create added the input items it was sent, then its output
+                sent = kwargs.get('input') or []
+                inputs = self.client.responses.input_items.list(
+                    response.id, order="desc", limit=1 if isinstance(sent, str) else len(sent)
+                )
+                item_ids = [item.id for item in inputs.data] + [item.id for item in response.output]
+            for item_id in item_ids:
+                self.client.conversations.items.delete(item_id, conversation_id=conversation_id)
+            print(f"CONVERSATION UNDO: removed {len(item_ids)} items of an uncommitted turn from {conversation_id}")
+
+        return undo
+
+    def _send(self, purpose: str, create, kwargs: Dict[str, Any], tier: Optional[Tier]) -> Any:
+        tier_name = tier.name if tier else None
+        model = kwargs.get('model')
+
+        turn = current_turn.get()
+        route = self.router.route(purpose)
+        priority = route.priority
+        # Duplicates are only safe without server-side effects (conversation items)
+        hedge = route.hedge and 'conversation' not in kwargs and 'conversation_id' not in kwargs
+        max_wait = None
+        if turn is not None:
+            turn.check()
+            max_wait = min(DEFAULT_MAX_WAIT.get(priority, DEFAULT_MAX_WAIT["interactive"]), turn.remaining())
+
+        if not self.health.allow():
+            self.metrics.record(purpose, model, 0.0, {}, error=True, tier=tier_name)
+            raise APIUnavailable(f"LLM API unavailable (degraded mode); {purpose} call not sent")
+
+        estimated_tokens = estimate_tokens(kwargs)
+        try:
+            self.limiter.acquire(model, estimated_tokens, priority, max_wait=max_wait)
+        except BaseException:
+            self.health.release_probe()
+            raise
+
+        started = time.perf_counter()
+        purpose_token = call_purpose.set(purpose)
+        try:
+            if hedge:
+                response = self.hedging.call(
+                    purpose,
+                    lambda: create(**kwargs),
+                    acquire_hedge=lambda: self.limiter.try_acquire(model, estimated_tokens),
+                    check=turn.check if turn is not None else None
+                )
+            elif turn is None:
+                response = create(**kwargs)
+            else:
+                response = turn.run(lambda: create(**kwargs), undo=self._conversation_undo(kwargs))
+        except TurnCancelled:
+            self.health.release_probe()
+            self.metrics.record_cancelled(purpose)
+            print(f"LLM CALL [{purpose}] abandoned after {(time.perf_counter() - started)*1000:.0f} ms: turn cancelled")
+            raise
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 429:
+                self.limiter.penalize(model)
+            self.health.record_failure(e)
+            self.metrics.record(purpose, model, time.perf_counter() - started, {},
+                                error=True, tier=tier_name)
+            raise
+        finally:
+            call_purpose.reset(purpose_token)
+        self.health.record_success()
+        usage = extract_usage(response)
+        if usage['input_tokens']:
+            self.limiter.settle(model, estimated_tokens, usage['input_tokens'] + usage['output_tokens'])
+        latency = time.perf_counter() - started
+        if hedge:
+            self.hedging.observe(purpose, latency)
+        cost = tier.cost(usage) if tier else 0.0
+        self.metrics.record(purpose, kwargs.get('model'), latency, usage, tier=tier_name, cost=cost)
+        if self.ledger is not None:
+            self.ledger.record(call_scope.get(), call_phase.get(), purpose, kwargs.get('model'), tier_name, usage, cost)
+        print(f"LLM CALL [{purpose}] {tier_name or '-'}/{kwargs.get('model')}: {latency*1000:.0f} ms, "
+              f"{usage['input_tokens']} in ({usage['cached_tokens']} cached), {usage['output_tokens']} out, ${cost:.5f}")
+        return response
@@ -0,0 +1,684 @@
+"""
+Concurrent load test of the consultation flow with simulated founders.
+
+Each founder is a Streamlit AppTest session that runs app.py end to end. It
+creates a session, answers all seven TICs, selects three benchmark companies,
+answers 10 or 20 brainstorming questions and generates the evaluation report.
+The OpenAI client is replaced by StubOpenAI. The stub gives canned,
+schema-valid output for every call purpose after a sampled, per-purpose
+latency. The run therefore exercises the real orchestrator, gateway, rate
+limiter and SQLite store, with no network access and no cost.
+
+AppTest swaps process globals (the Streamlit runtime, secrets, config) for
+each script run, so only one founder can run per process. Each concurrent
+founder therefore gets its own worker process, like app replicas sharing one
+database.
+
+The run steps through concurrency levels, and optionally both TIC turn modes.
+For each level it reports founder throughput, per-turn latency percentiles by
+turn type, threads and memory per worker, and SQLite contention. Contention
+covers compare-and-swap conflicts and merges, plus the wait for the write lock
+as measured by a probe writer.
+
+    python load_test.py --concurrency 1 4 16 --latency-scale 0.1
+    python load_test.py --tic-modes tool_loop structured --out load.json
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from llm_gateway import call_purpose
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+TIC_SEQUENCE = ["vision", "businessOverview", "marketSize", "targetCustomers", "valueProposition", "usp", "businessModel"]
+
+# Median simulated latency (seconds) per gateway purpose; None is conversation bookkeeping
+DEFAULT_LATENCY = {
+    "tic_turn": 1.6,
+    "benchmark_chat": 1.0,
+    "completeness": 0.4,
+    "validation": 0.5,
+    "question_gen": 0.8,
+    "tic_enhance": 0.9,
+    "benchmarks": 1.5,
+    "evaluation": 6.0,
+    None: 0.15,
+}
+LATENCY_SIGMA = 0.35
+
+# Longest a single simulated user action (one script run) may take
+TURN_TIMEOUT = 300
+
+INDUSTRIES = ["Technology", "Healthcare", "Finance", "E-commerce", "Education", "Manufacturing",
+              "Food & Beverage", "Fitness & Wellness"]
+
+TIC_ANSWERS = {
+    "vision": "Within ten years we want to be the default {industry} platform for small teams, "
+              "cutting the time they lose on manual work in half (founder {founder}).",
+    "businessOverview": "We sell a subscription product that automates scheduling, billing and reporting "
+                        "for independent {industry} businesses with 5 to 50 staff.",
+    "marketSize": "There are roughly 400,000 such {industry} businesses in our first three markets, "
+                  "a serviceable market of about 1.2 billion dollars growing 11% a year.",
+    "targetCustomers": "Owner-operators of small {industry} businesses, usually 35-55, who run operations "
+                       "themselves and currently juggle spreadsheets and three separate tools.",
+    "valueProposition": "One workspace that replaces three tools, saves an owner about six hours a week "
+                        "and reduces missed payments by a third.",
+    "usp": "Industry-specific workflows built with 40 pilot {industry} customers and integrations with the "
+           "two dominant local accounting packages that horizontal tools lack.",
+    "businessModel": "Tiered monthly subscription from 49 to 199 dollars per location plus a 0.5% fee on "
+                     "payments processed, sold self-serve with a small partner channel.",
+}
+
+BRAINSTORM_ANSWER = ("For question {number}, our plan is to start with the {industry} owners in our pilot group, "
+                     "measure weekly active usage and payment volume, and expand city by city once retention "
+                     "passes 90 percent (founder {founder}).")
+
+
+# ===================================================================
+# STUB OPENAI CLIENT
+# ===================================================================
+
+class StubBackend:
+    """State shared by every StubOpenAI instance: conversations, per-conversation TIC cursor, latency model"""
+
+    def __init__(self, latency: Optional[Dict[Any, float]] = None, scale: float = 1.0, seed: Optional[int] = None):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._conversations: Dict[str, List[Dict[str, Any]]] = {}
+        self._tic_cursor: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+
+    def next_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}_stub_{os.getpid()}_{next(self._ids)}"
+
+    def wait(self):
+        """Sleep for one sampled call latency of the purpose being sent"""
+        purpose = call_purpose.get()
+        median = self.latency.get(purpose, self.latency.get(None, 0.0)) * self.scale
+        with self._lock:
+            self.calls[purpose or "bookkeeping"] = self.calls.get(purpose or "bookkeeping", 0) + 1
+            delay = median * self._random.lognormvariate(0, LATENCY_SIGMA) if median > 0 else 0.0
+        time.sleep(delay)
+        return purpose
+
+    def uniform(self, low: float, high: float) -> float:
+        with self._lock:
+            return self._random.uniform(low, high)
+
+    # Conversations -------------------------------------------------------
+
+    def create_conversation(self) -> str:
+        conversation_id = self.next_id("conv")
+        with self._lock:
+            self._conversations[conversation_id] = []
+            self._tic_cursor[conversation_id] = 0
+        return conversation_id
+
+    def append(self, conversation_id: Optional[str], role: str, text: str):
+        if not conversation_id:
+            return
+        with self._lock:
+            self._conversations.setdefault(conversation_id, []).append({"role": role, "text": text})
+
+    def items(self, conversation_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._conversations.get(conversation_id, []))
+
+    def current_tic(self, conversation_id: str) -> str:
+        with self._lock:
+            return TIC_SEQUENCE[min(self._tic_cursor.get(conversation_id, 0), len(TIC_SEQUENCE) - 1)]
+
+    def advance_tic(self, conversation_id: str):
+        with self._lock:
+            self._tic_cursor[conversation_id] = self._tic_cursor.get(conversation_id, 0) + 1
+
+
+def _usage_tokens(kwargs: Dict[str, Any], output: str):
+    """Rough token counts (4 characters per token) so the limiter and metrics see realistic sizes"""
+    return max(1, len(json.dumps(kwargs, default=str)) // 4), max(1, len(output) // 4)
+
+
+def _response(backend: StubBackend, kwargs: Dict[str, Any], text: str = "",
+              function_call: Optional[Dict[str, Any]] = None) -> SimpleNamespace:
+    output = []
+    if function_call:
+        output.append(SimpleNamespace(type="function_call", id=backend.next_id("fc"),
+                                      call_id=backend.next_id("call"), status="completed", **function_call))
+    if text:
+        output.append(SimpleNamespace(type="message", role="assistant", status="completed",
+                                      content=[SimpleNamespace(type="output_text", text=text, annotations=[])]))
+    input_tokens, output_tokens = _usage_tokens(kwargs, text + json.dumps(function_call or {}))
+    return SimpleNamespace(
+        id=backend.next_id("resp"), object="response", model=kwargs.get("model"),
+        output=output, output_text=text,
+        usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                              total_tokens=input_tokens + output_tokens,
+                              input_tokens_details=SimpleNamespace(cached_tokens=0))
+    )
+
+
+def _completion(kwargs: Dict[str, Any], content: str) -> SimpleNamespace:
+    prompt_tokens, completion_tokens = _usage_tokens(kwargs, content)
+    return SimpleNamespace(
+        object="chat.completion", model=kwargs.get("model"),
+        choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                 message=SimpleNamespace(role="assistant", content=content, tool_calls=None))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                              total_tokens=prompt_tokens + completion_tokens,
+                              prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+    )
+
+
+def _last_user_text(messages: Any) -> str:
+    for message in reversed(messages or []):
+        if isinstance(message, dict) and message.get("role") == "user":
+            content = message.get("content")
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+class _StubResponses:
+    def __init__(self, backend: StubBackend):
+        self._backend = backend
+
+    def create(self, **kwargs) -> SimpleNamespace:
+        purpose = self._backend.wait()
+        conversation_id = kwargs.get("conversation")
+        items = kwargs.get("input") or []
+        text_format = ((kwargs.get("text") or {}).get("format") or {})
+
+        if text_format.get("name") == "tic_turn":
+            # Structured TIC turn: the turn context names the component being collected
+            context = next((item["content"] for item in items if item.get("role") == "developer"), "")
+            match = re.search(r"Current component: (\w+)", context)
+            tic_name = match.group(1) if match else TIC_SEQUENCE[0]
+            answer = _last_user_text(items)
+            return _response(self._backend, kwargs, json.dumps({
+                "tic_name": tic_name, "intent": "answer", "analysis_summary": answer[:200],
+                "is_complete": True, "clarification_question": "Could you be more specific?",
+                "next_question": "Thanks. Let's move on to the next component: what comes next for the business?",
+                "help_reply": ""
+            }))
+
+        outputs = [item for item in items if item.get("type") == "function_call_output"]
+        if outputs:
+            # Tool-loop follow-up: advance past a confirmed TIC and ask the next question
+            try:
+                result = json.loads(outputs[-1]["output"])
+            except (KeyError, json.JSONDecodeError):
+                result = {}
+            if result.get("data", {}).get("analysis_complete"):
+                self._backend.advance_tic(conversation_id)
+                text = "Great. Next: tell me about the next component of your business."
+            else:
+                text = "Could you add a little more detail on that?"
+            self._backend.append(conversation_id, "assistant", text)
+            return _response(self._backend, kwargs, text)
+
+        user_text = _last_user_text(items)
+        self._backend.append(conversation_id, "user", user_text)
+        if purpose == "tic_turn" and kwargs.get("tools"):
+            tic_name = self._backend.current_tic(conversation_id)
+            return _response(self._backend, kwargs, function_call={
+                "name": "analyze_user_response",
+                "arguments": json.dumps({"tic_name": tic_name, "user_response": user_text,
+                                         "analysis_summary": user_text[:200]})
+            })
+
+        text = "Please pick three benchmark companies from the sidebar to continue."
+        self._backend.append(conversation_id, "assistant", text)
+        return _response(self._backend, kwargs, text)
+
+
+class _StubChatCompletions:
+    def __init__(self, backend: StubBackend):
+        self._backend = backend
+
+    def create(self, **kwargs) -> SimpleNamespace:
+        purpose = self._backend.wait()
+        user_text = _last_user_text(kwargs.get("messages"))
+
+        if purpose == "completeness":
+            content = "COMPLETE"
+        elif purpose == "validation":
+            content = json.dumps({"category": "VALID_ANSWER", "confidence": 0.9,
+                                  "explanation": "Relevant, specific answer", "response": ""})
+        elif purpose == "question_gen":
+            content = "What is the single biggest risk to reaching your next milestone, and how will you reduce it?"
+        elif purpose == "benchmarks":
+            # Re-rank: echo the retrieved candidates; generate: invent a few
+            names = re.findall(r"^- ([^:\n]+):", user_text, flags=re.MULTILINE)
+            names = names or [f"Benchmark Company {n}" for n in range(1, 7)]
+            content = json.dumps({"companies": [
+                {"name": name.strip(), "description": "Comparable business in the same market",
+                 "relevance": "Similar customers and business model"}
+                for name in names[:6]
+            ]})
+        elif purpose == "tic_enhance":
+            content = json.dumps({"primary_tic": "businessOverview", "secondary_tics": ["marketSize"],
+                                  "vision_insights": "Answer sharpens the go-to-market plan",
+                                  "enhanced_summaries": {"businessOverview": user_text[-200:],
+                                                         "marketSize": user_text[-120:]}})
+        elif purpose == "evaluation":
+            content = json.dumps(self._evaluation())
+        else:
+            content = "OK"
+        return _completion(kwargs, content)
+
+    def _evaluation(self) -> Dict[str, Any]:
+        scores = {criterion: round(self._backend.uniform(1.5, 5.0)) for criterion in [
+            "Market Opportunity & Growth", "USP & Competitive Advantage", "Value Proposition",
+            "Sustainability", "Execution Feasibility"]}
+        total = sum(scores.values())
+        return {
+            "evaluation_feedback": {
+                **{criterion: {"score": f"{score}/5", "rationale": "Simulated assessment"}
+                   for criterion, score in scores.items()},
+                "overall": {"score": f"{total}/25", "feedback": "Simulated overall assessment"}
+            },
+            "ai_investment_recommendation": "YES" if total >= 18 else "MAYBE" if total >= 13 else "NO",
+            "investment_rationale": "Simulated rationale",
+            "detailed_feedback": "Simulated detailed feedback",
+            "paradigm_shift_drivers": ["Automation of small-business back office", "Embedded payments"],
+            "benchmark_insights": "Simulated benchmark insights",
+            "investment_attractiveness": {
+                "Market Size": {"score": 4, "rationale": "Simulated"},
+                "total": f"{total}/25"
+            }
+        }
+
+
+class _StubConversationItems:
+    def __init__(self, backend: StubBackend):
+        self._backend = backend
+
+    def create(self, conversation_id: str, items: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        self._backend.wait()
+        for item in items:
+            text = "".join(part.get("text", "") for part in item.get("content", []))
+            self._backend.append(conversation_id, item.get("role", "user"), text)
+        return SimpleNamespace(data=[])
+
+    def list(self, conversation_id: str, **kwargs) -> SimpleNamespace:
+        self._backend.wait()
+        return SimpleNamespace(data=[
+            SimpleNamespace(type="message", role=item["role"], content=[
+                SimpleNamespace(type="input_text" if item["role"] == "user" else "output_text", text=item["text"])
+            ])
+            for item in self._backend.items(conversation_id)
+        ])
+
+
+class _StubConversations:
+    def __init__(self, backend: StubBackend):
+        self._backend = backend
+        self.items = _StubConversationItems(backend)
+
+    def create(self, **kwargs) -> SimpleNamespace:
+        self._backend.wait()
+        return SimpleNamespace(id=self._backend.create_conversation(), metadata=kwargs.get("metadata"))
+
+    def retrieve(self, conversation_id: str, **kwargs) -> SimpleNamespace:
+        self._backend.wait()
+        return SimpleNamespace(id=conversation_id)
+
+
+# Installed by install_stub(); app.py constructs a fresh client on every rerun
+_backend: Optional[StubBackend] = None
+
+
+class StubOpenAI:
+    """Drop-in for openai.OpenAI that answers from the shared StubBackend"""
+
+    def __init__(self, *args, **kwargs):
+        if _backend is None:
+            raise RuntimeError("StubOpenAI used before install_stub()")
+        self.responses = _StubResponses(_backend)
+        self.chat = SimpleNamespace(completions=_StubChatCompletions(_backend))
+        self.conversations = _StubConversations(_backend)
+
+
+def install_stub(backend: StubBackend):
+    """Replace openai.OpenAI so every `from openai import OpenAI` in app.py gets the stub"""
+    global _backend
+    import openai
+
+    _backend = backend
+    openai.OpenAI = StubOpenAI
+
+
+# ===================================================================
+# SIMULATED FOUNDER
+# ===================================================================
+
+def _widget(widgets, label: str):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+class Founder:
+    """Drives one AppTest session through the whole consultation, timing every user action"""
+
+    def __init__(self, founder_id: int, brainstorm_target: int, industry: str):
+        from streamlit.testing.v1 import AppTest
+
+        self.founder_id = founder_id
+        self.brainstorm_target = brainstorm_target
+        self.industry = industry
+        # The API key comes from the secrets.toml run_load_test writes in the working directory
+        self.app = AppTest.from_file(APP_PATH, default_timeout=TURN_TIMEOUT)
+        self.timings: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+
+    def _run(self, turn_type: str, action=None):
+        started = time.perf_counter()
+        (action() if action else self.app).run()
+        self.timings.append({"type": turn_type, "seconds": time.perf_counter() - started})
+        for exception in self.app.exception:
+            self.errors.append(f"{turn_type}: {exception.message}")
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self.app.session_state["business_state"]
+
+    def _say(self, turn_type: str, text: str):
+        self._run(turn_type, lambda: self.app.chat_input[0].set_value(text))
+
+    def run(self) -> Dict[str, Any]:
+        fill = {"industry": self.industry.lower(), "founder": self.founder_id}
+        self._run("page_load")
+        _widget(self.app.sidebar.selectbox, "Select Industry").select(self.industry)
+        _widget(self.app.sidebar.text_input, "New Session Name").input(f"Load test founder {self.founder_id}")
+        self._run("create_session", lambda: _widget(self.app.sidebar.button, "Create New Session").click())
+
+        for _ in range(len(TIC_SEQUENCE) * 3):
+            if self.state["phase"] != "tic_collection":
+                break
+            tic_name = self.state["current_tic"]
+            self._say("tic_answer", TIC_ANSWERS[tic_name].format(**fill))
+
+        for index in range(3):
+            if self.state["phase"] != "benchmarking":
+                break
+            self._run("select_company", lambda: self.app.button(key=f"company_btn_{index}").click())
+
+        continued = False
+        for _ in range(self.brainstorm_target * 2):
+            progress = self.state.get("brainstorming_progress") or {}
+            completed = progress.get("completed_count", 0)
+            if self.state["phase"] != "brainstorming" or completed >= self.brainstorm_target:
+                break
+            if completed == 10 and not continued:
+                continued = True
+                self._say("brainstorm_choice", "continue")
+                continue
+            self._say("brainstorm_answer", BRAINSTORM_ANSWER.format(number=completed + 1, **fill))
+        if self.state["phase"] == "brainstorming" and self.brainstorm_target <= 10:
+            self._say("brainstorm_choice", "end")
+
+        try:
+            self._run("evaluation", lambda: _widget(self.app.sidebar.button, "🔍 Generate Evaluation Report").click())
+        except LookupError as e:
+            self.errors.append(str(e))
+
+        completed = bool(self.state.get("evaluation_report"))
+        if not completed:
+            progress = self.state.get("brainstorming_progress") or {}
+            self.errors.append(f"founder {self.founder_id} stopped in phase {self.state['phase']} "
+                               f"({self.state['completed_count']} TICs, {progress.get('completed_count', 0)} answers)")
+        return {
+            "founder": self.founder_id,
+            "session_id": self.app.session_state["current_session_id"],
+            "completed": completed,
+            "phase": self.state["phase"],
+            "timings": self.timings,
+            "errors": self.errors,
+        }
+
+
+# ===================================================================
+# LOAD LEVELS
+# ===================================================================
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS; peak only
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"count": len(ordered), "p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99),
+            "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+class Sampler:
+    """Background sampling while a block runs: peak threads and RSS, and optionally SQLite write-lock wait"""
+
+    def __init__(self, db_path: Optional[str] = None, interval: float = 0.2):
+        self.db_path = db_path
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self.lock_waits: List[float] = []
+        self.lock_errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="load-test-sampler", daemon=True)
+
+    def _loop(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None) if self.db_path else None
+        while not self._stop.wait(self.interval):
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, _rss_mb())
+            if conn is None:
+                continue
+            started = time.perf_counter()
+            try:
+                # Time to take SQLite's single write lock, i.e. what every session save queues behind
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("COMMIT")
+                self.lock_waits.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                self.lock_errors += 1
+        if conn is not None:
+            conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _init_worker(workdir: str, latency_scale: float, seed: Optional[int], verbose: bool):
+    os.chdir(workdir)
+    install_stub(StubBackend(scale=latency_scale, seed=seed))
+    if not verbose:
+        import streamlit.logger
+
+        streamlit.logger.set_log_level("error")
+
+
+def _simulate(founder_id: int, brainstorm: str, verbose: bool) -> Dict[str, Any]:
+    """Worker-process entry point: run one founder and report its timings and resource peaks"""
+    target = {"10": 10, "20": 20}.get(brainstorm, 10 if founder_id % 2 else 20)
+    calls_before = dict(_backend.calls)
+    with Sampler() as sampler:
+        # The app logs every step; keep the report readable unless asked
+        with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            try:
+                result = Founder(founder_id, target, INDUSTRIES[founder_id % len(INDUSTRIES)]).run()
+            except Exception as e:
+                result = {"founder": founder_id, "session_id": None, "completed": False, "phase": None,
+                          "timings": [], "errors": [f"{type(e).__name__}: {e}"]}
+    result.update({
+        "pid": os.getpid(),
+        "peak_threads": sampler.peak_threads,
+        "peak_rss_mb": sampler.peak_rss_mb,
+        "llm_calls": {purpose: count - calls_before.get(purpose, 0) for purpose, count in _backend.calls.items()},
+    })
+    return result
+
+
+def _write_stats(db_path: str, session_ids: List[int]) -> Dict[str, int]:
+    import session_store
+
+    conn = session_store.connect(db_path)
+    totals = {"writes": 0, "conflicts": 0, "merges": 0}
+    for session_id in session_ids:
+        for key, value in session_store.get_write_stats(conn, session_id).items():
+            totals[key] += value
+    conn.close()
+    return totals
+
+
+def run_level(concurrency: int, founders: int, tic_mode: str, brainstorm: str, workdir: str,
+              latency_scale: float, seed: Optional[int] = None, verbose: bool = False) -> Dict[str, Any]:
+    """Run `founders` simulated founders, `concurrency` at a time, and summarize the level"""
+    import session_store
+
+    # Read by app.py in every worker; spawned workers inherit the environment
+    os.environ["TIC_TURN_MODE"] = tic_mode
+    started = time.perf_counter()
+    with Sampler(os.path.join(workdir, session_store.DB_PATH)) as sampler:
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(workdir, latency_scale, seed, verbose)) as pool:
+            results = list(pool.map(_simulate, range(founders), [brainstorm] * founders, [verbose] * founders))
+    elapsed = time.perf_counter() - started
+
+    by_type: Dict[str, List[float]] = {}
+    llm_calls: Dict[str, int] = {}
+    worker_rss: Dict[int, float] = {}
+    for result in results:
+        for timing in result["timings"]:
+            by_type.setdefault(timing["type"], []).append(timing["seconds"])
+        for purpose, count in result["llm_calls"].items():
+            llm_calls[purpose] = llm_calls.get(purpose, 0) + count
+        worker_rss[result["pid"]] = max(worker_rss.get(result["pid"], 0.0), result["peak_rss_mb"])
+    turns = sum(len(values) for values in by_type.values())
+    completed = sum(1 for result in results if result["completed"])
+    session_ids = [result["session_id"] for result in results if result["session_id"]]
+
+    return {
+        "concurrency": concurrency,
+        "tic_mode": tic_mode,
+        "founders": founders,
+        "completed": completed,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput": {
+            "founders_per_minute": round(completed * 60 / elapsed, 2),
+            "turns_per_second": round(turns / elapsed, 2),
+        },
+        "latency": {turn_type: _percentiles(values) for turn_type, values in sorted(by_type.items())},
+        "resources": {
+            "workers": len(worker_rss),
+            "peak_threads_per_worker": max((result["peak_threads"] for result in results), default=0),
+            "peak_rss_mb_per_worker": round(max(worker_rss.values(), default=0.0), 1),
+            "total_rss_mb": round(sum(worker_rss.values()) + sampler.peak_rss_mb, 1),
+        },
+        "sqlite": {
+            **_write_stats(os.path.join(workdir, session_store.DB_PATH), session_ids),
+            "write_lock_wait": _percentiles(sampler.lock_waits),
+            "lock_errors": sampler.lock_errors,
+        },
+        "llm_calls": llm_calls,
+        "errors": [error for result in results for error in result["errors"]][:20],
+    }
+
+
+def run_load_test(concurrency_levels: List[int], tic_modes: List[str], founders_per_level: Optional[int] = None,
+                  brainstorm: str = "mixed", latency_scale: float = 1.0, seed: Optional[int] = None,
+                  workdir: Optional[str] = None, verbose: bool = False) -> Dict[str, Any]:
+    """Run every (tic_mode, concurrency) level against a fresh database and return the reports"""
+    # A throwaway working directory, so the load test never touches the real sessions database
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="load-test-"))
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('OPENAI_API_KEY = "stub"\n')
+    print(f"LOAD TEST: working directory {workdir}")
+
+    levels = []
+    for tic_mode in tic_modes:
+        for concurrency in concurrency_levels:
+            founders = founders_per_level or concurrency
+            print(f"LOAD LEVEL: {founders} founders, {concurrency} concurrent, tic mode {tic_mode}")
+            level = run_level(concurrency, founders, tic_mode, brainstorm, workdir, latency_scale, seed, verbose)
+            levels.append(level)
+            turn_latency = level["latency"].get("tic_answer", {})
+            print(f"  {level['completed']}/{founders} completed in {level['elapsed_seconds']}s, "
+                  f"{level['throughput']['turns_per_second']} turns/s, "
+                  f"TIC turn p50 {turn_latency.get('p50_ms')} ms / p95 {turn_latency.get('p95_ms')} ms, "
+                  f"{level['resources']['peak_threads_per_worker']} threads and "
+                  f"{level['resources']['peak_rss_mb_per_worker']} MB per worker, "
+                  f"{level['sqlite']['conflicts']} CAS conflicts")
+
+    return {"success": all(level["completed"] == level["founders"] for level in levels),
+            "data": {"workdir": workdir, "latency_scale": latency_scale, "levels": levels},
+            "message": f"Ran {len(levels)} load levels"}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Concurrent load test with simulated founders and a stub LLM")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Concurrent founders per level")
+    parser.add_argument("--founders", type=int, default=None, help="Founders per level (default: = concurrency)")
+    parser.add_argument("--tic-modes", nargs="+", default=["tool_loop"], choices=["tool_loop", "structured"])
+    parser.add_argument("--brainstorm", choices=["10", "20", "mixed"], default="mixed",
+                        help="Brainstorming answers per founder")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier on the simulated LLM latencies (0 = no delay)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workdir", default=None, help="Directory for the test database (default: new temp dir)")
+    parser.add_argument("--out", default=None, help="Write the full JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own logging")
+    args = parser.parse_args()
+
+    out_path = os.path.abspath(args.out) if args.out else None
+    result = run_load_test(args.concurrency, args.tic_modes, args.founders, args.brainstorm,
+                           args.latency_scale, args.seed, args.workdir, args.verbose)
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"LOAD TEST REPORT: {out_path}")
+    else:
+        print(json.dumps(result, indent=2))
+    raise SystemExit(0 if result["success"] else 1)
@@ -0,0 +1,152 @@
+"""
+Bounded per-session chat history with a topic index built on insert.
+
+A MessageStore keeps the most recent messages of a session in a fixed-size
+window. Every message is written through to the storage backend (the
+session_messages table by default) when it is added, so storage holds the
+whole chat log and memory per session stays flat. Opening a session reads
+only the message count and the last window (restore()); earlier messages are
+read from storage a page at a time when the user asks for them (earlier()).
+
+Each message is lowercased once, when it is added. At that point the store
+records which topics it mentions (e.g. the TIC display names) and whether it
+contains a clarification cue. Relevance filtering, such as the history sent
+with the TIC completeness check, is then a set lookup per message instead of
+a rescan of the text.
+
+The store iterates, indexes and slices like the list of {"role", "content"}
+dicts it replaces.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from storage import StorageBackend, StorageError
+
+DEFAULT_CAPACITY = 40
+
+
+class MessageStore:
+    def __init__(self, storage: StorageBackend, session_id: Optional[int], capacity: int = DEFAULT_CAPACITY,
+                 topics: Optional[Dict[str, str]] = None, cues: Iterable[str] = ()):
+        self.storage = storage
+        self.session_id = session_id
+        self.capacity = capacity
+        # topic key -> lowercase phrase whose presence tags a message with that topic
+        self._topics = {key: phrase.lower() for key, phrase in (topics or {}).items()}
+        self._cues = tuple(cue.lower() for cue in cues)
+        self._entries: Deque[Tuple[Dict[str, str], FrozenSet[str], bool]] = deque()
+        # Position of the first in-memory message in the session's history
+        self.offset = 0
+        # Messages before the window read back so far (positions offset - len .. offset - 1)
+        self._earlier: List[Dict[str, str]] = []
+        # Messages in storage; anything after them is waiting in _unsaved after a failed write
+        self._stored = 0
+        self._unsaved: List[Dict[str, str]] = []
+
+    def _index(self, message: Dict[str, str]) -> Tuple[Dict[str, str], FrozenSet[str], bool]:
+        text = str(message.get("content", "")).lower()
+        topics = frozenset(key for key, phrase in self._topics.items() if phrase in text)
+        return message, topics, any(cue in text for cue in self._cues)
+
+    def _add(self, message: Dict[str, str]):
+        message = {"role": message["role"], "content": message["content"]}
+        self._entries.append(self._index(message))
+        if self.session_id is not None:
+            self._unsaved.append(message)
+        while len(self._entries) > self.capacity:
+            evicted, _, _ = self._entries.popleft()
+            self.offset += 1
+            if self._earlier:
+                # Keep the pages read so far contiguous with the window
+                self._earlier.append(evicted)
+
+    def append(self, message: Dict[str, str]):
+        self._add(message)
+        self.flush()
+
+    def extend(self, messages: Iterable[Dict[str, str]]):
+        for message in messages:
+            self._add(message)
+        self.flush()
+
+    def flush(self):
+        """Write messages not yet in storage"""
+        if not self._unsaved:
+            return
+        try:
+            self.storage.append_messages(self.session_id, self._unsaved)
+            self._stored += len(self._unsaved)
+            self._unsaved = []
+        except StorageError as e:
+            # Keep them; the next append or flush retries
+            print(f"MESSAGE WRITE FAILED: {str(e)}")
+
+    def restore(self):
+        """Open the session's stored history: the last window in memory, the rest left in storage"""
+        self._entries.clear()
+        self._earlier = []
+        self._unsaved = []
+        self._stored = self.storage.count_messages(self.session_id)
+        recent = self.storage.tail_messages(self.session_id, self.capacity)
+        self.offset = self._stored - len(recent)
+        self._entries.extend(self._index(message) for message in recent)
+
+    def load(self, messages: Iterable[Dict[str, str]]):
+        """Replace the history (e.g. a session from before the local chat log, copied from the server)"""
+        self._entries.clear()
+        self._earlier = []
+        self._unsaved = []
+        self.offset = 0
+        self._stored = 0
+        if self.session_id is not None:
+            self.storage.delete_messages(self.session_id)
+        self.extend(messages)
+
+    def truncate(self, total: int):
+        """Drop the newest messages until `total` remain (rolling back a cancelled turn)"""
+        while self.total > total and self._entries:
+            self._entries.pop()
+        del self._unsaved[max(total - self._stored, 0):]
+        if self._stored > total:
+            self.storage.delete_messages(self.session_id, keep=total)
+            self._stored = total
+
+    def relevant(self, topic: str, window: int = 10) -> List[Dict[str, str]]:
+        """Messages among the last `window` that mention the topic or ask for clarification"""
+        recent = list(self._entries)[-window:]
+        return [message for message, topics, cue in recent if topic in topics or cue]
+
+    def earlier(self, count: int) -> List[Dict[str, str]]:
+        """The `count` messages just before the window, oldest first; only pages not read yet hit storage"""
+        count = min(count, self.offset)
+        missing = count - len(self._earlier)
+        if missing > 0 and self.session_id is not None:
+            end = self.offset - len(self._earlier)
+            start = end - missing
+            page = []
+            if start < self._stored:
+                page = self.storage.load_messages(self.session_id, offset=start, limit=min(end, self._stored) - start)
+            # Positions past what storage has are still waiting to be written
+            if end > self._stored:
+                page += self._unsaved[max(start - self._stored, 0):end - self._stored]
+            self._earlier = page + self._earlier
+        return self._earlier[len(self._earlier) - count:] if count else []
+
+    @property
+    def total(self) -> int:
+        return self.offset + len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (message for message, _, _ in self._entries)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [message for message, _, _ in list(self._entries)[index]]
+        return self._entries[index][0]
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
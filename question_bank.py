@@ -0,0 +1,240 @@
+"""
+Precomputed brainstorming questions per (industry, focus area).
+
+The 20 brainstorming questions are bucketed into six focus areas. For each
+turn a local re-ranker scores the bank questions for the current industry
+(plus the industry-agnostic "*" set) against the confirmed TIC summaries,
+drops anything too close to a question already asked, and lightly
+personalizes the winner ({benchmark}, {industry}). Only when no bank
+question fits does the app fall back to live generation.
+
+The bank lives in question_bank.json and is reloaded when the file changes.
+Run ``python question_bank.py --build`` to grow it offline with the LLM, or
+``python question_bank.py --stats`` to see coverage.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from text_index import TfidfIndex
+
+QUESTION_BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'question_bank.json')
+
+GENERIC_INDUSTRY = "*"
+
+# Question ranges match the 20-question flow; guidance is what live generation is told to focus on
+FOCUS_AREAS = [
+    {"key": "vision", "end": 3,
+     "guidance": "Focus on Vision and core value proposition - understanding the fundamental purpose and impact"},
+    {"key": "market", "end": 7,
+     "guidance": "Focus on Market Opportunity & Growth - market size, timing, trends, and revenue model"},
+    {"key": "competitive", "end": 10,
+     "guidance": "Focus on USP & Competitive Advantage - differentiation, competitive landscape, and defensibility"},
+    {"key": "value", "end": 14,
+     "guidance": "Focus on Value Proposition - customer needs, solution fit, and market positioning"},
+    {"key": "sustainability", "end": 16,
+     "guidance": "Focus on Sustainability - environmental, social, and economic long-term viability"},
+    {"key": "execution", "end": 20,
+     "guidance": "Focus on Execution Feasibility - implementation challenges, resources, funding, and risks"},
+]
+
+# A candidate this similar to an earlier question in the session is considered a repeat
+REDUNDANCY_THRESHOLD = 0.5
+
+# Industry-specific questions win ties over generic ones
+INDUSTRY_BONUS = 0.1
+
+
+def focus_area(completed_count: int) -> Dict[str, Any]:
+    for area in FOCUS_AREAS:
+        if completed_count < area["end"]:
+            return area
+    return FOCUS_AREAS[-1]
+
+
+class QuestionBank:
+    def __init__(self, questions: List[Dict[str, str]]):
+        self.questions = questions
+        self._index = TfidfIndex()
+        for question_id, question in enumerate(questions):
+            self._index.add(question_id, question["text"], partition=(question["industry"], question["focus"]))
+        self._by_partition: Dict[Any, List[int]] = {}
+        for question_id, question in enumerate(questions):
+            self._by_partition.setdefault((question["industry"], question["focus"]), []).append(question_id)
+
+    def _personalize(self, text: str, industry: str, benchmarks: List[str], completed_count: int) -> Optional[str]:
+        if "{benchmark}" in text and not benchmarks:
+            return None
+        values = {
+            "benchmark": benchmarks[completed_count % len(benchmarks)] if benchmarks else "",
+            "industry": industry.lower()
+        }
+        try:
+            return text.format_map(values)
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def pick(self, industry: str, completed_count: int, business_context: str,
+             previous_questions: List[str], benchmarks: List[str]) -> Optional[Dict[str, Any]]:
+        """Best-fitting bank question for this turn, or None when every candidate is a repeat"""
+        area = focus_area(completed_count)
+        partitions = [(industry, area["key"]), (GENERIC_INDUSTRY, area["key"])]
+        candidate_ids = [qid for partition in partitions for qid in self._by_partition.get(partition, [])]
+        if not candidate_ids:
+            return None
+        relevance = dict(self._index.search(business_context, partitions=partitions, limit=len(candidate_ids)))
+
+        best = None
+        for question_id in candidate_ids:
+            question = self.questions[question_id]
+            text = self._personalize(question["text"], industry, benchmarks, completed_count)
+            if text is None:
+                continue
+            redundancy = max((self._index.similarity(text, previous) for previous in previous_questions), default=0.0)
+            if redundancy >= REDUNDANCY_THRESHOLD:
+                continue
+            score = relevance.get(question_id, 0.0) - 0.5 * redundancy
+            if question["industry"] != GENERIC_INDUSTRY:
+                score += INDUSTRY_BONUS
+            if best is None or score > best["score"]:
+                best = {"text": text, "score": round(score, 3), "focus": area["key"], "industry": question["industry"]}
+        return best
+
+
+_bank_cache: Dict[str, Any] = {}
+_bank_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def load_bank(path: Optional[str] = None) -> QuestionBank:
+    """Load the bank, re-reading it only when the file changes (e.g. after an offline build)"""
+    path = path or QUESTION_BANK_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _bank_lock:
+        cached = _bank_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        questions = []
+        if mtime is not None:
+            with open(path) as f:
+                questions = json.load(f).get("questions", [])
+            print(f"QUESTION BANK LOADED: {len(questions)} questions from {path}")
+        bank = QuestionBank(questions)
+        _bank_cache[path] = (mtime, bank)
+        return bank
+
+
+def record_outcome(focus: str, source: str):
+    """Count whether a turn's question came from the bank or live generation"""
+    with _stats_lock:
+        stats = _stats.setdefault(focus, {"bank": 0, "live": 0})
+        stats[source] += 1
+
+
+def stats_snapshot() -> Dict[str, Dict[str, int]]:
+    with _stats_lock:
+        return {focus: dict(stats) for focus, stats in _stats.items()}
+
+
+# ===================================================================
+# OFFLINE BUILDER
+# ===================================================================
+
+BANK_BUILDER_PROMPT = """You are an expert business analyst writing a reusable bank of brainstorming questions for founders.
+
+Write strategic questions for the industry and focus area given. Each question must:
+1. Be specific to the industry but not to any single business
+2. Be answerable by a founder in a few sentences
+3. Help evaluate investment potential and business viability
+4. Differ clearly from the existing questions listed
+
+You may use the placeholder {benchmark} where a benchmark company name should go.
+
+Return a JSON object: {"questions": ["...", "..."]}"""
+
+
+def build_bank(client: Any, industries: List[str], per_area: int = 4,
+               path: Optional[str] = None) -> Dict[str, int]:
+    """Generate questions for every (industry, focus area) and merge the new ones into the bank file"""
+    from llm_gateway import LLMGateway
+
+    path = path or QUESTION_BANK_PATH
+    bank = load_bank(path)
+    questions = list(bank.questions)
+    llm = LLMGateway(client)
+    added: Dict[str, int] = {}
+
+    for industry in industries:
+        for area in FOCUS_AREAS:
+            existing = [q["text"] for q in questions if q["industry"] in (industry, GENERIC_INDUSTRY)
+                        and q["focus"] == area["key"]]
+            try:
+                generated = llm.chat_parsed(
+                    "question_gen",
+                    parse=lambda response: json.loads(response.choices[0].message.content)["questions"],
+                    messages=[
+                        {"role": "system", "content": BANK_BUILDER_PROMPT},
+                        {"role": "user", "content": (
+                            f"Industry: {industry}\n{area['guidance']}\n"
+                            f"Write {per_area} questions.\nExisting questions:\n" +
+                            "\n".join(f"- {text}" for text in existing)
+                        )}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.7
+                )
+            except Exception as e:
+                print(f"BANK BUILD FAILED for {industry}/{area['key']}: {str(e)}")
+                continue
+
+            count = 0
+            for text in generated:
+                if not isinstance(text, str) or not text.strip():
+                    continue
+                if any(bank._index.similarity(text, other) >= REDUNDANCY_THRESHOLD for other in existing):
+                    continue
+                questions.append({"industry": industry, "focus": area["key"], "text": text.strip()})
+                existing.append(text)
+                count += 1
+            added[f"{industry}/{area['key']}"] = count
+            print(f"BANK BUILD: {industry}/{area['key']} +{count}")
+
+    with open(path, "w") as f:
+        json.dump({"questions": questions}, f, indent=2)
+    return added
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Brainstorming question bank utilities")
+    parser.add_argument("--build", action="store_true", help="Generate new questions with the LLM (needs OPENAI_API_KEY)")
+    parser.add_argument("--stats", action="store_true", help="Print question counts per industry and focus area")
+    parser.add_argument("--industries", nargs="*", default=None, help="Industries to build (default: all in the bank)")
+    parser.add_argument("--per-area", type=int, default=4)
+    parser.add_argument("--path", default=QUESTION_BANK_PATH)
+    args = parser.parse_args()
+
+    if args.build:
+        from openai import OpenAI
+
+        industries = args.industries or sorted(
+            {q["industry"] for q in load_bank(args.path).questions} - {GENERIC_INDUSTRY}
+        )
+        result = build_bank(OpenAI(), industries, args.per_area, args.path)
+        print(json.dumps(result, indent=2))
+    elif args.stats:
+        counts: Dict[str, int] = {}
+        for question in load_bank(args.path).questions:
+            key = f"{question['industry']}/{question['focus']}"
+            counts[key] = counts.get(key, 0) + 1
+        print(json.dumps(dict(sorted(counts.items())), indent=2))
+    else:
+        parser.print_help()
@@ -0,0 +1,205 @@
+"""
+Process-wide rate limiting and scheduling for outbound LLM calls.
+
+Each model has two token buckets (requests per minute and tokens per minute).
+Callers wait in a per-model priority queue, so interactive chat turns are
+admitted before enrichment work (TIC enhancement, benchmark generation) and
+background work (evaluation). Queue depth and wait times are tracked per
+priority class so the UI can surface backpressure.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Optional
+
+PRIORITIES = {"interactive": 0, "enrichment": 1, "background": 2}
+
+# Longest a caller of each class will queue before giving up
+DEFAULT_MAX_WAIT = {"interactive": 30.0, "enrichment": 60.0, "background": 120.0}
+
+# Applied to models without an explicit entry in the config
+DEFAULT_LIMITS = {"rpm": 500, "tpm": 200000}
+
+# Average wait (seconds) above which the UI reports the service as busy
+BUSY_WAIT_THRESHOLD = 2.0
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited longer than its priority class allows"""
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate else float('inf')
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        # Positive delta charges more (may go into debt), negative refunds
+        self.level = min(self.capacity, self.level - delta)
+
+
+class _ModelState:
+    def __init__(self, limits: Dict[str, float]):
+        self.requests = TokenBucket(limits.get("rpm", DEFAULT_LIMITS["rpm"]))
+        self.tokens = TokenBucket(limits.get("tpm", DEFAULT_LIMITS["tpm"]))
+        self.queue = []
+
+    def time_until(self, tokens: float, now: float) -> float:
+        return max(self.requests.time_until(1, now), self.tokens.time_until(tokens, now))
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self._cond = threading.Condition()
+        self._limits = dict(limits or {})
+        self._models: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+        self._queued = {name: 0 for name in PRIORITIES}
+        self._stats = {
+            name: {"admitted": 0, "total_wait": 0.0, "max_wait": 0.0, "timeouts": 0, "recent_wait": 0.0}
+            for name in PRIORITIES
+        }
+
+    def configure(self, limits: Dict[str, Dict[str, float]]):
+        """Apply new per-model limits; buckets for changed models are rebuilt"""
+        with self._cond:
+            for model, model_limits in limits.items():
+                if self._limits.get(model) != model_limits and model in self._models:
+                    queue = self._models[model].queue
+                    self._models[model] = _ModelState(model_limits)
+                    self._models[model].queue = queue
+            self._limits = dict(limits)
+            self._cond.notify_all()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = _ModelState(self._limits.get(model, DEFAULT_LIMITS))
+            self._models[model] = state
+        return state
+
+    def acquire(self, model: str, tokens: float, priority: str = "interactive",
+                max_wait: Optional[float] = None) -> float:
+        """Block until the call may be sent; returns seconds waited"""
+        priority = priority if priority in PRIORITIES else "interactive"
+        max_wait = DEFAULT_MAX_WAIT[priority] if max_wait is None else max_wait
+        started = time.monotonic()
+
+        with self._cond:
+            state = self._state(model)
+            ticket = (PRIORITIES[priority], next(self._seq))
+            heapq.heappush(state.queue, ticket)
+            self._queued[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if state.queue[0] == ticket:
+                        wait = state.time_until(tokens, now)
+                        if wait <= 0:
+                            state.requests.take(1, now)
+                            state.tokens.take(tokens, now)
+                            break
+                    elapsed = now - started
+                    if elapsed + (wait or 0.0) > max_wait:
+                        self._stats[priority]["timeouts"] += 1
+                        raise RateLimitTimeout(
+                            f"{model} is saturated: {priority} call would wait more than {max_wait:.0f}s"
+                        )
+                    # Head of queue sleeps until its buckets refill; others until the head moves
+                    self._cond.wait(timeout=wait if wait else 0.5)
+            finally:
+                state.queue.remove(ticket)
+                heapq.heapify(state.queue)
+                self._queued[priority] -= 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            stats = self._stats[priority]
+            stats["admitted"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+            # Exponentially weighted so the UI reacts to current load, not history
+            stats["recent_wait"] = 0.8 * stats["recent_wait"] + 0.2 * waited
+
+        if waited > 0.05:
+            print(f"RATE LIMITER: {priority} call to {model} waited {waited:.2f}s")
+        return waited
+
+    def try_acquire(self, model: str, tokens: float) -> bool:
+        """Admit a call only if nobody is queued and both buckets have room now (optional extra work)"""
+        with self._cond:
+            state = self._state(model)
+            now = time.monotonic()
+            if state.queue or state.time_until(tokens, now) > 0:
+                return False
+            state.requests.take(1, now)
+            state.tokens.take(tokens, now)
+            return True
+
+    def settle(self, model: str, estimated_tokens: float, actual_tokens: float):
+        """Correct the token bucket once real usage is known"""
+        with self._cond:
+            self._state(model).tokens.adjust(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def penalize(self, model: str, seconds: float = 5.0):
+        """Back off after a provider 429: drain the request bucket for roughly `seconds`"""
+        with self._cond:
+            state = self._state(model)
+            state.requests.level = -state.requests.rate * seconds
+        print(f"RATE LIMITER: provider throttled {model}, backing off {seconds:.1f}s")
+
+    def pressure(self) -> Dict[str, Any]:
+        """Snapshot for dashboards and UI backpressure"""
+        with self._cond:
+            per_priority = {
+                name: {
+                    "queued": self._queued[name],
+                    "admitted": stats["admitted"],
+                    "avg_wait_ms": round(1000 * stats["total_wait"] / stats["admitted"], 1) if stats["admitted"] else 0.0,
+                    "max_wait_ms": round(1000 * stats["max_wait"], 1),
+                    "recent_wait_ms": round(1000 * stats["recent_wait"], 1),
+                    "timeouts": stats["timeouts"]
+                }
+                for name, stats in self._stats.items()
+            }
+            interactive = self._stats["interactive"]
+            return {
+                "queue_depth": sum(self._queued.values()),
+                "busy": self._queued["interactive"] > 0 or interactive["recent_wait"] > BUSY_WAIT_THRESHOLD,
+                "priorities": per_priority
+            }
+
+
+default_limiter = RateLimiter()
+
+
+def estimate_tokens(kwargs: Dict[str, Any]) -> int:
+    """Rough prompt+completion token estimate (4 chars per token) used to reserve TPM"""
+    text_chars = 0
+    for key in ("messages", "input", "instructions", "tools"):
+        if key in kwargs and kwargs[key] is not None:
+            value = kwargs[key]
+            text_chars += len(value) if isinstance(value, str) else len(repr(value))
+    completion = kwargs.get("max_tokens") or kwargs.get("max_output_tokens") or 500
+    return text_chars // 4 + completion
@@ -0,0 +1,174 @@
+"""
+Pre-rendered, content-addressed evaluation report artifacts.
+
+A report is rendered once into a self-contained HTML page whose file name is
+a hash of the report JSON, its display context (session name, industry,
+benchmark companies) and the renderer version. The page is written atomically
+under static/reports/, which Streamlit serves at /app/static/reports/ when
+static serving is enabled (.streamlit/config.toml), so a report can be
+shared by link and viewing it costs neither LLM calls nor widget rendering.
+The same key is reused until the report changes.
+"""
+
+import hashlib
+import html
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+# Bump when the template changes so existing artifacts are re-rendered
+RENDERER_VERSION = 1
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+REPORT_SUBDIR = 'reports'
+
+# Rendered pages kept in memory for inline display
+MAX_CACHED_PAGES = 64
+
+CRITERIA = [
+    ("📈", "Market Opportunity & Growth"),
+    ("🏆", "USP & Competitive Advantage"),
+    ("🎯", "Value Proposition"),
+    ("🌱", "Sustainability"),
+    ("⚙️", "Execution Feasibility"),
+]
+
+RECOMMENDATION_COLORS = {'YES': '#1a7f37', 'MAYBE': '#d97706', 'NEUTRAL': '#6b7280', 'NO': '#dc2626'}
+
+_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; max-width: 880px; margin: 2rem auto; padding: 0 1rem; color: #1f2937; line-height: 1.5; }
+h1 { margin-bottom: 0.2rem; } .muted { color: #6b7280; }
+.header { display: flex; gap: 2rem; align-items: baseline; margin: 1rem 0; }
+.score { font-size: 2.2rem; font-weight: 700; }
+.badge { padding: 0.2rem 0.7rem; border-radius: 999px; color: white; font-weight: 600; }
+section { border: 1px solid #e5e7eb; border-radius: 8px; padding: 0.8rem 1rem; margin: 0.8rem 0; }
+section h2 { font-size: 1.1rem; margin: 0 0 0.4rem 0; display: flex; justify-content: space-between; }
+table { border-collapse: collapse; width: 100%; } td, th { text-align: left; padding: 0.3rem 0.5rem; border-bottom: 1px solid #f3f4f6; }
+"""
+
+
+def _text(value: Any) -> str:
+    return html.escape(str(value if value is not None else "")).replace("\n", "<br>")
+
+
+def report_key(report: Dict[str, Any], context: Dict[str, Any]) -> str:
+    canonical = json.dumps({"report": report, "context": context, "renderer": RENDERER_VERSION},
+                           sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+def render_report_html(report: Dict[str, Any], context: Dict[str, Any]) -> str:
+    feedback = report.get('evaluation_feedback') or {}
+    overall = feedback.get('overall') or {}
+    recommendation = str(report.get('ai_investment_recommendation', ''))
+    companies = context.get('selected_companies') or []
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{_text(context.get('session_name') or 'Evaluation Report')}</title>",
+        f"<style>{_STYLE}</style></head><body>",
+        f"<h1>📊 {_text(context.get('session_name') or 'AI Evaluation Report')}</h1>",
+        f"<div class='muted'>{_text(context.get('industry'))}</div>",
+        "<div class='header'>",
+        f"<div><div class='muted'>Overall Score</div><div class='score'>{_text(overall.get('score'))}</div></div>",
+        f"<div><div class='muted'>Investment Recommendation</div><span class='badge' "
+        f"style='background:{RECOMMENDATION_COLORS.get(recommendation, '#6b7280')}'>{_text(recommendation)}</span></div>",
+        "</div>",
+        f"<p><strong>Investment Rationale:</strong> {_text(report.get('investment_rationale'))}</p>",
+        f"<section><h2>💬 Detailed Feedback</h2><p>{_text(report.get('detailed_feedback', 'No detailed feedback available'))}</p></section>",
+    ]
+
+    for icon, criterion in CRITERIA:
+        item = feedback.get(criterion) or {}
+        parts.append(
+            f"<section><h2><span>{icon} {_text(criterion)}</span><span>{_text(item.get('score'))}</span></h2>"
+            f"<p>{_text(item.get('rationale'))}</p></section>"
+        )
+    if overall.get('feedback'):
+        parts.append(f"<section><h2>🧭 Executive Summary</h2><p>{_text(overall['feedback'])}</p></section>")
+
+    drivers = report.get('paradigm_shift_drivers') or []
+    parts.append("<section><h2>🔮 Paradigm Shift Drivers</h2>")
+    if drivers:
+        parts.append("<ol>" + "".join(f"<li>{_text(driver)}</li>" for driver in drivers) + "</ol>")
+    else:
+        parts.append("<p class='muted'>Paradigm shift analysis not available</p>")
+    parts.append("</section>")
+
+    parts.append("<section><h2>🏢 Benchmark Companies</h2>")
+    parts.append("<ul>" + "".join(f"<li>{_text(company)}</li>" for company in companies) + "</ul>")
+    if report.get('benchmark_insights'):
+        parts.append(f"<p><strong>Strategic Insights:</strong> {_text(report['benchmark_insights'])}</p>")
+    parts.append("</section>")
+
+    attractiveness = report.get('investment_attractiveness') or {}
+    if attractiveness:
+        parts.append("<section><h2><span>💰 Investment Attractiveness</span>"
+                     f"<span>{_text(attractiveness.get('total'))}</span></h2><table>")
+        for criterion, item in attractiveness.items():
+            if isinstance(item, dict):
+                parts.append(f"<tr><th>{_text(criterion)}</th><td>{_text(item.get('score'))}</td>"
+                             f"<td>{_text(item.get('rationale'))}</td></tr>")
+        parts.append("</table></section>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+class ReportArtifacts:
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.directory = os.path.join(static_dir, REPORT_SUBDIR)
+        self._lock = threading.Lock()
+        self._pages: "OrderedDict[str, str]" = OrderedDict()
+        self._stats = {"rendered": 0, "reused": 0}
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.html")
+
+    def url_for(self, key: str) -> str:
+        """Relative URL under Streamlit's static file serving"""
+        return f"app/static/{REPORT_SUBDIR}/{key}.html"
+
+    def get_or_render(self, report: Dict[str, Any], context: Dict[str, Any]) -> Tuple[str, str]:
+        """Return (key, html), rendering and writing the artifact only if this content is new"""
+        key = report_key(report, context)
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self._stats["reused"] += 1
+                return key, page
+
+        path = self.path_for(key)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                page = f.read()
+            reused = True
+        else:
+            page = render_report_html(report, context)
+            os.makedirs(self.directory, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees a partial page
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(page)
+            os.replace(tmp_path, path)
+            reused = False
+            print(f"REPORT ARTIFACT RENDERED: {key}")
+
+        with self._lock:
+            self._pages[key] = page
+            while len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+            self._stats["reused" if reused else "rendered"] += 1
+        return key, page
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_memory": len(self._pages)}
+
+
+default_artifacts = ReportArtifacts()
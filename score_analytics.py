@@ -0,0 +1,260 @@
+"""
+Columnar analytics over evaluation scores across sessions.
+
+When a report is generated its scores ("3/5", "18/25") are parsed into
+numbers and written to the evaluation_scores table. Each process keeps a
+columnar copy in numpy arrays (one float column per criterion plus an
+industry code column), refreshed incrementally from the table, so portfolio
+questions — per-industry means, percentiles, score distributions and the
+percentile rank of one idea — are vectorized array operations instead of
+parsing every session's JSON.
+
+    python score_analytics.py --backfill   # load scores from existing reports
+    python score_analytics.py --summary
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import session_store
+
+# evaluation_feedback keys -> column names; overall is out of 25, the rest out of 5
+CRITERIA = {
+    "overall": "overall",
+    "Market Opportunity & Growth": "market",
+    "USP & Competitive Advantage": "usp",
+    "Value Proposition": "value",
+    "Sustainability": "sustainability",
+    "Execution Feasibility": "execution",
+}
+COLUMNS = list(CRITERIA.values())
+MAX_SCORES = {column: (25.0 if column == "overall" else 5.0) for column in COLUMNS}
+
+_SCORE_RE = re.compile(r"(-?\d+(?:\.\d+)?)")
+
+
+def parse_score(value: Any) -> float:
+    """'3/5' -> 3.0, '18/25' -> 18.0, 4 -> 4.0; NaN when missing or unparseable"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _SCORE_RE.search(str(value or ""))
+    return float(match.group(1)) if match else math.nan
+
+
+def extract_scores(report: Dict[str, Any]) -> Dict[str, float]:
+    feedback = (report or {}).get("evaluation_feedback") or {}
+    return {column: parse_score((feedback.get(key) or {}).get("score")) for key, column in CRITERIA.items()}
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS evaluation_scores (
+            session_id INTEGER PRIMARY KEY,
+            industry TEXT,
+            {', '.join(f"{column} REAL" for column in COLUMNS)},
+            seq INTEGER,
+            updated_at REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluation_scores_seq ON evaluation_scores(seq)")
+
+
+def record_scores(conn: sqlite3.Connection, session_id: int, industry: str, report: Dict[str, Any]) -> Dict[str, float]:
+    """Extract a report's scores and upsert them; call at report time"""
+    scores = extract_scores(report)
+    values = [None if math.isnan(scores[column]) else scores[column] for column in COLUMNS]
+    # seq is assigned under SQLite's write lock, so readers can page by it without clock skew issues
+    conn.execute(
+        f"INSERT INTO evaluation_scores (session_id, industry, {', '.join(COLUMNS)}, seq, updated_at) "
+        f"VALUES (?, ?, {', '.join('?' * len(COLUMNS))}, "
+        f"(SELECT COALESCE(MAX(seq), 0) + 1 FROM evaluation_scores), ?) "
+        f"ON CONFLICT(session_id) DO UPDATE SET industry = excluded.industry, "
+        f"{', '.join(f'{column} = excluded.{column}' for column in COLUMNS)}, "
+        f"seq = excluded.seq, updated_at = excluded.updated_at",
+        (session_id, industry, *values, time.time())
+    )
+    return scores
+
+
+class ScoreStore:
+    """Per-process columnar copy of evaluation_scores"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        ensure_schema(conn)
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._industries: List[str] = []
+        self._industry_code: Dict[str, int] = {}
+        self._industry = np.zeros(64, dtype=np.int32)
+        self._scores = {column: np.full(64, np.nan) for column in COLUMNS}
+
+    def _grow(self, needed: int):
+        capacity = len(self._industry)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._industry = np.resize(self._industry, capacity)
+        for column in COLUMNS:
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = self._scores[column][:self._size]
+            self._scores[column] = grown
+
+    def refresh(self):
+        """Apply rows inserted or re-scored since the last refresh"""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT session_id, industry, {', '.join(COLUMNS)}, seq FROM evaluation_scores "
+                f"WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            ).fetchall()
+            if not rows:
+                return
+            self._grow(self._size + len(rows))
+            for session_id, industry, *values in rows:
+                seq = values.pop()
+                row = self._row_of.get(session_id)
+                if row is None:
+                    row = self._size
+                    self._row_of[session_id] = row
+                    self._size += 1
+                industry = industry or "Other"
+                if industry not in self._industry_code:
+                    self._industry_code[industry] = len(self._industries)
+                    self._industries.append(industry)
+                self._industry[row] = self._industry_code[industry]
+                for column, value in zip(COLUMNS, values):
+                    self._scores[column][row] = np.nan if value is None else value
+                self._last_seq = seq
+
+    def _column(self, column: str, industry: Optional[str] = None) -> np.ndarray:
+        values = self._scores[column][:self._size]
+        if industry is not None:
+            code = self._industry_code.get(industry)
+            if code is None:
+                return values[:0]
+            values = values[self._industry[:self._size] == code]
+        return values[~np.isnan(values)]
+
+    def count(self, industry: Optional[str] = None) -> int:
+        self.refresh()
+        with self._lock:
+            return int(self._column("overall", industry).size)
+
+    def means_by_industry(self, column: str = "overall") -> Dict[str, Dict[str, float]]:
+        """Mean and count per industry in one bincount pass"""
+        self.refresh()
+        with self._lock:
+            values = self._scores[column][:self._size]
+            present = ~np.isnan(values)
+            codes = self._industry[:self._size][present]
+            counts = np.bincount(codes, minlength=len(self._industries))
+            sums = np.bincount(codes, weights=values[present], minlength=len(self._industries))
+            return {
+                industry: {"mean": round(float(sums[code] / counts[code]), 2), "count": int(counts[code])}
+                for code, industry in enumerate(self._industries) if counts[code]
+            }
+
+    def percentiles(self, column: str = "overall", quantiles=(25, 50, 75, 90),
+                    industry: Optional[str] = None) -> Dict[int, float]:
+        self.refresh()
+        with self._lock:
+            values = self._column(column, industry)
+            if not values.size:
+                return {}
+            return {q: round(float(v), 2) for q, v in zip(quantiles, np.percentile(values, quantiles))}
+
+    def distribution(self, column: str = "overall", industry: Optional[str] = None) -> Dict[int, int]:
+        """How many ideas got each whole-number score"""
+        self.refresh()
+        with self._lock:
+            values = self._column(column, industry)
+            counts = np.bincount(np.clip(np.rint(values), 0, MAX_SCORES[column]).astype(np.int64),
+                                 minlength=int(MAX_SCORES[column]) + 1)
+            return {score: int(n) for score, n in enumerate(counts)}
+
+    def percentile_rank(self, column: str, value: float, industry: Optional[str] = None) -> Optional[float]:
+        """Share of the portfolio scoring below value (ties count half), 0-100"""
+        if value is None or math.isnan(value):
+            return None
+        self.refresh()
+        with self._lock:
+            values = self._column(column, industry)
+            if not values.size:
+                return None
+            below = np.count_nonzero(values < value)
+            equal = np.count_nonzero(values == value)
+            return round(float(100.0 * (below + 0.5 * equal) / values.size), 1)
+
+    def rank_report(self, report: Dict[str, Any], industry: str) -> Dict[str, Dict[str, Any]]:
+        """Percentile ranks for every criterion of one report, overall and within its industry"""
+        scores = extract_scores(report)
+        return {
+            column: {
+                "score": None if math.isnan(score) else score,
+                "portfolio": self.percentile_rank(column, score),
+                "industry": self.percentile_rank(column, score, industry)
+            }
+            for column, score in scores.items()
+        }
+
+
+def backfill(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """Score every existing report; pages through sessions so memory stays flat"""
+    from export_sessions import iter_sessions
+
+    ensure_schema(conn)
+    recorded = 0
+    for session, state in iter_sessions(conn, batch_size=batch_size):
+        report = state.get("evaluation_report")
+        if report:
+            record_scores(conn, session["session_id"], session["industry"], report)
+            recorded += 1
+    return recorded
+
+
+_shared_stores: Dict[str, ScoreStore] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_store(path: str = session_store.DB_PATH) -> ScoreStore:
+    """One columnar store per database file for the whole process"""
+    with _shared_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = ScoreStore(session_store.connect(path))
+            _shared_stores[path] = store
+        return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluation score analytics")
+    parser.add_argument("--db", default=session_store.DB_PATH)
+    parser.add_argument("--backfill", action="store_true", help="Extract scores from all existing reports")
+    parser.add_argument("--summary", action="store_true", help="Print per-industry means and percentiles")
+    args = parser.parse_args()
+
+    if args.backfill:
+        print(f"BACKFILLED {backfill(session_store.connect(args.db))} REPORTS")
+    if args.summary or not args.backfill:
+        store = shared_store(args.db)
+        print(json.dumps({
+            column: {
+                "by_industry": store.means_by_industry(column),
+                "percentiles": store.percentiles(column),
+                "distribution": store.distribution(column)
+            }
+            for column in COLUMNS
+        }, indent=2))
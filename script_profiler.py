@@ -0,0 +1,190 @@
+"""
+Opt-in per-rerun profiling of the Streamlit script.
+
+Every rerun executes app.py top to bottom, so there is no single function to
+wrap. Instead the script calls mark("section") at its section boundaries: each
+mark ends the running section and starts the next one. The same sequence covers
+reruns cut short by st.rerun(), st.stop() or an error: the next rerun closes
+the open section at the last thing the old one was seen doing (a mark or the
+end of a timed call), so idle time between reruns is not counted. Functions
+decorated with @profiled (orchestrator entry points, state load/save) are timed
+as calls within their section.
+
+With cProfile enabled, each rerun's stats are written to
+PROFILE_DIR/rerun-<session>-<ms>.prof (open with pstats or snakeviz) and the
+slowest functions are kept for the panel. cProfile only sees the script thread;
+LLM calls that run on worker threads appear as waits. When another profiler is
+already active (Python 3.12+ allows one at a time), the rerun is timed without
+cProfile.
+
+Profilers live in st.session_state, one per browser session, and keep the last
+HISTORY reruns. With profiling off, mark() and @profiled cost one contextvar
+read.
+
+    SCRIPT_PROFILE=off        # default
+    SCRIPT_PROFILE=timing     # sections and calls, every session
+    SCRIPT_PROFILE=cprofile   # plus cProfile dumps
+    ?profile=timing           # timing for one browser session only
+"""
+
+import contextvars
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+PROFILE_DIR = "profiles"
+
+# Reruns kept per browser session
+HISTORY = 50
+
+# Functions listed from each cProfile dump
+TOP_FUNCTIONS = 15
+
+# Profiler for the current script run; None when profiling is off
+current_profiler: contextvars.ContextVar = contextvars.ContextVar('script_profiler', default=None)
+
+
+class ScriptProfiler:
+    def __init__(self, history: int = HISTORY):
+        self._lock = threading.Lock()
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._run: Optional[Dict[str, Any]] = None
+        self._section: Optional[str] = None
+        self._section_started = 0.0
+        self._last_activity = 0.0
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._stats = {"reruns": 0, "interrupted": 0, "cprofile_busy": 0}
+
+    def begin(self, label: Any = None, cprofile_dir: Optional[str] = None):
+        """Start timing a rerun; closes the previous one if it never reached finish()"""
+        if self._run is not None:
+            self._close(interrupted=True)
+        now = time.perf_counter()
+        self._run = {"label": label, "started_at": time.time(), "started": now,
+                     "sections": {}, "calls": {}, "cprofile": None}
+        self._section = "setup"
+        self._section_started = now
+        self._last_activity = now
+        self._cprofile_dir = cprofile_dir
+        if cprofile_dir:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._cprofile = profile
+            except ValueError:
+                # Another profiler is active in this process
+                self._stats["cprofile_busy"] += 1
+
+    def mark(self, section: str):
+        """End the running section and start `section`"""
+        if self._run is None:
+            return
+        self._close_section(time.perf_counter())
+        self._section = section
+
+    def _close_section(self, now: float):
+        sections = self._run["sections"]
+        sections[self._section] = sections.get(self._section, 0.0) + (now - self._section_started)
+        self._section_started = now
+        self._last_activity = now
+
+    def add_call(self, name: str, elapsed: float):
+        if self._run is None:
+            return
+        count, total = self._run["calls"].get(name, (0, 0.0))
+        self._run["calls"][name] = (count + 1, total + elapsed)
+        self._last_activity = time.perf_counter()
+
+    def finish(self):
+        if self._run is not None:
+            self._close(interrupted=False)
+
+    def _close(self, interrupted: bool):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._run["cprofile"] = self._dump(self._cprofile)
+            self._cprofile = None
+        ended = self._last_activity if interrupted else time.perf_counter()
+        self._close_section(ended)
+        run, self._run = self._run, None
+        with self._lock:
+            self.history.append({
+                "label": run["label"],
+                "started_at": run["started_at"],
+                "total_ms": round(1000 * (ended - run["started"]), 1),
+                "interrupted": interrupted,
+                "sections": {name: round(1000 * elapsed, 1) for name, elapsed in run["sections"].items()},
+                "calls": {name: {"count": count, "ms": round(1000 * total, 1)}
+                          for name, (count, total) in run["calls"].items()},
+                "cprofile": run["cprofile"]
+            })
+            self._stats["reruns"] += 1
+            if interrupted:
+                self._stats["interrupted"] += 1
+
+    def _dump(self, profile: cProfile.Profile) -> Dict[str, Any]:
+        path = None
+        try:
+            os.makedirs(self._cprofile_dir, exist_ok=True)
+            path = os.path.join(self._cprofile_dir, f"rerun-{self._run['label']}-{int(1000 * time.time())}.prof")
+            profile.dump_stats(path)
+        except OSError as e:
+            print(f"SCRIPT PROFILE DUMP FAILED: {str(e)}")
+            path = None
+        stats = pstats.Stats(profile).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        return {
+            "path": path,
+            "top": [
+                {"function": f"{os.path.basename(filename)}:{line}({name})", "calls": calls,
+                 "tottime_ms": round(1000 * tottime, 1), "cumtime_ms": round(1000 * cumtime, 1)}
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in ranked
+            ]
+        }
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per section: reruns seen, median and max ms over the kept history"""
+        with self._lock:
+            samples: Dict[str, List[float]] = {}
+            for run in self.history:
+                for name, elapsed in run["sections"].items():
+                    samples.setdefault(name, []).append(elapsed)
+        result = {}
+        for name, values in samples.items():
+            values.sort()
+            result[name] = {"reruns": len(values), "p50_ms": values[len(values) // 2], "max_ms": values[-1]}
+        return result
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def mark(section: str):
+    profiler = current_profiler.get()
+    if profiler is not None:
+        profiler.mark(section)
+
+
+def profiled(fn: Callable) -> Callable:
+    """Time calls of fn within the current rerun"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = current_profiler.get()
+        if profiler is None:
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.add_call(fn.__qualname__, time.perf_counter() - started)
+    return wrapper
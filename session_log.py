@@ -0,0 +1,255 @@
+"""
+Append-only event log of session state, with periodic snapshots.
+
+Every save of a session's business_state appends one event: the diff from
+the state the writer read to the state it wrote, as a list of set/delete
+operations on key paths. The event's sequence number is the state version,
+so compare-and-swap is the insert of the next sequence number; a writer that
+lost the race hits the primary key and merges (see session_store).
+
+Every SNAPSHOT_EVERY events the full state is stored as a snapshot. Loading a
+session reads the latest snapshot and replays the few events after it.
+Snapshots and events are never deleted, so the state at any past version can
+be rebuilt from the nearest snapshot before it: use this to audit or debug a
+session.
+
+Sessions saved before the log existed keep their state in the
+business_sessions.business_state column. That state is the base for replay
+until the first write, which copies it into a snapshot at its version.
+
+    python session_log.py --session 42                # event history
+    python session_log.py --session 42 --version 17   # state at version 17
+"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Events between full-state snapshots
+SNAPSHOT_EVERY = 25
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_events (
+            session_id INTEGER,
+            seq INTEGER,
+            kind TEXT,
+            ops TEXT,
+            created_at REAL,
+            PRIMARY KEY (session_id, seq)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_snapshots (
+            session_id INTEGER,
+            seq INTEGER,
+            state TEXT,
+            created_at REAL,
+            PRIMARY KEY (session_id, seq)
+        )
+    ''')
+
+
+# ===================================================================
+# DIFF AND REPLAY
+# ===================================================================
+
+def diff(old: Any, new: Any, path: Optional[List[str]] = None) -> List[list]:
+    """Operations turning old into new: ["set", path, value] and ["del", path]; dicts are diffed per key"""
+    path = path or []
+    if old == new:
+        return []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [["set", path, new]]
+    ops = []
+    for key, value in new.items():
+        if key not in old:
+            ops.append(["set", path + [key], value])
+        else:
+            ops += diff(old[key], value, path + [key])
+    ops += [["del", path + [key]] for key in old if key not in new]
+    return ops
+
+
+def apply_ops(state: Any, ops: List[list]) -> Any:
+    """Apply diff() operations to state in place; returns the (possibly replaced) root"""
+    for op in ops:
+        path = op[1]
+        if not path:
+            state = op[2] if op[0] == "set" else None
+            continue
+        target = state
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        if op[0] == "set":
+            target[path[-1]] = op[2]
+        else:
+            target.pop(path[-1], None)
+    return state
+
+
+def describe(ops: List[list]) -> str:
+    """Event kind: the top-level state keys it touches, e.g. 'phase+tic_progress'"""
+    return "+".join(sorted({op[1][0] if op[1] else "*" for op in ops})) or "noop"
+
+
+def _loads(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return None
+
+
+# ===================================================================
+# SQLITE STORE
+# ===================================================================
+
+def append(conn: sqlite3.Connection, session_id: int, expected_version: int,
+           base_state: Optional[Dict[str, Any]], new_state: Dict[str, Any],
+           snapshot_every: int = SNAPSHOT_EVERY) -> bool:
+    """
+    Record new_state as version expected_version + 1, given that base_state is the
+    stored state at expected_version. False if that version was already written.
+    Run inside a transaction.
+    """
+    now = time.time()
+    # Normalize both sides the way they are stored, so int keys don't show up as changes
+    base_state = json.loads(json.dumps(base_state or {}))
+    new_state = json.loads(json.dumps(new_state))
+    ops = diff(base_state, new_state)
+    seq = expected_version + 1
+    # First write to a session saved before the log existed: its state becomes the base snapshot
+    conn.execute(
+        "INSERT OR IGNORE INTO session_snapshots (session_id, seq, state, created_at) "
+        "SELECT id, version, business_state, ? FROM business_sessions "
+        "WHERE id = ? AND business_state IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM session_snapshots WHERE session_id = ?)",
+        (now, session_id, session_id)
+    )
+    try:
+        conn.execute(
+            "INSERT INTO session_events (session_id, seq, kind, ops, created_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, seq, describe(ops), json.dumps(ops), now)
+        )
+    except sqlite3.IntegrityError:
+        return False
+    conn.execute(
+        "UPDATE business_sessions SET version = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (seq, session_id)
+    )
+    if seq % snapshot_every == 0:
+        save_snapshot(conn, session_id, seq, new_state)
+    return True
+
+
+def save_snapshot(conn: sqlite3.Connection, session_id: int, seq: int, state: Dict[str, Any]):
+    conn.execute(
+        "INSERT OR REPLACE INTO session_snapshots (session_id, seq, state, created_at) VALUES (?, ?, ?, ?)",
+        (session_id, seq, json.dumps(state), time.time())
+    )
+
+
+def load_snapshot(conn: sqlite3.Connection, session_id: int,
+                  at_most: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], int]:
+    """Latest snapshot at or before at_most as (state, seq); (None, 0) if there is none"""
+    row = conn.execute(
+        "SELECT state, seq FROM session_snapshots WHERE session_id = ? AND seq <= ? ORDER BY seq DESC LIMIT 1",
+        (session_id, at_most if at_most is not None else 2 ** 62)
+    ).fetchone()
+    if row:
+        return _loads(row[0]), row[1]
+    # Saved before the log existed and not written since
+    row = conn.execute(
+        "SELECT business_state, version FROM business_sessions WHERE id = ? AND business_state IS NOT NULL",
+        (session_id,)
+    ).fetchone()
+    if row and (at_most is None or (row[1] or 0) <= at_most):
+        return _loads(row[0]), row[1] or 0
+    return None, 0
+
+
+def load_events(conn: sqlite3.Connection, session_id: int, after: int = 0,
+                upto: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Events with after < seq <= upto, oldest first"""
+    rows = conn.execute(
+        "SELECT seq, kind, ops, created_at FROM session_events WHERE session_id = ? AND seq > ? AND seq <= ? "
+        "ORDER BY seq",
+        (session_id, after, upto if upto is not None else 2 ** 62)
+    ).fetchall()
+    return [{"seq": seq, "kind": kind, "ops": json.loads(ops), "created_at": created_at}
+            for seq, kind, ops, created_at in rows]
+
+
+def load_states(conn: sqlite3.Connection, session_ids: Iterable[int]) -> Dict[int, Tuple[Optional[Dict[str, Any]], int]]:
+    """Current (state, version) of existing sessions among session_ids: three queries for the lot"""
+    ids = list(session_ids)
+    if not ids:
+        return {}
+    marks = ",".join("?" * len(ids))
+    rows = conn.execute(
+        f"SELECT id, business_state, version FROM business_sessions WHERE id IN ({marks})", ids
+    ).fetchall()
+    # Base per session: latest snapshot, else a pre-log state column, else nothing at version 0
+    bases = {session_id: (_loads(state_json), version or 0) if state_json else (None, 0)
+             for session_id, state_json, version in rows}
+    for session_id, seq, state_json in conn.execute(
+            f"SELECT s.session_id, s.seq, s.state FROM session_snapshots s JOIN ("
+            f"SELECT session_id, MAX(seq) AS seq FROM session_snapshots WHERE session_id IN ({marks}) "
+            f"GROUP BY session_id) latest ON latest.session_id = s.session_id AND latest.seq = s.seq", ids):
+        bases[session_id] = (_loads(state_json), seq)
+    tails: Dict[int, List[list]] = {}
+    for session_id, seq, ops in conn.execute(
+            f"SELECT e.session_id, e.seq, e.ops FROM session_events e LEFT JOIN ("
+            f"SELECT session_id, MAX(seq) AS seq FROM session_snapshots WHERE session_id IN ({marks}) "
+            f"GROUP BY session_id) latest ON latest.session_id = e.session_id "
+            f"WHERE e.session_id IN ({marks}) AND e.seq > COALESCE(latest.seq, 0) ORDER BY e.session_id, e.seq",
+            ids + ids):
+        tails.setdefault(session_id, []).append((seq, json.loads(ops)))
+    result = {}
+    for session_id, (state, version) in bases.items():
+        for seq, ops in tails.get(session_id, []):
+            if seq > version:
+                state = apply_ops(state if state is not None else {}, ops)
+                version = seq
+        result[session_id] = (state, version)
+    return result
+
+
+def state_at(conn: sqlite3.Connection, session_id: int,
+             version: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], int]:
+    """Rebuild (state, version) as of version (default: latest) from the nearest snapshot"""
+    state, seq = load_snapshot(conn, session_id, version)
+    for event in load_events(conn, session_id, after=seq, upto=version):
+        state = apply_ops(state if state is not None else {}, event["ops"])
+        seq = event["seq"]
+    return state, seq
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import session_store
+
+    parser = argparse.ArgumentParser(description="Inspect and replay a session's event log")
+    parser.add_argument("--db", default=session_store.DB_PATH)
+    parser.add_argument("--session", type=int, required=True)
+    parser.add_argument("--version", type=int, default=None, help="Print the state as of this version")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    if args.version is not None:
+        state, version = state_at(conn, args.session, args.version)
+        print(json.dumps({"session_id": args.session, "version": version, "state": state}, indent=2))
+    else:
+        snapshots = [seq for (seq,) in conn.execute(
+            "SELECT seq FROM session_snapshots WHERE session_id = ? ORDER BY seq", (args.session,))]
+        events = [
+            {"seq": event["seq"], "kind": event["kind"],
+             "at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event["created_at"])),
+             "paths": [".".join(map(str, op[1])) or "*" for op in event["ops"]]}
+            for event in load_events(conn, args.session)
+        ]
+        print(json.dumps({"session_id": args.session, "snapshots": snapshots, "events": events}, indent=2))
@@ -0,0 +1,372 @@
+"""
+SQLite persistence for business sessions.
+
+Session state is written with compare-and-swap on the session's version so
+several app replicas (or several browser tabs) can share one database without
+silently overwriting each other's ``business_state``. When a write loses the
+race, the local changes are three-way merged onto the stored state and retried.
+This module holds the merge rules and that retry loop (merge_and_swap); the
+state itself is read and written through storage.StorageBackend, which keeps
+it in the session event log (see session_log). The business_state column is
+only read, as the base of sessions saved before the log existed.
+
+User turns are idempotent: a turn is keyed by session, state version and
+message text, and a duplicate submit (double click, rerun race, second tab or
+replica) waits for and replays the first submission's reply instead of
+running the turn again.
+
+Run ``python session_store.py --hammer`` to stress one session from several
+processes through storage.SQLiteBackend and verify that no update is lost.
+"""
+
+import copy
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from turn_control import Turn
+
+DB_PATH = 'business_sessions.db'
+
+# Phases only ever move forward, so a merge keeps the furthest one
+PHASE_ORDER = ['tic_collection', 'benchmarking', 'brainstorming', 'evaluation_ready']
+
+# Progress markers that only move forward: a merge keeps the furthest. Both are
+# then recomputed from the merged answers (see _recount), since two tabs
+# confirming the same TIC or answering the same question is one step, not two
+PROGRESS_KEYS = {'completed_count', 'current_question'}
+
+# Brainstorming questions in a full session
+BRAINSTORMING_QUESTIONS = 20
+
+# Fields that are also reset (clarification_attempts goes back to 0 once a TIC
+# is confirmed): the writer saving now wins
+LAST_WRITER_KEYS = {'clarification_attempts'}
+
+MAX_CAS_RETRIES = 5
+
+# How long a finished turn can be replayed, and how long a duplicate waits for an in-flight one
+TURN_REPLAY_TTL = 120
+TURN_WAIT_TIMEOUT = 90
+
+
+class StateConflictError(Exception):
+    """Raised when concurrent edits to a session cannot be merged automatically"""
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """Open the sessions database in autocommit/WAL mode and ensure the schema exists"""
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS business_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            conversation_id TEXT,
+            industry TEXT,
+            business_state TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(business_sessions)")}
+    for column, definition in (('version', 'INTEGER NOT NULL DEFAULT 0'), ('updated_at', 'TIMESTAMP')):
+        if column not in columns:
+            try:
+                conn.execute(f"ALTER TABLE business_sessions ADD COLUMN {column} {definition}")
+            except sqlite3.OperationalError as e:
+                # Another replica starting at the same time added it first
+                if 'duplicate column' not in str(e):
+                    raise
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS state_write_stats (
+            session_id INTEGER PRIMARY KEY,
+            writes INTEGER NOT NULL DEFAULT 0,
+            conflicts INTEGER NOT NULL DEFAULT 0,
+            merges INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS turn_results (
+            turn_key TEXT PRIMARY KEY,
+            session_id INTEGER,
+            response TEXT,
+            created_at REAL
+        )
+    ''')
+    return conn
+
+
+def _record_write(conn: sqlite3.Connection, session_id: int, conflicts: int, merges: int, written: bool = True):
+    conn.execute(
+        "INSERT INTO state_write_stats (session_id, writes, conflicts, merges) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(session_id) DO UPDATE SET writes = writes + excluded.writes, "
+        "conflicts = conflicts + excluded.conflicts, merges = merges + excluded.merges",
+        (session_id, int(written), conflicts, merges)
+    )
+
+
+def _merge_leaf(key: str, base: Any, mine: Any, theirs: Any, path: str) -> Any:
+    if key == 'phase' and mine in PHASE_ORDER and theirs in PHASE_ORDER:
+        return max(mine, theirs, key=PHASE_ORDER.index)
+    if key in PROGRESS_KEYS and isinstance(mine, int) and isinstance(theirs, int):
+        return max(mine, theirs)
+    if key in LAST_WRITER_KEYS:
+        return copy.deepcopy(mine)
+    if key == 'timestamp' and isinstance(mine, str) and isinstance(theirs, str):
+        return max(mine, theirs)
+    if isinstance(mine, list) and isinstance(theirs, list) and isinstance(base, list):
+        # Keep items added on either side, drop items removed on either side
+        removed = [item for item in base if item not in mine or item not in theirs]
+        merged = [item for item in theirs if item not in removed]
+        merged += [item for item in mine if item not in merged and item not in removed]
+        return merged
+    raise StateConflictError(f"Conflicting edits to '{path}'")
+
+
+def merge_states(base: Any, mine: Any, theirs: Any, path: str = '') -> Any:
+    """Three-way merge of local changes (mine) and stored changes (theirs) against base"""
+    if mine == theirs:
+        return copy.deepcopy(mine)
+    if mine == base:
+        return copy.deepcopy(theirs)
+    if theirs == base:
+        return copy.deepcopy(mine)
+
+    if isinstance(mine, dict) and isinstance(theirs, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = {}
+        for key in list(theirs.keys()) + [k for k in mine.keys() if k not in theirs]:
+            child_path = f"{path}.{key}" if path else str(key)
+            if key not in mine:
+                # Deleted locally; keep only if the other side changed it
+                if key in base and base[key] == theirs[key]:
+                    continue
+                merged[key] = copy.deepcopy(theirs[key])
+            elif key not in theirs:
+                if key in base and base[key] == mine[key]:
+                    continue
+                merged[key] = copy.deepcopy(mine[key])
+            else:
+                merged[key] = merge_states(base.get(key), mine[key], theirs[key], child_path)
+        return merged
+
+    key = path.rsplit('.', 1)[-1]
+    return _merge_leaf(key, base, mine, theirs, path)
+
+
+def _recount(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the progress counts of a merged state from the TICs and answers it holds"""
+    tic_progress = state.get('tic_progress')
+    if isinstance(state.get('completed_count'), int) and isinstance(tic_progress, dict):
+        state['completed_count'] = sum(
+            1 for tic in tic_progress.values() if isinstance(tic, dict) and tic.get('status') == 'confirmed'
+        )
+    progress = state.get('brainstorming_progress')
+    if isinstance(progress, dict) and isinstance(progress.get('completed_count'), int):
+        progress['completed_count'] = min(progress['completed_count'], BRAINSTORMING_QUESTIONS)
+        if isinstance(progress.get('current_question'), int):
+            progress['current_question'] = progress['completed_count']
+    return state
+
+
+def merge_and_swap(store: Any, session_id: int, base_state: Optional[Dict[str, Any]], base_version: int,
+                   new_state: Dict[str, Any], max_retries: int = MAX_CAS_RETRIES) -> Tuple[Dict[str, Any], int]:
+    """
+    Persist new_state with compare-and-swap, merging onto concurrent writes.
+    base_state/base_version describe what this writer last read. store has
+    load_state, compare_and_swap_state and record_write (a storage.StorageBackend);
+    compare_and_swap_state also gets the stored state at the expected version, so
+    stores that write diffs (the session event log) need not read it again.
+    Returns the (state, version) now stored. Raises StateConflictError when the
+    edits cannot be merged or retries are exhausted.
+    """
+    conflicts = 0
+    merges = 0
+    state = new_state
+    expected_version = base_version
+
+    for attempt in range(max_retries + 1):
+        if store.compare_and_swap_state(session_id, expected_version, state, base_state):
+            store.record_write(session_id, conflicts, merges)
+            return state, expected_version + 1
+
+        conflicts += 1
+        stored_state, stored_version = store.load_state(session_id)
+        print(f"STATE CONFLICT: session {session_id} expected v{expected_version}, found v{stored_version}")
+
+        if stored_state is None:
+            # Nothing to merge with (never saved, or unreadable blob)
+            expected_version = stored_version
+            base_state = None
+            continue
+
+        state = _recount(merge_states(base_state or {}, new_state, stored_state))
+        merges += 1
+        base_state = stored_state
+        new_state = state
+        expected_version = stored_version
+        # Small jittered backoff so hot sessions don't livelock
+        time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+
+    store.record_write(session_id, conflicts, merges, written=False)
+    raise StateConflictError(f"Could not save session {session_id} after {max_retries} retries")
+
+
+def turn_key(session_id: int, state_version: int, user_input: str) -> str:
+    """Idempotency key for a user turn: same text against the same saved state is the same turn"""
+    normalized = ' '.join(user_input.split()).lower()
+    return hashlib.sha256(f"{session_id}:{state_version}:{normalized}".encode('utf-8')).hexdigest()
+
+
+def claim_turn(conn: sqlite3.Connection, session_id: int, key: str,
+               wait_timeout: float = TURN_WAIT_TIMEOUT, turn: Optional[Turn] = None) -> Optional[str]:
+    """
+    Claim a turn for processing. Returns None if the caller now owns it, or the
+    reply of an identical earlier/in-flight submission (waiting for it to finish).
+    A caller passing its turn stops waiting when that turn is cancelled or overdue.
+    """
+    conn.execute("DELETE FROM turn_results WHERE created_at < ?", (time.time() - TURN_REPLAY_TTL,))
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO turn_results (turn_key, session_id, response, created_at) VALUES (?, ?, NULL, ?)",
+            (key, session_id, time.time())
+        )
+        if cursor.rowcount == 1:
+            return None
+
+        row = conn.execute("SELECT response FROM turn_results WHERE turn_key = ?", (key,)).fetchone()
+        if row and row[0] is not None:
+            return row[0]
+        if time.monotonic() > deadline:
+            # The owner is stuck or gone; take over
+            conn.execute("DELETE FROM turn_results WHERE turn_key = ? AND response IS NULL", (key,))
+            deadline = time.monotonic() + wait_timeout
+            continue
+        if turn is None:
+            time.sleep(0.25)
+        else:
+            time.sleep(turn.slice(0.25))
+            turn.check()
+
+
+def complete_turn(conn: sqlite3.Connection, key: str, response: str):
+    conn.execute("UPDATE turn_results SET response = ? WHERE turn_key = ?", (response, key))
+
+
+def release_turn(conn: sqlite3.Connection, key: str):
+    """Give up ownership without a reply (e.g. the turn failed) so a retry can run"""
+    conn.execute("DELETE FROM turn_results WHERE turn_key = ? AND response IS NULL", (key,))
+
+
+def get_write_stats(conn: sqlite3.Connection, session_id: int) -> Dict[str, int]:
+    row = conn.execute(
+        "SELECT writes, conflicts, merges FROM state_write_stats WHERE session_id = ?", (session_id,)
+    ).fetchone()
+    if not row:
+        return {"writes": 0, "conflicts": 0, "merges": 0}
+    return {"writes": row[0], "conflicts": row[1], "merges": row[2]}
+
+
+# ===================================================================
+# CONCURRENCY STRESS CHECK
+# ===================================================================
+
+def _hammer_worker(db_path: str, session_id: int, worker_id: int, iterations: int):
+    # storage's StateConflictError: run as a script, this module's own class is __main__'s copy
+    from storage import SQLiteBackend, StateConflictError
+
+    backend = SQLiteBackend(db_path)
+    for i in range(iterations):
+        while True:
+            base_state, base_version = backend.load_state(session_id)
+            new_state = copy.deepcopy(base_state)
+            if worker_id % 2 == 0:
+                # Brainstorming writer: append an answer
+                progress = new_state['brainstorming_progress']
+                progress['answers'][f"w{worker_id}_{i}"] = {'question': f"Q{i}", 'answer': f"A{i}"}
+            else:
+                # Enrichment writer: enhance a TIC summary
+                tic = new_state['tic_progress'].setdefault(f"tic_w{worker_id}", {'summary': ''})
+                tic[f"enhancement_{i}"] = f"insight {i}"
+            try:
+                backend.save_state(session_id, base_state, base_version, new_state)
+                break
+            except StateConflictError:
+                continue
+    backend.close()
+
+
+def hammer_session(db_path: str, processes: int = 8, iterations: int = 50) -> Dict[str, Any]:
+    """Concurrently update one session from several processes, through the app's storage backend, and check nothing was lost"""
+    import multiprocessing
+
+    from storage import SQLiteBackend
+
+    backend = SQLiteBackend(db_path)
+    initial_state = {
+        'phase': 'brainstorming',
+        'tic_progress': {},
+        'brainstorming_progress': {'current_question': 0, 'completed_count': 0, 'answers': {}}
+    }
+    session_id = backend.create_session("hammer", None, "Other", initial_state)
+
+    started = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=_hammer_worker, args=(db_path, session_id, w, iterations))
+        for w in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    final_state, final_version = backend.load_state(session_id)
+    answers = final_state['brainstorming_progress']['answers']
+    enhancements = sum(
+        len([k for k in tic if k.startswith('enhancement_')]) for tic in final_state['tic_progress'].values()
+    )
+    expected_answers = sum(iterations for w in range(processes) if w % 2 == 0)
+    expected_enhancements = sum(iterations for w in range(processes) if w % 2 == 1)
+    stats = backend.write_stats(session_id)
+    backend.close()
+
+    return {
+        "success": len(answers) == expected_answers and enhancements == expected_enhancements,
+        "data": {
+            "session_id": session_id,
+            "answers": len(answers),
+            "expected_answers": expected_answers,
+            "enhancements": enhancements,
+            "expected_enhancements": expected_enhancements,
+            "final_version": final_version,
+            "elapsed_seconds": round(elapsed, 3),
+            **stats
+        },
+        "message": "No lost updates" if len(answers) == expected_answers else "Lost updates detected"
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Session store utilities")
+    parser.add_argument("--hammer", action="store_true", help="Run the multi-process CAS stress check")
+    parser.add_argument("--db", default=None, help="Database path (defaults to a temporary file)")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.hammer:
+        db_path = args.db or os.path.join(tempfile.mkdtemp(), "hammer.db")
+        result = hammer_session(db_path, args.processes, args.iterations)
+        print(json.dumps(result, indent=2))
+        raise SystemExit(0 if result["success"] else 1)
+    parser.print_help()
@@ -0,0 +1,82 @@
+"""
+Single-flight execution: concurrent calls with the same key share one execution.
+
+The first caller for a key runs the function; callers arriving while it is in
+flight block and receive the same result (or exception). A caller that passes
+its turn waits in short slices and stops waiting once that turn is cancelled
+or past its deadline. Suppressed duplicates
+are counted per label so the sidebar can show how much work was saved.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from turn_control import Turn
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, label: str, field: str):
+        stats = self._stats.setdefault(label, {"executed": 0, "suppressed": 0})
+        stats[field] += 1
+
+    def do(self, key: str, fn: Callable[[], Any], label: str = "default",
+           turn: Optional[Turn] = None) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key; returns (result, shared) where shared means a duplicate was coalesced"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._count(label, "suppressed")
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._count(label, "executed")
+                leader = True
+
+        if not leader:
+            print(f"SINGLE-FLIGHT [{label}]: duplicate request coalesced")
+            if turn is None:
+                call.done.wait()
+            else:
+                while not call.done.wait(turn.slice()):
+                    turn.check()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def record_suppressed(self, label: str):
+        """Count a duplicate suppressed outside do() (e.g. a replayed turn)"""
+        with self._lock:
+            self._count(label, "suppressed")
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {label: dict(stats) for label, stats in self._stats.items()}
+
+
+default_group = SingleFlight()
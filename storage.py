@@ -0,0 +1,879 @@
+"""
+Pluggable storage for sessions, session state, chat messages and reports.
+
+The app talks to a StorageBackend instead of issuing SQL inline, so the
+store can be swapped: SQLiteBackend is the default and keeps the existing
+business_sessions schema (plus session_messages and session_reports);
+MemoryBackend keeps everything in process dictionaries, for tests that should
+not touch disk. A server database for multi-node deployments is one more
+subclass.
+
+A backend holds session state only: sessions, state, messages, reports and
+turn claims. The app's other tables (deferred jobs, help cache, benchmark
+catalog, cost ledger, scores) live in business_sessions.db next to them and
+are keyed by session id. The app therefore refuses any STORAGE_BACKEND
+other than sqlite until those move behind the interface too.
+
+Session state is event-sourced (see session_log): each save appends the diff
+from the version it read, every SNAPSHOT_EVERY events a full snapshot is
+kept, and loading replays the events after the latest snapshot. Backends
+implement a few primitives: appending the next event (compare-and-swap on
+the version), snapshot and event reads, ranged message reads, report upserts
+and idempotent turn claims. The base class builds load_state, state_at (any
+past version) and save_state (the merge-and-retry loop of session_store) on
+top of them. Every bulk operation (create_sessions, load_states, append_messages,
+save_reports, load_reports) has a default that loops over the single-item
+call. SQLiteBackend overrides them with one transaction or one IN query each.
+States and reports are stored as JSON, so every backend returns what a JSON
+round trip returns (int dict keys come back as strings).
+
+run_conformance() is the contract: any backend must pass its behaviour checks
+and stay within PERF_BUDGETS_MS.
+
+    STORAGE_BACKEND=sqlite   # default, and the only backend the app accepts
+
+    python storage.py --check                  # both backends
+    python storage.py --check --backend memory
+"""
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import session_log
+import session_store
+from session_log import SNAPSHOT_EVERY, apply_ops
+from session_store import StateConflictError, merge_and_swap
+from turn_control import Turn
+
+# Ids per IN (...) query in SQLite bulk reads
+IN_BATCH = 500
+
+
+class StorageError(Exception):
+    """A write failed and was rolled back; the caller may retry it"""
+
+
+def _json_copy(value: Any) -> Any:
+    return json.loads(json.dumps(value))
+
+
+def _timestamp(seconds: Optional[float] = None) -> str:
+    """Same format as SQLite's CURRENT_TIMESTAMP"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))
+
+
+class StorageBackend:
+    """Interface and shared logic; subclasses implement the methods that raise NotImplementedError"""
+
+    name = "base"
+
+    # --- sessions ---
+
+    def create_session(self, name: str, conversation_id: Optional[str], industry: str,
+                       state: Optional[Dict[str, Any]] = None) -> int:
+        raise NotImplementedError
+
+    def create_sessions(self, sessions: Iterable[Dict[str, Any]]) -> List[int]:
+        """Bulk create from dicts with name, conversation_id, industry and optional state"""
+        return [self.create_session(s["name"], s.get("conversation_id"), s.get("industry", ""), s.get("state"))
+                for s in sessions]
+
+    def get_session(self, session_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Sessions newest first, without their state"""
+        raise NotImplementedError
+
+    # --- state ---
+
+    def load_snapshot(self, session_id: int, at_most: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Latest snapshot at or before version at_most as (state, version); (None, 0) if none"""
+        raise NotImplementedError
+
+    def load_events(self, session_id: int, after: int = 0, upto: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events with after < seq <= upto, oldest first: {"seq", "kind", "ops", "created_at"}"""
+        raise NotImplementedError
+
+    def state_at(self, session_id: int, version: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], int]:
+        """(state, version) as of version (default: latest): the nearest snapshot plus the events after it"""
+        state, seq = self.load_snapshot(session_id, version)
+        for event in self.load_events(session_id, after=seq, upto=version):
+            state = apply_ops(state if state is not None else {}, event["ops"])
+            seq = event["seq"]
+        return state, seq
+
+    def load_state(self, session_id: int) -> Tuple[Optional[Dict[str, Any]], int]:
+        """(business_state, version); state is None if never saved"""
+        return self.state_at(session_id)
+
+    def load_states(self, session_ids: Iterable[int]) -> Dict[int, Tuple[Optional[Dict[str, Any]], int]]:
+        """Bulk load_state; unknown sessions are left out"""
+        result = {}
+        for session_id in session_ids:
+            if self.get_session(session_id) is not None:
+                result[session_id] = self.load_state(session_id)
+        return result
+
+    def compare_and_swap_state(self, session_id: int, expected_version: int, new_state: Dict[str, Any],
+                               base_state: Optional[Dict[str, Any]] = None) -> bool:
+        """Append new_state as version expected_version + 1; base_state is the stored state at expected_version"""
+        raise NotImplementedError
+
+    def record_write(self, session_id: int, conflicts: int, merges: int, written: bool = True):
+        raise NotImplementedError
+
+    def write_stats(self, session_id: int) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def save_state(self, session_id: int, base_state: Optional[Dict[str, Any]], base_version: int,
+                   new_state: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """Compare-and-swap with three-way merge onto concurrent writes (see session_store.merge_and_swap)"""
+        return merge_and_swap(self, session_id, base_state, base_version, new_state)
+
+    # --- messages ---
+
+    def append_messages(self, session_id: int, messages: List[Dict[str, str]]):
+        """Append in order; all or nothing"""
+        raise NotImplementedError
+
+    def load_messages(self, session_id: int, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Messages oldest first, from position offset"""
+        raise NotImplementedError
+
+    def tail_messages(self, session_id: int, limit: int) -> List[Dict[str, str]]:
+        """The last `limit` messages, oldest first; must not slow down as the history grows"""
+        raise NotImplementedError
+
+    def count_messages(self, session_id: int) -> int:
+        raise NotImplementedError
+
+    def delete_messages(self, session_id: int, keep: int = 0):
+        """Delete all but the first `keep` messages"""
+        raise NotImplementedError
+
+    # --- reports ---
+
+    def save_report(self, session_id: int, report: Dict[str, Any]):
+        """Store the session's evaluation report, replacing any earlier one"""
+        raise NotImplementedError
+
+    def save_reports(self, reports: Dict[int, Dict[str, Any]]):
+        for session_id, report in reports.items():
+            self.save_report(session_id, report)
+
+    def load_report(self, session_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def load_reports(self, session_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Bulk load_report; sessions without a report are left out"""
+        result = {}
+        for session_id in session_ids:
+            report = self.load_report(session_id)
+            if report is not None:
+                result[session_id] = report
+        return result
+
+    # --- idempotent turns (see session_store.claim_turn) ---
+
+    def claim_turn(self, session_id: int, key: str, wait_timeout: float = session_store.TURN_WAIT_TIMEOUT,
+                   turn: Optional[Turn] = None) -> Optional[str]:
+        raise NotImplementedError
+
+    def complete_turn(self, key: str, response: str):
+        raise NotImplementedError
+
+    def release_turn(self, key: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str = session_store.DB_PATH):
+        self.path = path
+        self.conn = session_store.connect(path)
+        ensure_schema(self.conn)
+        session_log.ensure_schema(self.conn)
+        # Bulk writes run as one transaction on their own connection, so statements
+        # other threads send through self.conn never end up inside them
+        self._bulk_conn = session_store.connect(path)
+        self._bulk_lock = threading.Lock()
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._bulk_lock:
+            try:
+                self._bulk_conn.execute("BEGIN IMMEDIATE")
+                result = work(self._bulk_conn)
+                self._bulk_conn.execute("COMMIT")
+                return result
+            except BaseException as e:
+                if self._bulk_conn.in_transaction:
+                    self._bulk_conn.execute("ROLLBACK")
+                if isinstance(e, sqlite3.Error):
+                    raise StorageError(str(e)) from e
+                raise
+
+    def _in_batches(self, ids: Iterable[int], query: str) -> List[tuple]:
+        ids = list(ids)
+        rows = []
+        for start in range(0, len(ids), IN_BATCH):
+            batch = ids[start:start + IN_BATCH]
+            rows += self.conn.execute(query.format(",".join("?" * len(batch))), batch).fetchall()
+        return rows
+
+    # --- sessions ---
+
+    @staticmethod
+    def _insert_session(conn: sqlite3.Connection, name: str, conversation_id: Optional[str], industry: str,
+                        state: Optional[Dict[str, Any]]) -> int:
+        session_id = conn.execute(
+            "INSERT INTO business_sessions (name, conversation_id, industry) VALUES (?, ?, ?)",
+            (name, conversation_id, industry)
+        ).lastrowid
+        if state is not None:
+            session_log.save_snapshot(conn, session_id, 0, state)
+        return session_id
+
+    def create_session(self, name, conversation_id, industry, state=None):
+        if state is None:
+            return self._insert_session(self.conn, name, conversation_id, industry, None)
+        return self._transaction(lambda conn: self._insert_session(conn, name, conversation_id, industry, state))
+
+    def create_sessions(self, sessions):
+        return self._transaction(lambda conn: [
+            self._insert_session(conn, s["name"], s.get("conversation_id"), s.get("industry", ""), s.get("state"))
+            for s in sessions
+        ])
+
+    _SESSION_COLUMNS = "id, name, conversation_id, industry, created_at, updated_at, version"
+
+    @staticmethod
+    def _session(row: tuple) -> Dict[str, Any]:
+        session_id, name, conversation_id, industry, created_at, updated_at, version = row
+        return {"id": session_id, "name": name, "conversation_id": conversation_id, "industry": industry,
+                "created_at": created_at, "updated_at": updated_at, "version": version or 0}
+
+    def get_session(self, session_id):
+        row = self.conn.execute(
+            f"SELECT {self._SESSION_COLUMNS} FROM business_sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return self._session(row) if row else None
+
+    def list_sessions(self, limit=None):
+        rows = self.conn.execute(
+            f"SELECT {self._SESSION_COLUMNS} FROM business_sessions ORDER BY created_at DESC, id DESC LIMIT ?",
+            (-1 if limit is None else limit,)
+        ).fetchall()
+        return [self._session(row) for row in rows]
+
+    # --- state ---
+
+    def load_snapshot(self, session_id, at_most=None):
+        return session_log.load_snapshot(self.conn, session_id, at_most)
+
+    def load_events(self, session_id, after=0, upto=None):
+        return session_log.load_events(self.conn, session_id, after, upto)
+
+    def load_states(self, session_ids):
+        result = {}
+        ids = list(session_ids)
+        for start in range(0, len(ids), IN_BATCH):
+            result.update(session_log.load_states(self.conn, ids[start:start + IN_BATCH]))
+        return result
+
+    def compare_and_swap_state(self, session_id, expected_version, new_state, base_state=None):
+        return self._transaction(
+            lambda conn: session_log.append(conn, session_id, expected_version, base_state, new_state)
+        )
+
+    def record_write(self, session_id, conflicts, merges, written=True):
+        session_store._record_write(self.conn, session_id, conflicts, merges, written)
+
+    def write_stats(self, session_id):
+        return session_store.get_write_stats(self.conn, session_id)
+
+    # --- messages ---
+
+    def append_messages(self, session_id, messages):
+        if not messages:
+            return
+        now = time.time()
+        self._transaction(lambda conn: conn.executemany(
+            "INSERT INTO session_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            [(session_id, message["role"], message["content"], now) for message in messages]
+        ))
+
+    def load_messages(self, session_id, offset=0, limit=None):
+        rows = self.conn.execute(
+            "SELECT role, content FROM session_messages WHERE session_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (session_id, -1 if limit is None else limit, offset)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def tail_messages(self, session_id, limit):
+        rows = self.conn.execute(
+            "SELECT role, content FROM session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def count_messages(self, session_id):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM session_messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+    def delete_messages(self, session_id, keep=0):
+        if keep <= 0:
+            self.conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            return
+        row = self.conn.execute(
+            "SELECT id FROM session_messages WHERE session_id = ? ORDER BY id LIMIT 1 OFFSET ?", (session_id, keep - 1)
+        ).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM session_messages WHERE session_id = ? AND id > ?", (session_id, row[0]))
+
+    # --- reports ---
+
+    _UPSERT_REPORT = ("INSERT INTO session_reports (session_id, report, updated_at) VALUES (?, ?, ?) "
+                      "ON CONFLICT(session_id) DO UPDATE SET report = excluded.report, updated_at = excluded.updated_at")
+
+    def save_report(self, session_id, report):
+        self.conn.execute(self._UPSERT_REPORT, (session_id, json.dumps(report), time.time()))
+
+    def save_reports(self, reports):
+        if not reports:
+            return
+        now = time.time()
+        self._transaction(lambda conn: conn.executemany(
+            self._UPSERT_REPORT, [(session_id, json.dumps(report), now) for session_id, report in reports.items()]
+        ))
+
+    def load_report(self, session_id):
+        return self.load_reports([session_id]).get(session_id)
+
+    def load_reports(self, session_ids):
+        session_ids = list(session_ids)
+        result = {
+            session_id: json.loads(report) for session_id, report in self._in_batches(
+                session_ids, "SELECT session_id, report FROM session_reports WHERE session_id IN ({})")
+        }
+        # Reports generated before session_reports existed live only in the state
+        missing = [session_id for session_id in session_ids if session_id not in result]
+        for session_id, (state, _) in self.load_states(missing).items():
+            if state and state.get("evaluation_report"):
+                result[session_id] = state["evaluation_report"]
+        return result
+
+    # --- turns ---
+
+    def claim_turn(self, session_id, key, wait_timeout=session_store.TURN_WAIT_TIMEOUT, turn=None):
+        return session_store.claim_turn(self.conn, session_id, key, wait_timeout, turn)
+
+    def complete_turn(self, key, response):
+        session_store.complete_turn(self.conn, key, response)
+
+    def release_turn(self, key):
+        session_store.release_turn(self.conn, key)
+
+    def close(self):
+        self.conn.close()
+        self._bulk_conn.close()
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Tables SQLiteBackend adds to those session_store.connect creates"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            role TEXT,
+            content TEXT,
+            created_at REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_session_messages_session ON session_messages(session_id, id)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_reports (
+            session_id INTEGER PRIMARY KEY,
+            report TEXT,
+            updated_at REAL
+        )
+    ''')
+
+
+class MemoryBackend(StorageBackend):
+    """Everything in dictionaries under one lock; shared by the threads of one process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._next_id = 1
+        self._sessions: Dict[int, Dict[str, Any]] = {}
+        self._versions: Dict[int, int] = {}
+        # session -> [(seq, kind, ops JSON, created_at)] and [(seq, state JSON)], oldest first
+        self._events: Dict[int, List[Tuple[int, str, str, float]]] = {}
+        self._snapshots: Dict[int, List[Tuple[int, str]]] = {}
+        self._write_stats: Dict[int, Dict[str, int]] = {}
+        self._messages: Dict[int, List[Dict[str, str]]] = {}
+        self._reports: Dict[int, str] = {}
+        self._turns: Dict[str, Dict[str, Any]] = {}
+
+    # --- sessions ---
+
+    def create_session(self, name, conversation_id, industry, state=None):
+        with self._lock:
+            session_id = self._next_id
+            self._next_id += 1
+            self._sessions[session_id] = {
+                "id": session_id, "name": name, "conversation_id": conversation_id, "industry": industry,
+                "created_at": _timestamp(), "updated_at": None
+            }
+            self._versions[session_id] = 0
+            self._events[session_id] = []
+            self._snapshots[session_id] = [(0, json.dumps(state))] if state is not None else []
+            return session_id
+
+    def get_session(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            return {**session, "version": self._versions[session_id]}
+
+    def list_sessions(self, limit=None):
+        with self._lock:
+            ordered = sorted(self._sessions.values(), key=lambda s: (s["created_at"], s["id"]), reverse=True)
+            return [{**session, "version": self._versions[session["id"]]} for session in ordered[:limit]]
+
+    # --- state ---
+
+    def load_snapshot(self, session_id, at_most=None):
+        with self._lock:
+            snapshots = [snapshot for snapshot in self._snapshots.get(session_id, [])
+                         if at_most is None or snapshot[0] <= at_most]
+        if not snapshots:
+            return None, 0
+        seq, state_json = snapshots[-1]
+        return json.loads(state_json), seq
+
+    def load_events(self, session_id, after=0, upto=None):
+        with self._lock:
+            events = [event for event in self._events.get(session_id, [])
+                      if event[0] > after and (upto is None or event[0] <= upto)]
+        return [{"seq": seq, "kind": kind, "ops": json.loads(ops), "created_at": created_at}
+                for seq, kind, ops, created_at in events]
+
+    def compare_and_swap_state(self, session_id, expected_version, new_state, base_state=None):
+        new_state = _json_copy(new_state)
+        ops = session_log.diff(_json_copy(base_state or {}), new_state)
+        seq = expected_version + 1
+        with self._lock:
+            if self._versions.get(session_id) != expected_version:
+                return False
+            self._events[session_id].append((seq, session_log.describe(ops), json.dumps(ops), time.time()))
+            if seq % SNAPSHOT_EVERY == 0:
+                self._snapshots[session_id].append((seq, json.dumps(new_state)))
+            self._versions[session_id] = seq
+            self._sessions[session_id]["updated_at"] = _timestamp()
+            return True
+
+    def record_write(self, session_id, conflicts, merges, written=True):
+        with self._lock:
+            stats = self._write_stats.setdefault(session_id, {"writes": 0, "conflicts": 0, "merges": 0})
+            stats["writes"] += int(written)
+            stats["conflicts"] += conflicts
+            stats["merges"] += merges
+
+    def write_stats(self, session_id):
+        with self._lock:
+            return dict(self._write_stats.get(session_id, {"writes": 0, "conflicts": 0, "merges": 0}))
+
+    # --- messages ---
+
+    def append_messages(self, session_id, messages):
+        copies = [{"role": message["role"], "content": message["content"]} for message in messages]
+        with self._lock:
+            self._messages.setdefault(session_id, []).extend(copies)
+
+    def load_messages(self, session_id, offset=0, limit=None):
+        with self._lock:
+            stored = self._messages.get(session_id, [])
+            end = None if limit is None else offset + limit
+            return [dict(message) for message in stored[offset:end]]
+
+    def tail_messages(self, session_id, limit):
+        with self._lock:
+            stored = self._messages.get(session_id, [])
+            return [dict(message) for message in stored[max(len(stored) - limit, 0):]]
+
+    def count_messages(self, session_id):
+        with self._lock:
+            return len(self._messages.get(session_id, []))
+
+    def delete_messages(self, session_id, keep=0):
+        with self._lock:
+            if session_id in self._messages:
+                del self._messages[session_id][max(keep, 0):]
+
+    # --- reports ---
+
+    def save_report(self, session_id, report):
+        report_json = json.dumps(report)
+        with self._lock:
+            self._reports[session_id] = report_json
+
+    def load_report(self, session_id):
+        with self._lock:
+            report_json = self._reports.get(session_id)
+        return json.loads(report_json) if report_json else None
+
+    # --- turns ---
+
+    def claim_turn(self, session_id, key, wait_timeout=session_store.TURN_WAIT_TIMEOUT, turn=None):
+        with self._lock:
+            expired = time.time() - session_store.TURN_REPLAY_TTL
+            for stale in [k for k, claim in self._turns.items() if claim["created_at"] < expired]:
+                del self._turns[stale]
+            deadline = time.monotonic() + wait_timeout
+            while True:
+                claim = self._turns.get(key)
+                if claim is None:
+                    self._turns[key] = {"session_id": session_id, "response": None, "created_at": time.time()}
+                    return None
+                if claim["response"] is not None:
+                    return claim["response"]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # The owner is stuck or gone; take over
+                    del self._turns[key]
+                    deadline = time.monotonic() + wait_timeout
+                    continue
+                if turn is None:
+                    self._lock.wait(remaining)
+                else:
+                    self._lock.wait(min(turn.slice(), remaining))
+                    turn.check()
+
+    def complete_turn(self, key, response):
+        with self._lock:
+            if key in self._turns:
+                self._turns[key]["response"] = response
+            self._lock.notify_all()
+
+    def release_turn(self, key):
+        with self._lock:
+            if key in self._turns and self._turns[key]["response"] is None:
+                del self._turns[key]
+            self._lock.notify_all()
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "memory": MemoryBackend}
+
+
+def open_storage(kind: str = "sqlite", path: str = session_store.DB_PATH) -> StorageBackend:
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{kind}' (expected one of {', '.join(BACKENDS)})")
+    return SQLiteBackend(path) if kind == "sqlite" else BACKENDS[kind]()
+
+
+_shared_backends: Dict[Tuple[str, str], StorageBackend] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_storage(kind: str = "sqlite", path: str = session_store.DB_PATH) -> StorageBackend:
+    """One backend per kind and database file for the whole process"""
+    with _shared_lock:
+        backend = _shared_backends.get((kind, path))
+        if backend is None:
+            backend = open_storage(kind, path)
+            _shared_backends[(kind, path)] = backend
+        return backend
+
+
+# ===================================================================
+# CONFORMANCE AND PERFORMANCE SUITE
+# ===================================================================
+
+# Mean latency per operation that every backend must stay under (local disk)
+PERF_BUDGETS_MS = {
+    "create_session": 20.0,
+    "save_state": 25.0,
+    "load_state": 5.0,
+    "append_messages_10": 30.0,
+    "load_messages_50": 10.0,
+    "tail_messages_40": 5.0,
+    "claim_complete_turn": 30.0,
+    "create_sessions_100": 250.0,
+    "load_states_100": 100.0,
+    "save_reports_100": 250.0,
+    "load_reports_100": 100.0,
+}
+
+
+def _check_sessions(backend: StorageBackend):
+    first = backend.create_session("alpha", "conv_a", "Technology")
+    second = backend.create_session("beta", None, "Healthcare", {"phase": "tic_collection"})
+    assert first != second, "session ids must be unique"
+    listed = [s["id"] for s in backend.list_sessions()]
+    assert listed.index(second) < listed.index(first), "list_sessions must return newest first"
+    assert len(backend.list_sessions(limit=1)) == 1, "list_sessions must honour limit"
+    session = backend.get_session(first)
+    assert (session["name"], session["conversation_id"], session["industry"]) == ("alpha", "conv_a", "Technology")
+    assert backend.get_session(10 ** 9) is None, "unknown session must be None"
+    ids = backend.create_sessions([{"name": f"bulk{i}", "industry": "Other"} for i in range(5)])
+    assert len(set(ids)) == 5 and all(backend.get_session(i)["name"] == f"bulk{n}" for n, i in enumerate(ids))
+
+
+def _check_state(backend: StorageBackend):
+    session_id = backend.create_session("state", None, "Other")
+    assert backend.load_state(session_id) == (None, 0), "new session must have no state at version 0"
+    assert backend.load_state(10 ** 9) == (None, 0), "unknown session must load as (None, 0)"
+    base = {"phase": "tic_collection", "answers": {1: "a"}, "items": ["x"]}
+    state, version = backend.save_state(session_id, None, 0, base)
+    assert version == 1 and backend.load_state(session_id) == (_json_copy(base), 1), "JSON round trip expected"
+    assert not backend.compare_and_swap_state(session_id, 0, {"stale": True}), "stale CAS must fail"
+    stored, version = backend.load_state(session_id)
+
+    # Two writers from the same base: the second one merges onto the first
+    mine = copy.deepcopy(stored)
+    mine["items"].append("mine")
+    theirs = copy.deepcopy(stored)
+    theirs["items"].append("theirs")
+    backend.save_state(session_id, stored, version, theirs)
+    merged, merged_version = backend.save_state(session_id, stored, version, mine)
+    assert merged_version == version + 2 and sorted(merged["items"]) == ["mine", "theirs", "x"]
+    assert backend.write_stats(session_id)["merges"] >= 1, "merges must be counted"
+
+    current, current_version = backend.load_state(session_id)
+    try:
+        backend.save_state(session_id, current, current_version, {**current, "industry": "mine"})
+        backend.save_state(session_id, current, current_version, {**current, "industry": "other"})
+        raise AssertionError("conflicting edits must raise StateConflictError")
+    except StateConflictError:
+        pass
+
+    other = backend.create_session("other", None, "Other", {"phase": "benchmarking"})
+    states = backend.load_states([session_id, other, 10 ** 9])
+    assert set(states) == {session_id, other}, "load_states must skip unknown sessions"
+    assert states[other] == ({"phase": "benchmarking"}, 0)
+
+
+def _check_event_log(backend: StorageBackend):
+    session_id = backend.create_session("events", None, "Other")
+    history: List[Any] = [None]
+    state, version = None, 0
+    for i in range(SNAPSHOT_EVERY + 3):
+        new_state = copy.deepcopy(state) if state else {"phase": "tic_collection", "tic_progress": {}}
+        new_state["tic_progress"][f"tic{i}"] = {"status": "confirmed", "summary": "s" * 200}
+        if i == 5:
+            new_state["phase"] = "benchmarking"
+        if i == 7:
+            del new_state["tic_progress"]["tic0"]
+        state, version = backend.save_state(session_id, state, version, new_state)
+        history.append(_json_copy(new_state))
+
+    events = backend.load_events(session_id)
+    assert [event["seq"] for event in events] == list(range(1, version + 1)), "one event per save, in order"
+    assert all(len(event["ops"]) <= 2 for event in events[1:]), "events must be diffs, not whole states"
+    assert events[5]["kind"] == "phase+tic_progress", f"unexpected event kind {events[5]['kind']}"
+    assert backend.load_snapshot(session_id) == (history[SNAPSHOT_EVERY], SNAPSHOT_EVERY), "snapshot expected"
+    assert backend.load_state(session_id) == (history[-1], version)
+    for past in (1, 6, 8, SNAPSHOT_EVERY, version - 1):
+        assert backend.state_at(session_id, past) == (history[past], past), f"wrong replay at version {past}"
+
+
+def _check_concurrent_writers(backend: StorageBackend, threads: int = 6, iterations: int = 15):
+    session_id = backend.create_session("concurrent", None, "Other", {"phase": "brainstorming", "answers": {}})
+
+    def writer(worker: int):
+        for i in range(iterations):
+            while True:
+                base, version = backend.load_state(session_id)
+                new_state = copy.deepcopy(base)
+                new_state["answers"][f"w{worker}_{i}"] = i
+                try:
+                    backend.save_state(session_id, base, version, new_state)
+                    break
+                except StateConflictError:
+                    continue
+
+    workers = [threading.Thread(target=writer, args=(w,)) for w in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    answers = backend.load_state(session_id)[0]["answers"]
+    assert len(answers) == threads * iterations, f"lost updates: {len(answers)} of {threads * iterations}"
+
+
+def _check_messages(backend: StorageBackend):
+    session_id = backend.create_session("messages", None, "Other")
+    other = backend.create_session("messages-other", None, "Other")
+    batch = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(25)]
+    backend.append_messages(session_id, batch[:10])
+    backend.append_messages(session_id, batch[10:])
+    backend.append_messages(session_id, [])
+    backend.append_messages(other, [{"role": "user", "content": "elsewhere"}])
+    assert backend.load_messages(session_id) == batch, "messages must come back in append order"
+    assert backend.load_messages(session_id, offset=20) == batch[20:]
+    assert backend.load_messages(session_id, offset=5, limit=3) == batch[5:8]
+    assert backend.tail_messages(session_id, 4) == batch[21:] and backend.tail_messages(session_id, 99) == batch
+    assert backend.count_messages(session_id) == 25 and backend.count_messages(other) == 1
+    backend.delete_messages(session_id, keep=22)
+    assert backend.load_messages(session_id) == batch[:22], "delete_messages must keep the first `keep`"
+    backend.delete_messages(session_id, keep=30)
+    assert backend.count_messages(session_id) == 22
+    backend.delete_messages(session_id)
+    assert backend.count_messages(session_id) == 0 and backend.load_messages(session_id) == []
+    assert backend.count_messages(other) == 1, "deleting one session's messages must not touch another's"
+
+
+def _check_reports(backend: StorageBackend):
+    first = backend.create_session("report", None, "Other")
+    second = backend.create_session("report2", None, "Other")
+    assert backend.load_report(first) is None
+    backend.save_report(first, {"overall": 1})
+    backend.save_report(first, {"overall": 2, "feedback": {1: "x"}})
+    assert backend.load_report(first) == {"overall": 2, "feedback": {"1": "x"}}, "save_report must replace"
+    backend.save_reports({second: {"overall": 3}})
+    assert backend.load_reports([first, second, 10 ** 9]) == {
+        first: {"overall": 2, "feedback": {"1": "x"}}, second: {"overall": 3}
+    }
+
+
+def _check_turns(backend: StorageBackend):
+    session_id = backend.create_session("turns", None, "Other")
+    key = session_store.turn_key(session_id, 0, f"hello {time.time()}")
+    assert backend.claim_turn(session_id, key) is None, "the first claim must own the turn"
+    replies: List[Optional[str]] = []
+    waiter = threading.Thread(target=lambda: replies.append(backend.claim_turn(session_id, key, wait_timeout=10)))
+    waiter.start()
+    time.sleep(0.05)
+    backend.complete_turn(key, "reply")
+    waiter.join()
+    assert replies == ["reply"], "a duplicate claim must wait for and replay the first reply"
+
+    released = session_store.turn_key(session_id, 0, f"retry {time.time()}")
+    assert backend.claim_turn(session_id, released) is None
+    backend.release_turn(released)
+    assert backend.claim_turn(session_id, released) is None, "a released turn must be claimable again"
+    backend.complete_turn(released, "done")
+
+
+CHECKS = {
+    "sessions": _check_sessions,
+    "state": _check_state,
+    "event_log": _check_event_log,
+    "concurrent_writers": _check_concurrent_writers,
+    "messages": _check_messages,
+    "reports": _check_reports,
+    "turns": _check_turns,
+}
+
+
+def _timed(fn: Callable[[int], Any], repeats: int) -> float:
+    """Mean ms per call of fn(i)"""
+    started = time.perf_counter()
+    for i in range(repeats):
+        fn(i)
+    return 1000 * (time.perf_counter() - started) / repeats
+
+
+def run_performance(backend: StorageBackend, repeats: int = 200) -> Dict[str, float]:
+    state = {"phase": "brainstorming", "tic_progress": {f"tic{i}": {"summary": "s" * 400} for i in range(7)},
+             "brainstorming_progress": {"answers": {str(i): {"question": "q" * 100, "answer": "a" * 300}
+                                                    for i in range(10)}}}
+    ids = [backend.create_session("perf", None, "Other") for _ in range(5)]
+    results = {"create_session": _timed(lambda i: backend.create_session(f"perf{i}", None, "Other"), repeats)}
+    versions = dict.fromkeys(ids, 0)
+
+    def save(i):
+        session_id = ids[i % len(ids)]
+        versions[session_id] = backend.save_state(session_id, None, versions[session_id], state)[1]
+
+    results["save_state"] = _timed(save, repeats)
+    results["load_state"] = _timed(lambda i: backend.load_state(ids[i % len(ids)]), repeats)
+    messages = [{"role": "user", "content": "m" * 200}] * 10
+    results["append_messages_10"] = _timed(lambda i: backend.append_messages(ids[0], messages), repeats)
+    results["load_messages_50"] = _timed(lambda i: backend.load_messages(ids[0], offset=i * 5, limit=50), repeats)
+    # Opening a session with a long history (10 * repeats messages by now)
+    results["tail_messages_40"] = _timed(lambda i: backend.tail_messages(ids[0], 40), repeats)
+
+    def turn(i):
+        key = session_store.turn_key(ids[0], i, f"perf {time.time()}")
+        backend.claim_turn(ids[0], key)
+        backend.complete_turn(key, "reply")
+
+    results["claim_complete_turn"] = _timed(turn, repeats)
+
+    bulk_repeats = max(repeats // 20, 3)
+    created: List[int] = []
+    results["create_sessions_100"] = _timed(lambda i: created.extend(backend.create_sessions(
+        [{"name": f"bulk{n}", "industry": "Other", "state": state} for n in range(100)])), bulk_repeats)
+    hundred = created[:100]
+    results["load_states_100"] = _timed(lambda i: backend.load_states(hundred), bulk_repeats)
+    report = {"overall": {"score": "18/25"}, "detailed_feedback": "f" * 2000}
+    results["save_reports_100"] = _timed(lambda i: backend.save_reports(dict.fromkeys(hundred, report)),
+                                         bulk_repeats)
+    results["load_reports_100"] = _timed(lambda i: backend.load_reports(hundred), bulk_repeats)
+    return {op: round(ms, 3) for op, ms in results.items()}
+
+
+def run_conformance(factory: Callable[[], StorageBackend], repeats: int = 200,
+                    budgets: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Run every behaviour check and the performance budgets against a fresh backend from factory()"""
+    budgets = budgets or PERF_BUDGETS_MS
+    backend = factory()
+    checks: Dict[str, str] = {}
+    try:
+        for name, check in CHECKS.items():
+            try:
+                check(backend)
+                checks[name] = "ok"
+            except Exception as e:
+                checks[name] = f"FAILED: {type(e).__name__}: {str(e)}"
+        perf = {
+            op: {"mean_ms": ms, "budget_ms": budgets.get(op), "ok": op not in budgets or ms <= budgets[op]}
+            for op, ms in run_performance(backend, repeats).items()
+        }
+    finally:
+        backend.close()
+
+    failed = [name for name, outcome in checks.items() if outcome != "ok"]
+    slow = [op for op, result in perf.items() if not result["ok"]]
+    problems = ([f"failed: {', '.join(failed)}"] if failed else []) + ([f"over budget: {', '.join(slow)}"] if slow else [])
+    return {
+        "success": not problems,
+        "data": {"backend": backend.name, "checks": checks, "perf": perf},
+        "message": "; ".join(problems) or "All checks passed"
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Storage backend conformance and performance suite")
+    parser.add_argument("--check", action="store_true", help="Run the suite")
+    parser.add_argument("--backend", choices=list(BACKENDS) + ["all"], default="all")
+    parser.add_argument("--db", default=None, help="SQLite file (defaults to a temporary file)")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.check:
+        db_path = args.db or os.path.join(tempfile.mkdtemp(), "storage_check.db")
+        kinds = list(BACKENDS) if args.backend == "all" else [args.backend]
+        results = [run_conformance(lambda kind=kind: open_storage(kind, db_path), args.repeats) for kind in kinds]
+        print(json.dumps(results, indent=2))
+        raise SystemExit(0 if all(result["success"] for result in results) else 1)
+    parser.print_help()
@@ -0,0 +1,102 @@
+"""
+Small in-memory TF-IDF index used by the local caches and catalogs.
+
+Documents are bags of lowercased content words plus adjacent-word bigrams,
+weighted with sublinear TF and smoothed IDF, and L2-normalized so a dot
+product is cosine similarity. Postings are kept per partition (a TIC, an
+industry, ...) and rebuilt lazily after the corpus changes. Pure Python, so
+it runs anywhere the app does; corpora here are thousands of short texts.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Short questions with little vocabulary overlap would otherwise never match
+_CONTRACTIONS = {
+    "what's": "what is", "whats": "what is", "who's": "who is", "how's": "how is",
+    "don't": "do not", "doesn't": "does not", "isn't": "is not", "i'm": "i am"
+}
+
+# Dropped from vectors; function words and question words carry no topic signal
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "did", "i", "me", "my", "you", "your",
+    "we", "our", "it", "its", "this", "that", "of", "to", "in", "on", "for", "and", "or", "with",
+    "what", "how", "why", "which", "who", "can", "could", "would", "should", "please", "mean", "means",
+    "by", "about", "am", "not", "so", "just", "exactly", "stand", "stands", "meaning", "term", "define",
+    "explain", "understand", "their", "they", "them", "will", "as", "at", "from", "into", "than", "also"
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words plus adjacent-word bigrams"""
+    text = (text or "").lower()
+    for contraction, expanded in _CONTRACTIONS.items():
+        text = text.replace(contraction, expanded)
+    words = [word for word in _TOKEN_RE.findall(text) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class TfidfIndex:
+    def __init__(self):
+        self._terms: Dict[Hashable, Counter] = {}
+        self._partitions: Dict[Hashable, Any] = {}
+        self._document_frequency: Counter = Counter()
+        # partition -> term -> [(doc id, weight)]; None until rebuilt
+        self._postings: Optional[Dict[Any, Dict[str, List[Tuple[Hashable, float]]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._terms
+
+    def add(self, doc_id: Hashable, text: str, partition: Any = None):
+        """Index (or re-index) a document"""
+        if doc_id in self._terms:
+            self._document_frequency.subtract(self._terms[doc_id].keys())
+        terms = Counter(tokenize(text))
+        self._terms[doc_id] = terms
+        self._partitions[doc_id] = partition
+        self._document_frequency.update(terms.keys())
+        self._postings = None
+
+    def vector(self, terms: Counter) -> Dict[str, float]:
+        total = len(self._terms) + 1
+        vector = {
+            term: (1 + math.log(count)) * (math.log(total / (1 + self._document_frequency[term])) + 1)
+            for term, count in terms.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def _rebuild(self):
+        postings: Dict[Any, Dict[str, List[Tuple[Hashable, float]]]] = {}
+        for doc_id, terms in self._terms.items():
+            partition_postings = postings.setdefault(self._partitions[doc_id], {})
+            for term, weight in self.vector(terms).items():
+                partition_postings.setdefault(term, []).append((doc_id, weight))
+        self._postings = postings
+
+    def search(self, text: str, partitions: Optional[List[Any]] = None,
+               limit: int = 5) -> List[Tuple[Hashable, float]]:
+        """Top documents by cosine similarity, optionally restricted to some partitions"""
+        if self._postings is None:
+            self._rebuild()
+        searched = self._postings.keys() if partitions is None else [p for p in partitions if p in self._postings]
+
+        scores: Dict[Hashable, float] = {}
+        for term, weight in self.vector(Counter(tokenize(text))).items():
+            for partition in searched:
+                for doc_id, doc_weight in self._postings[partition].get(term, ()):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * doc_weight
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def similarity(self, text_a: str, text_b: str) -> float:
+        """Cosine similarity of two texts under this corpus's IDF weights"""
+        vector_a = self.vector(Counter(tokenize(text_a)))
+        vector_b = self.vector(Counter(tokenize(text_b)))
+        return sum(weight * vector_b.get(term, 0.0) for term, weight in vector_a.items())
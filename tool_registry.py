@@ -0,0 +1,204 @@
+"""
+Tool registry for the agents' function tools.
+
+Each tool declares its JSON schema once. The schema is compiled into a plain
+Python validator when the tool is registered (and memoized process-wide), so
+model-supplied arguments are checked before the handler runs, handlers are
+found with a dict lookup, and every tool records calls, latency and
+validation failures.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# A compiled validator returns a list of error strings (empty when valid)
+Validator = Callable[[Any, str], List[str]]
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+_compiled_cache: Dict[str, Validator] = {}
+_compiled_lock = threading.Lock()
+
+
+def _compile(schema: Dict[str, Any]) -> Validator:
+    checks: List[Validator] = []
+
+    schema_type = schema.get("type")
+    if schema_type:
+        types = schema_type if isinstance(schema_type, list) else [schema_type]
+        type_checks = [_TYPE_CHECKS[t] for t in types]
+
+        def check_type(value, path, type_checks=type_checks, types=types):
+            if not any(check(value) for check in type_checks):
+                return [f"{path or 'arguments'}: expected {'/'.join(types)}, got {type(value).__name__}"]
+            return []
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        allowed_set = set(allowed)
+
+        def check_enum(value, path):
+            if isinstance(value, (str, int)) and value not in allowed_set:
+                return [f"{path}: must be one of {allowed}"]
+            return []
+        checks.append(check_enum)
+
+    if "properties" in schema or "required" in schema:
+        property_validators = {
+            name: _compile(sub_schema) for name, sub_schema in schema.get("properties", {}).items()
+        }
+        required = list(schema.get("required", []))
+        closed = schema.get("additionalProperties") is False
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}.{name}".lstrip('.') + ": required" for name in required if value.get(name) is None]
+            for name, item in value.items():
+                validator = property_validators.get(name)
+                child_path = f"{path}.{name}".lstrip('.')
+                if validator is not None:
+                    # Missing/null required values are already reported above
+                    if item is not None:
+                        errors.extend(validator(item, child_path))
+                elif closed:
+                    errors.append(f"{child_path}: unexpected property")
+            return errors
+        checks.append(check_object)
+
+    if "items" in schema:
+        item_validator = _compile(schema["items"])
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            errors = []
+            for index, item in enumerate(value):
+                errors.extend(item_validator(item, f"{path}[{index}]"))
+            return errors
+        checks.append(check_items)
+
+    def validate(value, path=""):
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+            if errors:
+                # Later checks assume the earlier ones (e.g. type) passed
+                break
+        return errors
+
+    return validate
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Compile a JSON schema into a validator, reusing earlier compilations of the same schema"""
+    cache_key = json.dumps(schema, sort_keys=True)
+    validator = _compiled_cache.get(cache_key)
+    if validator is None:
+        with _compiled_lock:
+            validator = _compiled_cache.get(cache_key)
+            if validator is None:
+                validator = _compile(schema)
+                _compiled_cache[cache_key] = validator
+    return validator
+
+
+class ToolMetrics:
+    """Thread-safe per-tool counters shared by every registry in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, tool_name: str, latency: float, validation_failed: bool = False, error: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, {
+                "calls": 0, "validation_failures": 0, "errors": 0, "total_latency": 0.0, "max_latency": 0.0
+            })
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            if validation_failed:
+                stats["validation_failures"] += 1
+            if error:
+                stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_latency_ms": round(1000 * stats["total_latency"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "max_latency_ms": round(1000 * stats["max_latency"], 2)
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+default_metrics = ToolMetrics()
+
+
+class ToolRegistry:
+    def __init__(self, metrics: Optional[ToolMetrics] = None):
+        self.metrics = metrics or default_metrics
+        self._tools: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, description: str, parameters: Dict[str, Any],
+                 handler: Callable[[dict], dict]):
+        self._tools[name] = {
+            "spec": {
+                "type": "function",
+                "name": name,
+                "description": description,
+                "parameters": parameters
+            },
+            "validator": compile_schema(parameters),
+            "handler": handler
+        }
+
+    @property
+    def specs(self) -> List[Dict[str, Any]]:
+        """Tool definitions in the format expected by the Responses API"""
+        return [tool["spec"] for tool in self._tools.values()]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def dispatch(self, tool_name: str, arguments: Optional[dict]) -> dict:
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            return {
+                "success": False,
+                "data": {},
+                "message": f"Unknown function: {tool_name}"
+            }
+
+        started = time.perf_counter()
+        arguments = arguments if arguments is not None else {}
+        errors = tool["validator"](arguments, "")
+        if errors:
+            self.metrics.record(tool_name, time.perf_counter() - started, validation_failed=True)
+            return {
+                "success": False,
+                "data": {"validation_errors": errors},
+                "message": f"Invalid arguments for {tool_name}: {'; '.join(errors)}"
+            }
+
+        try:
+            result = tool["handler"](arguments)
+        except Exception:
+            self.metrics.record(tool_name, time.perf_counter() - started, error=True)
+            raise
+        self.metrics.record(tool_name, time.perf_counter() - started)
+        return result
@@ -0,0 +1,245 @@
+"""
+Per-turn deadlines and cooperative cancellation of LLM work.
+
+A Turn covers one user action (a chat message, a company selection, an
+evaluation request) from the first LLM call to the point where its results
+are saved. It carries a deadline and a cancelled flag. The gateway reads the
+active turn from a contextvar: it checks the turn before sending, caps
+rate-limiter waits at the time remaining, and waits for the provider call
+while polling the turn, so a cancelled or overdue turn stops waiting at once.
+The abandoned HTTP call finishes on its own thread and its result is dropped.
+
+Some calls have server-side effects: a Responses call with a conversation,
+or a conversation items write, adds items to the OpenAI conversation that
+the evaluation reads back later. Such a call registers an undo with its turn.
+A call that completed is undone by rollback() when the turn ends without
+commit(). A call that was abandoned is undone by its own thread once it
+finishes. Both undos run in the background and are best effort: an undo
+that fails is logged and the items stay.
+
+A turn is cancelled when a newer turn starts for the same business session
+(another tab) with a different key, when its superseded probe reports that
+the user has moved on (Streamlit queued a rerun for a new message or a
+navigation), or when its deadline passes. TurnCancelled derives from
+BaseException, like Streamlit's own stop/rerun signals, so the broad
+``except Exception`` fallbacks in the agents cannot swallow it and carry on
+mutating state.
+
+A turn's key identifies the work it does (for a chat message, the
+idempotency key of session_store.turn_key). A duplicate submission has the
+same key as the running turn, so it leaves that turn alone and waits for its
+result instead of cancelling it.
+
+Callers make commit() the last cancellation point before persisting. After
+commit() the turn can no longer be cancelled.
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+# How often a waiting call re-checks its turn
+POLL_INTERVAL = 0.1
+
+# Active turn for the current script run; read by the LLM gateway
+current_turn: contextvars.ContextVar = contextvars.ContextVar('llm_current_turn', default=None)
+
+
+class TurnCancelled(BaseException):
+    """The turn was superseded or cancelled; its partial results must not be kept"""
+
+    def __init__(self, message: str, reason: str = "superseded"):
+        super().__init__(message)
+        self.reason = reason
+
+
+class DeadlineExceeded(TurnCancelled):
+    """The turn ran past its deadline"""
+
+    def __init__(self, message: str):
+        super().__init__(message, "deadline")
+
+
+def submit(fn: Callable[[], Any], name: str = "llm-call") -> Future:
+    """Start fn on a daemon thread with the caller's contextvars; the caller may stop waiting at any time"""
+    future: Future = Future()
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return future
+
+
+def _run_undo(fn: Callable[[], None]):
+    def target():
+        try:
+            fn()
+        except Exception as e:
+            print(f"TURN UNDO FAILED: {type(e).__name__}: {str(e)}")
+
+    threading.Thread(target=target, name="turn-undo", daemon=True).start()
+
+
+# Messages already printed by warn_once; module state survives Streamlit reruns, the app script does not
+_warned: set = set()
+_warned_lock = threading.Lock()
+
+
+def warn_once(message: str):
+    """Print message the first time it is reported in this process"""
+    with _warned_lock:
+        if message in _warned:
+            return
+        _warned.add(message)
+    print(message)
+
+
+_turn_ids = itertools.count(1)
+
+
+class Turn:
+    def __init__(self, owner: Any, kind: str, timeout: float, superseded: Optional[Callable[[], bool]] = None,
+                 key: Optional[str] = None):
+        self.id = next(_turn_ids)
+        self.owner = owner
+        self.kind = kind
+        self.key = key
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.committed = False
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._superseded = superseded
+        # Undo functions of completed calls with server-side effects, oldest first
+        self._undo: List[Callable[[], None]] = []
+
+    def cancel(self, reason: str = "superseded"):
+        if self.committed or self._cancelled.is_set():
+            return
+        self.reason = reason
+        self._cancelled.set()
+        print(f"TURN CANCELLED: {self.kind} #{self.id} ({reason})")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> float:
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def check(self):
+        """Raise if the turn should stop; a no-op once committed"""
+        if self.committed:
+            return
+        if not self.cancelled and self._superseded is not None:
+            try:
+                if self._superseded():
+                    self.cancel("superseded")
+            except Exception:
+                pass
+        if self.cancelled:
+            raise TurnCancelled(f"{self.kind} turn #{self.id} was cancelled ({self.reason})", self.reason)
+        if time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(f"{self.kind} turn #{self.id} exceeded its deadline")
+
+    def commit(self):
+        """Last cancellation point: after this the turn's results are persisted"""
+        self.check()
+        self.committed = True
+
+    def slice(self, interval: float = POLL_INTERVAL) -> float:
+        """How long to block before the next check(): at most interval, never past the deadline"""
+        return max(min(interval, self.remaining()), 0.001)
+
+    def run(self, fn: Callable[[], Any], undo: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Run fn on its own thread and wait for it, giving up as soon as the turn is cancelled or overdue.
+        undo(result) reverses fn's server-side effects if the turn does not commit.
+        """
+        self.check()
+        future = submit(fn, name=f"turn-{self.id}-call")
+        while True:
+            try:
+                result = future.result(timeout=self.slice())
+            except FutureTimeout:
+                try:
+                    self.check()
+                except TurnCancelled:
+                    if undo is not None:
+                        # This turn can no longer commit: undo the call whenever it finishes
+                        def undo_when_done(done: Future):
+                            if done.exception() is None:
+                                _run_undo(lambda: undo(done.result()))
+
+                        future.add_done_callback(undo_when_done)
+                    raise
+                continue
+            if undo is not None:
+                self._undo.append(lambda: undo(result))
+            return result
+
+    def rollback(self):
+        """Undo the server-side effects of this turn's completed calls, newest first, in the background"""
+        if self.committed:
+            return
+        undo, self._undo = self._undo, []
+        for fn in reversed(undo):
+            _run_undo(fn)
+
+
+class TurnRegistry:
+    """Active turns per business session, so a newer turn supersedes older ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[Any, List[Turn]] = {}
+        self._stats = {"started": 0, "completed": 0, "superseded": 0, "deadline": 0, "failed": 0}
+
+    def begin(self, owner: Any, kind: str, timeout: float, superseded: Optional[Callable[[], bool]] = None,
+              key: Optional[str] = None) -> Turn:
+        """Start a turn for owner, cancelling its running turns except those with the same key"""
+        turn = Turn(owner, kind, timeout, superseded, key)
+        with self._lock:
+            running = self._active.setdefault(owner, [])
+            previous = [other for other in running if key is None or other.key != key]
+            running.append(turn)
+            self._stats["started"] += 1
+        for other in previous:
+            other.cancel("superseded")
+        return turn
+
+    def finish(self, turn: Turn, error: Optional[BaseException] = None):
+        with self._lock:
+            running = self._active.get(turn.owner, [])
+            if turn in running:
+                running.remove(turn)
+                if not running:
+                    del self._active[turn.owner]
+            if turn.committed or error is None:
+                outcome = "completed"
+            elif isinstance(error, TurnCancelled):
+                outcome = error.reason if error.reason in self._stats else "superseded"
+            else:
+                outcome = "failed"
+            self._stats[outcome] += 1
+
+    def cancel(self, owner: Any, reason: str = "superseded"):
+        with self._lock:
+            running = list(self._active.get(owner, []))
+        for turn in running:
+            turn.cancel(reason)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "active": sum(len(running) for running in self._active.values())}
+
+
+default_registry = TurnRegistry()